@@ -0,0 +1,7 @@
+"""python -m phone_spider 入口"""
+
+from phone_spider.cli import main
+
+
+if __name__ == '__main__':
+    main()
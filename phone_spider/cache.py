@@ -0,0 +1,109 @@
+"""
+查询结果缓存
+按 (城市, 规范化尾号查询) 缓存搜索结果，带 TTL 和 LRU 容量上限；
+同一查询正在执行时，其它调用方等待同一次执行（single-flight），不会各自驱动浏览器。
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    """规范化尾号查询：去掉空白和通配符 *，如 " 000* " -> "000" """
+    return str(query).strip().rstrip('*').strip()
+
+
+class QueryCache:
+    """带 TTL/LRU 的查询结果缓存，支持并发合并
+
+    Args:
+        ttl: 结果有效期（秒）
+        maxsize: 最多缓存的查询数量，超出后淘汰最久未使用的
+    """
+
+    def __init__(self, ttl=300, maxsize=256, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (过期时间, 结果)
+        self._inflight = {}            # key -> 正在执行的 Task
+        self.hits = 0        # 直接命中缓存
+        self.coalesced = 0   # 等待了同一次正在执行的查询
+        self.misses = 0      # 实际执行的查询
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires, value = entry
+        if expires < self._clock():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value):
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_run(self, city, query, factory):
+        """返回缓存结果；未命中时执行 factory() 并缓存
+
+        Args:
+            city: 城市
+            query: 尾号查询，如 "000*"
+            factory: 无参协程函数，真正执行搜索并返回结果
+        """
+        key = (city, normalize_query(query))
+        found, value = self._lookup(key)
+        if found:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+
+        # shield：某个调用方被取消时，共享的执行仍为其它调用方继续
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        if task.exception() is None:
+            self._store(key, task.result())
+
+    def invalidate(self, city=None, query=None):
+        """清除缓存：指定城市/查询，或全部"""
+        if city is None:
+            self._entries.clear()
+            return
+        if query is None:
+            for key in [k for k in self._entries if k[0] == city]:
+                del self._entries[key]
+            return
+        self._entries.pop((city, normalize_query(query)), None)
+
+    @property
+    def saved(self):
+        """节省的搜索次数"""
+        return self.hits + self.coalesced
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.coalesced + self.misses
+        return self.saved / total if total else 0.0
+
+    def format_stats(self):
+        return (f'缓存: 命中 {self.hits} 次，合并 {self.coalesced} 次，'
+                f'实际搜索 {self.misses} 次，命中率 {self.hit_rate:.0%}，'
+                f'节省 {self.saved} 次搜索')
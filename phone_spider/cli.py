@@ -0,0 +1,892 @@
+"""
+统一命令行入口
+
+使用方法:
+    python -m phone_spider crawl --city 广州 --engine playwright-pool
+    python -m phone_spider sweep --cities 深圳 广州 东莞
+    python -m phone_spider portals gd189 sites/js189.json
+    python -m phone_spider diff 旧结果.json 新结果.json
+    python -m phone_spider verify numbers.txt --city 深圳
+    python -m phone_spider watch watchlist.json phones_*.json
+    python -m phone_spider inventory --city 深圳 --pattern 888
+    python -m phone_spider schedule --budget 2 --run --probe
+    python -m phone_spider ingest . --db phones.db
+    python -m phone_spider export phones_*.json --out dataset
+    python -m phone_spider bench startup
+    python -m phone_spider bench records
+    python -m phone_spider bench logging
+    python -m phone_spider crawl --city 深圳 --profiling
+
+各引擎的重量级依赖（Playwright、Scrapy + Twisted）只在真正运行该引擎时才导入，
+--help 以及 export/diff 等子命令不会加载它们。
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+
+
+# 项目根目录（spider_simple.py 等脚本所在目录）
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENGINES = ('playwright-serial', 'playwright-pool', 'scrapy')
+
+
+def _import_root_module(name):
+    """导入项目根目录下的爬虫脚本"""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import importlib
+    return importlib.import_module(name)
+
+
+def _memory_monitor(args):
+    from phone_spider.resources import MemoryMonitor
+    return MemoryMonitor(args.memory_budget, args.heap_budget)
+
+
+def _query_cache(args):
+    if not args.cache_ttl:
+        return None
+    from phone_spider.cache import QueryCache
+    return QueryCache(ttl=args.cache_ttl)
+
+
+def _phone_store(args):
+    if not args.harvest:
+        return None
+    from phone_spider.store import PhoneStore
+    return PhoneStore(args.db)
+
+
+def _queries(args, site=None):
+    if not args.tail_digits:
+        return None
+    from phone_spider.sites import SiteProfile
+    return SiteProfile.resolve(site or getattr(args, 'site', None)).tail_queries(args.tail_digits)
+
+
+def _coverage(args):
+    if not args.coverage_target:
+        return None
+    from phone_spider.coverage import CoverageEstimator
+    return CoverageEstimator(args.coverage_target)
+
+
+def _driver(args, **kwargs):
+    from phone_spider.driver import SearchDriver
+    return SearchDriver(mode=args.driver, **kwargs)
+
+
+def _sessions(args):
+    if args.no_state:
+        return None
+    from phone_spider.session import StorageStateCache
+    return StorageStateCache(args.state_dir)
+
+
+def _metrics(args):
+    if args.metrics_port is None and not args.status_interval:
+        return None
+    from phone_spider.metrics import CrawlMetrics
+    metrics = CrawlMetrics()
+    if args.metrics_port is not None:
+        metrics.serve(args.metrics_port)
+    return metrics
+
+
+def _deadline(args):
+    if not args.deadline:
+        return None
+    from phone_spider.deadline import Deadline
+    return Deadline(args.deadline)
+
+
+def _supervisor(args):
+    if not args.supervise:
+        return None
+    from phone_spider.supervisor import BrowserSupervisor
+    return BrowserSupervisor(heartbeat_interval=args.heartbeat)
+
+
+def _egress(args):
+    if not args.egress:
+        return None
+    from phone_spider.egress import EgressPool
+    return EgressPool.from_specs(args.egress, rate=args.egress_rate)
+
+
+def _pipeline(args):
+    if args.pipeline is None:
+        return None
+    from phone_spider.stages import parse_workers
+    return parse_workers(args.pipeline)
+
+
+def _probe(args, store=None):
+    if not args.probe:
+        return None
+    from phone_spider.probe import ChangeProbe
+    from phone_spider.store import PhoneStore
+    return ChangeProbe(store or PhoneStore(args.db), args.probe_queries, args.full_every)
+
+
+def _log_output(args):
+    from phone_spider.logs import LogOutput
+    # 启用状态行时默认只输出警告（进度看状态行）
+    level = args.log_level or ('warning' if getattr(args, 'status_interval', None) else 'info')
+    return LogOutput(level, args.log_format, args.log_json, args.log_sample, args.log_rate)
+
+
+def _run_playwright(args, concurrent):
+    import asyncio
+    spider_simple = _import_root_module('spider_simple')
+    crawler = spider_simple.TelecomCrawler(
+        city=args.city,
+        concurrent=concurrent,
+        memory_monitor=_memory_monitor(args),
+        cache=_query_cache(args),
+        store=_phone_store(args),
+        queries=_queries(args),
+        coverage=_coverage(args),
+        driver=_driver(args),
+        sessions=_sessions(args),
+        metrics=_metrics(args),
+        status_interval=args.status_interval,
+        profile=args.profile,
+        site=args.site,
+        deadline=_deadline(args),
+        supervisor=_supervisor(args),
+        egress=_egress(args),
+        pipeline=_pipeline(args),
+        extraction=args.extract,
+        probe=_probe(args),
+    )
+    try:
+        asyncio.run(crawler.run())
+    finally:
+        if crawler.egress:
+            crawler.egress.close()
+    _report_watch(args, crawler.phone_numbers)
+
+
+def _report_watch(args, phones):
+    if not args.watch:
+        return
+    from phone_spider.watchlist import WatchList, print_hits
+    watchlist = WatchList.load(args.watch)
+    print_hits(watchlist.match_many(phones))
+
+
+def _run_scrapy(args):
+    os.environ.setdefault('SCRAPY_SETTINGS_MODULE', 'phone_spider.settings')
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    process = CrawlerProcess(get_project_settings())
+    process.crawl('telecom', city=args.city, site=args.site)
+    process.start()
+
+
+def cmd_crawl(args):
+    """单城市爬取"""
+    print('=' * 60)
+    print('电信号码爬虫 - 启动中...')
+    print(f'目标城市: {args.city}')
+    print(f'运行引擎: {args.engine}')
+    print('=' * 60)
+
+    if args.engine == 'playwright-serial':
+        _run_playwright(args, concurrent=False)
+    elif args.engine == 'playwright-pool':
+        _run_playwright(args, concurrent=True)
+    elif args.engine == 'scrapy':
+        _run_scrapy(args)
+
+
+def cmd_sweep(args):
+    """多城市爬取"""
+    import asyncio
+    spider_multi_city = _import_root_module('spider_multi_city')
+
+    print('=' * 60)
+    print('电信号码爬虫 - 多城市版 - 启动中...')
+    print(f'目标城市: {", ".join(args.cities)}')
+    print('=' * 60)
+
+    crawler = spider_multi_city.TelecomMultiCityCrawler(
+        cities=args.cities,
+        memory_monitor=_memory_monitor(args),
+        store=_phone_store(args),
+        queries=_queries(args),
+        coverage_target=args.coverage_target,
+        driver=_driver(args, ui_waits=(0, 0, 3, None)),
+        sessions=_sessions(args),
+        metrics=_metrics(args),
+        status_interval=args.status_interval,
+        profile=args.profile,
+        site=args.site,
+        deadline=_deadline(args),
+        supervisor=_supervisor(args),
+        egress=_egress(args),
+        probe=_probe(args),
+    )
+    try:
+        asyncio.run(crawler.run())
+    finally:
+        if crawler.egress:
+            crawler.egress.close()
+    _report_watch(args, (p for r in crawler.results for p in r['phone']))
+
+
+def cmd_portals(args):
+    """同时爬取多个选号网站（每个网站按自己的并发上限运行）"""
+    import asyncio
+    from phone_spider.sites import crawl_sites
+
+    spider_simple = _import_root_module('spider_simple')
+    store = _phone_store(args)
+    deadline = _deadline(args)
+
+    def factory(site, city):
+        return spider_simple.TelecomCrawler(
+            city=city,
+            site=site,
+            store=store,
+            queries=_queries(args, site),
+            driver=_driver(args),
+            sessions=_sessions(args),  # 快照按 (网站名, 城市) 区分，所有网站共用一个目录
+            profile=args.profile,
+            deadline=deadline,
+        )
+
+    results = asyncio.run(crawl_sites(args.sites, factory, cities=args.cities))
+    print(f'\n{"=" * 60}')
+    for name, city, crawler in sorted(results, key=lambda r: (r[0], r[1])):
+        print(f'  [{name}] {city}: {len(crawler.phone_numbers)} 个号码')
+
+
+def cmd_verify(args):
+    """批量核对号码是否仍在售"""
+    import asyncio
+    from phone_spider.verify import load_numbers, print_report, save_report
+
+    phones = []
+    for path in args.files:
+        phones.extend(load_numbers(path))
+    phones = list(dict.fromkeys(phones))
+    if not phones:
+        print('没有找到要核对的号码')
+        return
+    print(f'核对 {args.city} 的 {len(phones)} 个号码（第一轮 {args.start_digits} 位尾号）')
+
+    spider_simple = _import_root_module('spider_simple')
+    crawler = spider_simple.TelecomCrawler(
+        city=args.city,
+        cache=_query_cache(args),
+        driver=_driver(args),
+        sessions=_sessions(args),
+        profile=args.profile,
+        site=args.site,
+    )
+    result = asyncio.run(crawler.verify(phones, start_digits=args.start_digits))
+    print_report(result)
+    if args.out:
+        save_report(result, args.out)
+
+
+def _phones_by_city(path):
+    from phone_spider.export import load_result_file
+    result = {}
+    for row in load_result_file(path):
+        result.setdefault(row['city'], set()).add(row['phone'])
+    return result
+
+
+def cmd_diff(args):
+    """比较两次结果：每个城市新增/下架的号码"""
+    old = _phones_by_city(args.old)
+    new = _phones_by_city(args.new)
+    for city in sorted(set(old) | set(new)):
+        before = old.get(city, set())
+        after = new.get(city, set())
+        added = sorted(after - before)
+        removed = sorted(before - after)
+        print(f'{city}: 新增 {len(added)} 个，下架 {len(removed)} 个，保持 {len(before & after)} 个')
+        if args.verbose:
+            for phone in added:
+                print(f'    + {phone}')
+            for phone in removed:
+                print(f'    - {phone}')
+
+
+def cmd_watch(args):
+    """用关注列表匹配已有结果文件"""
+    import glob
+    from phone_spider.export import load_result_file
+    from phone_spider.watchlist import WatchList, print_hits
+
+    watchlist = WatchList.load(args.watchlist)
+    phones = set()
+    for pattern in args.files:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            phones.update(str(row['phone']) for row in load_result_file(path))
+    print(f'共 {len(watchlist)} 条关注规则，{len(phones)} 个号码')
+    print_hits(watchlist.match_many(sorted(phones)))
+
+
+def cmd_inventory(args):
+    """查看号码库存（不需要重新爬取）"""
+    from phone_spider.store import PhoneStore
+
+    with PhoneStore(args.db) as store:
+        if not args.city:
+            stats = store.stats()
+            for city, total in store.totals().items():
+                summary = '，'.join(f'{source} {count} 个' for source, count in stats.get(city, {}).items())
+                print(f'{city}: 共 {total} 个' + (f'（{summary}）' if summary else ''))
+            return
+        phones = store.view(args.city, pattern=args.pattern, source=args.source, site=args.site)
+        for phone in phones:
+            print(phone)
+        print(f'共 {len(phones)} 个号码')
+
+
+def cmd_schedule(args):
+    """按号码库存的变化速度安排重新爬取"""
+    from phone_spider.schedule import RecrawlPlan
+    from phone_spider.sites import SiteProfile
+    from phone_spider.store import PhoneStore
+
+    with PhoneStore(args.db) as store:
+        cities = args.cities or store.cities()
+        if not cities:
+            print('号码库存中还没有城市，请用 --cities 指定')
+            return
+        plan = RecrawlPlan.build(store, cities, _queries(args) or SiteProfile.resolve(args.site).repeat_queries(),
+                                 args.budget)
+        print(plan.format_report())
+        if not args.run:
+            return
+
+        import asyncio
+        spider_simple = _import_root_module('spider_simple')
+        probe = _probe(args, store)
+        for city, queries in plan.due().items():
+            print(f'\n🔁 重新爬取 {city} 的 {len(queries)} 个到期查询')
+            crawler = spider_simple.TelecomCrawler(
+                city=city,
+                store=store,
+                queries=queries,
+                driver=_driver(args),
+                sessions=_sessions(args),
+                profile=args.profile,
+                site=args.site,
+                probe=probe,
+            )
+            asyncio.run(crawler.run())
+
+
+def cmd_ingest(args):
+    """把历史结果文件和日志导入号码库存"""
+    from phone_spider.ingest import Ingestor, discover
+    from phone_spider.store import PhoneStore
+
+    paths = discover(args.paths, logs=not args.no_logs)
+    print(f'🔍 发现 {len(paths)} 个文件，使用 {args.jobs or os.cpu_count()} 个解析进程')
+    with PhoneStore(args.db) as store:
+        ingestor = Ingestor(store, jobs=args.jobs)
+        ingestor.run(paths)
+        print(ingestor.format_stats())
+
+
+def cmd_export(args):
+    """列式导出"""
+    from phone_spider import export
+    argv = list(args.files) + ['--out', args.out, '--format', args.format]
+    if args.compact:
+        argv.append('--compact')
+    export.main(argv)
+
+
+def bench_startup(args):
+    """测量 CLI 冷启动时间（子进程，多次取中位数）"""
+    import statistics
+    import subprocess
+    import time
+
+    commands = [
+        ['--help'],
+        ['crawl', '--help'],
+        ['export', '--help'],
+        ['diff', '--help'],
+    ]
+    print(f'CLI 启动耗时（{args.repeat} 次取中位数，目标 < 100ms）')
+    for command in commands:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, '-m', 'phone_spider', *command],
+                cwd=ROOT, stdout=subprocess.DEVNULL, check=True,
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+        median = statistics.median(timings)
+        flag = '✅' if median < 100 else '⚠️'
+        print(f'  {flag} phone_spider {" ".join(command):<16} {median:7.1f} ms  (最小 {min(timings):.1f} ms)')
+
+
+def bench_driver(args):
+    """在本地模拟网站上比较 app / ui 两种搜索方式的结果与耗时"""
+    import asyncio
+    from phone_spider.driver import compare_paths
+    from phone_spider.sites import SiteProfile
+
+    spider_simple = _import_root_module('spider_simple')
+
+    def factory(url, driver):
+        return spider_simple.TelecomCrawler(url=url, driver=driver)
+
+    rows = asyncio.run(compare_paths(factory, SiteProfile.resolve('mock').repeat_queries()[:args.repeat]))
+    mismatches = 0
+    print(f'{"查询":<8}{"号码数":>6}{"app":>10}{"ui":>10}  结果')
+    for query, app_result, ui_result, app_time, ui_time in rows:
+        same = app_result == ui_result
+        mismatches += not same
+        print(f'{query:<8}{len(app_result):>6}{app_time:>9.2f}s{ui_time:>9.2f}s  {"一致" if same else "❌ 不一致"}')
+    total_app = sum(r[3] for r in rows)
+    total_ui = sum(r[4] for r in rows)
+    print(f'合计: app {total_app:.2f}s，ui {total_ui:.2f}s，不一致 {mismatches} 个')
+    if mismatches:
+        sys.exit(1)
+
+
+def bench_records(args):
+    """比较逐条 dict 与 RecordBatch 的内存占用和分配耗时（tracemalloc）"""
+    import time
+    import tracemalloc
+    from datetime import datetime
+    from phone_spider.records import RecordBatch
+
+    count = args.repeat * 10000
+    phones = [f'189{i:08d}' for i in range(count)]
+
+    def dicts():
+        rows = []
+        for phone in phones:
+            rows.append({
+                'phone': phone,
+                'min_cost': '最低消费39元/月',
+                'deposit': '预存100元',
+                'city': '深圳',
+                'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            })
+        return rows
+
+    def batch():
+        result = RecordBatch('深圳', '888*')
+        for phone in phones:
+            result.append(phone, 3900, 10000)
+        return result
+
+    print(f'{count} 条记录（tracemalloc，不含号码输入列表本身）')
+    for name, build in (('dict', dicts), ('RecordBatch', batch)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = build()
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'  {name:<12} {current / count:8.1f} 字节/条  峰值 {peak / 1024 / 1024:7.1f}MB  '
+              f'构建 {elapsed * 1000:8.1f} ms')
+        del result
+
+
+def bench_profiles(args):
+    """在本地模拟网站上比较各浏览器启动配置"""
+    import asyncio
+    from phone_spider.profiles import DEFAULT_MATRIX, format_matrix, run_matrix
+    from phone_spider.sites import SiteProfile
+
+    spider_simple = _import_root_module('spider_simple')
+
+    def factory(url, profile):
+        return spider_simple.TelecomCrawler(url=url, profile=profile)
+
+    specs = args.profiles or DEFAULT_MATRIX
+    queries = SiteProfile.resolve('mock').repeat_queries()[:args.repeat]
+    print(f'{len(specs)} 个启动配置 × {len(queries)} 个查询（本地模拟网站，API 延迟 {args.latency}s）')
+    rows = asyncio.run(run_matrix(factory, specs, queries, latency=args.latency))
+    print(format_matrix(rows))
+    working = [row for row in rows if row[1]]
+    if working:
+        print(f'\n🏆 最快的可用配置: {working[0][0]}')
+
+
+def bench_egress(args):
+    """本地模拟网站按客户端限流，比较不同出口数（本地转发代理，各绑定一个 127.0.0.x 源地址）的吞吐量"""
+    import asyncio
+    import time
+    from phone_spider.egress import EgressPool
+    from phone_spider.mocksite import MockSite
+    from phone_spider.sites import SiteProfile
+
+    spider_simple = _import_root_module('spider_simple')
+    queries = SiteProfile.resolve('mock').repeat_queries()[:args.repeat]
+    sizes = [n for n in (1, 2, 4, 8) if n <= args.max_egress]
+    print(f'{len(queries)} 个查询，模拟网站每个客户端 {args.rate_limit} 次/秒，'
+          f'每个出口 {args.egress_rate} 次查询/秒')
+    print(f'{"出口数":>6}{"耗时":>10}{"号码/分钟":>12}{"查询/分钟":>12}{"被限流":>8}')
+    with MockSite(latency=args.latency, rate_limit=args.rate_limit) as site:
+        for size in sizes:
+            pool = EgressPool.from_specs([f'source:127.0.0.{i + 2}' for i in range(size)],
+                                         rate=args.egress_rate)
+            crawler = spider_simple.TelecomCrawler(url=site.url, concurrent=True, queries=queries, egress=pool)
+            crawler.save = False
+            crawler.verbose = False
+            throttled = site.throttled
+            start = time.perf_counter()
+            try:
+                asyncio.run(crawler.run())
+            finally:
+                pool.close()
+            elapsed = time.perf_counter() - start
+            print(f'{size:>6}{elapsed:>9.1f}s{len(crawler.phone_numbers) / elapsed * 60:>12.0f}'
+                  f'{len(crawler.completed) / elapsed * 60:>12.0f}{site.throttled - throttled:>8}')
+
+
+def bench_logging(args):
+    """比较逐行 print 与结构化日志（各级别、JSON、采样、限流、进度视图）在调用方的开销
+
+    模拟一次大规模爬取的输出：每个查询一条开始、一条完成和 PHONES_PER_QUERY 条号码事件。
+    "调用方"是事件循环上花的时间，"含写出"还包括后台线程写完所有记录的时间。
+    """
+    import time
+    from phone_spider import logs
+
+    phones_per_query = 50
+    queries = max(1, args.repeat * 10000 // phones_per_query)
+    phones = [f'189{i:08d}' for i in range(phones_per_query)]
+    query_log, phone_log = logs.get_logger('query'), logs.get_logger('phone')
+    devnull = open(os.devnull, 'w', buffering=1, encoding='utf-8')  # 行缓冲，与终端上的 print 相同
+
+    def with_print():
+        for q in range(queries):
+            print(f'\n正在搜索模式: {q}*', file=devnull)
+            print(f'找到 {len(phones)} 个符合条件的号码', file=devnull)
+            for phone in phones:
+                print(f'    📱 {phone}', file=devnull)
+
+    def with_logs():
+        for q in range(queries):
+            query = f'{q}*'
+            query_log.info(f'\n正在搜索模式: {query}', city='深圳', query=query, event='start')
+            query_log.info(f'找到 {len(phones)} 个符合条件的号码', city='深圳', query=query, event='done',
+                           count=len(phones))
+            if phone_log.enabled('debug'):
+                for phone in phones:
+                    phone_log.debug(f'    📱 {phone}', city='深圳', query=query, phone=phone)
+
+    scenarios = [
+        ('print（原来的输出）', None),
+        ('日志 info（号码不输出）', dict(level='info')),
+        ('日志 debug text', dict(level='debug')),
+        ('日志 debug text + JSON', dict(level='debug', json_path=os.devnull)),
+        ('日志 debug 采样 phone=100', dict(level='debug', sample='phone=100')),
+        ('日志 debug 限流 1000/秒', dict(level='debug', rate='1000')),
+        ('日志 debug progress', dict(level='debug', console='progress')),
+    ]
+    events = queries * (phones_per_query + 2)
+    print(f'{queries} 个查询，{events} 条事件（每个查询 {phones_per_query} 个号码）')
+    print(f'  {"方式":<24}{"调用方":>10}{"每条":>10}{"含写出":>10}')
+    for name, options in scenarios:
+        start = time.perf_counter()
+        if options is None:
+            with_print()
+            caller = total = time.perf_counter() - start
+        else:
+            with logs.LogOutput(stream=devnull, **options):
+                start = time.perf_counter()
+                with_logs()
+                caller = time.perf_counter() - start
+            total = time.perf_counter() - start
+        print(f'  {name:<24}{caller * 1000:>8.0f}ms{caller / events * 1e6:>8.2f}µs{total * 1000:>8.0f}ms')
+    devnull.close()
+
+
+BENCHMARKS = {
+    'startup': bench_startup,
+    'driver': bench_driver,
+    'records': bench_records,
+    'profiles': bench_profiles,
+    'egress': bench_egress,
+    'logging': bench_logging,
+}
+
+
+def cmd_bench(args):
+    """基准测试"""
+    BENCHMARKS[args.target](args)
+
+
+def _add_watch_option(parser):
+    parser.add_argument('--watch', default=None,
+                        help='关注列表文件（JSON），爬取完成后报告各订阅者的命中')
+
+
+def _add_harvest_options(parser):
+    parser.add_argument('--harvest', action='store_true',
+                        help='收录页面上看到的所有号码（含推荐和不匹配的）到号码库存')
+    parser.add_argument('--db', default='phones.db', help='号码库存数据库文件（默认：phones.db）')
+
+
+def _add_query_options(parser):
+    parser.add_argument('--tail-digits', type=int, default=None,
+                        help='枚举所有N位尾号（1-4）代替默认的 000*-999*')
+    parser.add_argument('--coverage-target', type=float, default=None,
+                        help='估计覆盖率达到该值（如 0.95）后提前停止')
+
+
+def _add_driver_option(parser):
+    parser.add_argument('--driver', choices=['auto', 'app', 'ui'], default='auto',
+                        help='搜索方式：auto 先页面内触发、失败时退回模拟点击（默认）/ app 只用页面内触发 / ui 模拟点击')
+
+
+def _add_state_options(parser):
+    parser.add_argument('--state-dir', default='.state',
+                        help='城市会话快照目录，用于跳过地区选择弹窗（默认：.state）')
+    parser.add_argument('--no-state', action='store_true', help='不使用会话快照，每次都走地区选择弹窗')
+
+
+def _add_deadline_option(parser):
+    parser.add_argument('--deadline', type=float, default=None,
+                        help='时间预算（秒），到点后停止并保存已完成查询的结果')
+
+
+def _add_supervise_options(parser):
+    parser.add_argument('--supervise', action='store_true',
+                        help='监督浏览器：崩溃、卡死或断开时重启浏览器并重新执行被打断的查询')
+    parser.add_argument('--heartbeat', type=float, default=5.0, help='监督心跳间隔（秒，默认：5）')
+
+
+def _add_egress_options(parser):
+    parser.add_argument('--egress', nargs='+', default=None,
+                        help='出口池：direct、http://host:port、socks5://host:port 或 source:本机地址（可以指定多个）')
+    parser.add_argument('--egress-rate', type=float, default=None, help='每个出口每秒的查询数预算')
+
+
+def _add_extract_option(parser):
+    parser.add_argument('--extract', choices=['dom', 'xhr'], default='dom',
+                        help='提取方式：dom 从页面元素提取（默认）/ xhr 直接解码搜索接口的响应（形状不符时退回 dom）')
+
+
+def _add_pipeline_option(parser):
+    parser.add_argument('--pipeline', nargs='?', const='', default=None, metavar='WORKERS',
+                        help='分阶段管道模式（playwright 引擎），可选各阶段工作者数量，如 browse=3,parse=2（默认 browse=2）')
+
+
+def _add_probe_options(parser):
+    parser.add_argument('--probe', action='store_true',
+                        help='变化探测：先搜索几个代表性查询的第一页，与上次相同时跳过全量爬取（指纹保存在 --db）')
+    parser.add_argument('--probe-queries', type=int, default=3, help='探测的查询数（默认：3）')
+    parser.add_argument('--full-every', type=int, default=6, help='每隔N次运行强制全量爬取一次（默认：6）')
+
+
+def _add_site_option(parser):
+    parser.add_argument('--site', default=None,
+                        help='站点配置：gd189（默认）、mock，或站点配置 JSON 文件')
+
+
+def _add_profile_option(parser):
+    parser.add_argument('--profile', default=None,
+                        help='浏览器启动配置，如 headless-shell（默认）、chromium、firefox、headless-shell+no-gpu')
+
+
+def _add_metrics_options(parser):
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='在该端口提供 Prometheus 格式的 /metrics 指标')
+    parser.add_argument('--status-interval', type=float, default=None,
+                        help='每隔N秒打印一行状态，代替逐个号码的输出')
+
+
+def _add_log_options(parser):
+    parser.add_argument('--log-level', default=None,
+                        help='日志级别，可以按阶段设置，如 info、warning,phone=debug（默认 info，设置了 --status-interval 时为 warning）')
+    parser.add_argument('--log-format', choices=['text', 'progress'], default='text',
+                        help='控制台日志：text 逐行（默认）/ progress 只显示一行进度和警告')
+    parser.add_argument('--log-json', default=None, help='同时把日志以 JSON Lines 追加写入该文件')
+    parser.add_argument('--log-sample', default=None, help='按阶段采样，每N条保留1条，如 phone=100')
+    parser.add_argument('--log-rate', default=None, help='按阶段限流，每秒最多N条，如 200 或 phone=50')
+
+
+def _add_profiling_options(parser):
+    parser.add_argument('--profiling', nargs='?', const='', default=None, metavar='PREFIX',
+                        help='性能剖析：采样火焰图、事件循环延迟和卡顿调用栈、按查询归属的耗时（输出文件前缀，默认 profile_<时间>）')
+    parser.add_argument('--slow-callback', type=float, default=100,
+                        help='事件循环被占住超过该毫秒数时记录调用栈（默认：100）')
+
+
+def _add_memory_options(parser):
+    parser.add_argument('--memory-budget', type=int, default=None,
+                        help='浏览器总内存预算（MB），超出后在查询间隙回收上下文')
+    parser.add_argument('--heap-budget', type=int, default=None,
+                        help='单页面JS堆预算（MB），超出后在查询间隙回收上下文')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='phone_spider', description='电信号码爬虫')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    crawl = subparsers.add_parser('crawl', help='爬取单个城市')
+    crawl.add_argument('--city', default='深圳', help='要爬取的城市名称（默认：深圳）')
+    crawl.add_argument('--engine', choices=ENGINES, default='playwright-serial',
+                       help='爬取引擎（默认：playwright-serial）')
+    _add_memory_options(crawl)
+    _add_watch_option(crawl)
+    _add_harvest_options(crawl)
+    _add_query_options(crawl)
+    _add_driver_option(crawl)
+    _add_state_options(crawl)
+    _add_metrics_options(crawl)
+    _add_profile_option(crawl)
+    _add_site_option(crawl)
+    _add_deadline_option(crawl)
+    _add_supervise_options(crawl)
+    _add_egress_options(crawl)
+    _add_pipeline_option(crawl)
+    _add_extract_option(crawl)
+    _add_probe_options(crawl)
+    crawl.add_argument('--cache-ttl', type=int, default=0,
+                       help='查询结果缓存有效期（秒），0 表示不缓存')
+    _add_log_options(crawl)
+    _add_profiling_options(crawl)
+    crawl.set_defaults(func=cmd_crawl)
+
+    sweep = subparsers.add_parser('sweep', help='依次爬取多个城市')
+    sweep.add_argument('--cities', nargs='+', default=['深圳'],
+                       help='要爬取的城市名称（可以指定多个，用空格分隔）')
+    _add_memory_options(sweep)
+    _add_watch_option(sweep)
+    _add_harvest_options(sweep)
+    _add_query_options(sweep)
+    _add_driver_option(sweep)
+    _add_state_options(sweep)
+    _add_metrics_options(sweep)
+    _add_profile_option(sweep)
+    _add_site_option(sweep)
+    _add_deadline_option(sweep)
+    _add_supervise_options(sweep)
+    _add_egress_options(sweep)
+    _add_probe_options(sweep)
+    _add_log_options(sweep)
+    _add_profiling_options(sweep)
+    sweep.set_defaults(func=cmd_sweep)
+
+    portals = subparsers.add_parser('portals', help='同时爬取多个选号网站')
+    portals.add_argument('sites', nargs='+', help='站点配置：内置名称（gd189、mock）或站点配置 JSON 文件')
+    portals.add_argument('--cities', nargs='+', default=None, help='只爬这些城市（默认：各网站的全部城市）')
+    _add_harvest_options(portals)
+    portals.add_argument('--tail-digits', type=int, default=None,
+                         help='枚举所有N位尾号（1-4）代替默认的 000*-999*')
+    _add_driver_option(portals)
+    _add_state_options(portals)
+    _add_profile_option(portals)
+    _add_deadline_option(portals)
+    _add_log_options(portals)
+    _add_profiling_options(portals)
+    portals.set_defaults(func=cmd_portals)
+
+    verify = subparsers.add_parser('verify', help='批量核对号码是否仍在售')
+    verify.add_argument('files', nargs='+', help='号码文件（txt/csv/json，提取其中所有11位手机号）')
+    verify.add_argument('--city', default='深圳', help='号码所属城市（默认：深圳）')
+    verify.add_argument('--start-digits', type=int, default=3,
+                        help='第一轮使用的尾号位数，结果不完整时逐步加长到站点允许的最长位数（gd189 为4位，默认：3）')
+    verify.add_argument('--out', default=None, help='核对结果保存为 JSON 文件')
+    verify.add_argument('--cache-ttl', type=int, default=0,
+                        help='查询结果缓存有效期（秒），0 表示不缓存')
+    _add_driver_option(verify)
+    _add_state_options(verify)
+    _add_profile_option(verify)
+    _add_site_option(verify)
+    _add_log_options(verify)
+    _add_profiling_options(verify)
+    verify.set_defaults(func=cmd_verify)
+
+    diff = subparsers.add_parser('diff', help='比较两个结果文件')
+    diff.add_argument('old', help='旧结果文件')
+    diff.add_argument('new', help='新结果文件')
+    diff.add_argument('-v', '--verbose', action='store_true', help='列出新增/下架的号码')
+    diff.set_defaults(func=cmd_diff)
+
+    watch = subparsers.add_parser('watch', help='用关注列表匹配结果文件')
+    watch.add_argument('watchlist', help='关注列表文件（JSON）')
+    watch.add_argument('files', nargs='+', help='结果文件（支持通配符）')
+    watch.set_defaults(func=cmd_watch)
+
+    inventory = subparsers.add_parser('inventory', help='查看号码库存')
+    inventory.add_argument('--db', default='phones.db', help='号码库存数据库文件（默认：phones.db）')
+    inventory.add_argument('--city', default=None, help='城市（不指定时显示各城市统计）')
+    inventory.add_argument('--pattern', default=None, help='尾号模式，如 888（后7位包含该模式，位数由站点配置决定）')
+    inventory.add_argument('--source', choices=['search', 'recommend'], default=None, help='只看某个来源')
+    _add_site_option(inventory)
+    inventory.set_defaults(func=cmd_inventory)
+
+    schedule = subparsers.add_parser('schedule', help='按变化速度安排重新爬取')
+    schedule.add_argument('--db', default='phones.db', help='号码库存数据库文件（默认：phones.db）')
+    schedule.add_argument('--cities', nargs='+', default=None, help='要安排的城市（默认：库存中的所有城市）')
+    schedule.add_argument('--budget', type=float, default=2.0, help='每天可用的浏览器小时数（默认：2）')
+    schedule.add_argument('--tail-digits', type=int, default=None,
+                          help='枚举所有N位尾号（1-4）代替默认的 000*-999*')
+    schedule.add_argument('--run', action='store_true', help='爬取当前到期的查询（结果写入号码库存）')
+    _add_driver_option(schedule)
+    _add_state_options(schedule)
+    _add_profile_option(schedule)
+    _add_site_option(schedule)
+    _add_probe_options(schedule)
+    _add_log_options(schedule)
+    _add_profiling_options(schedule)
+    schedule.set_defaults(func=cmd_schedule)
+
+    ingest = subparsers.add_parser('ingest', help='把历史结果文件和日志导入号码库存')
+    ingest.add_argument('paths', nargs='*', default=['.'], help='文件、通配符或目录（递归查找，默认：当前目录）')
+    ingest.add_argument('--db', default='phones.db', help='号码库存数据库文件（默认：phones.db）')
+    ingest.add_argument('--jobs', type=int, default=None, help='解析进程数（默认：CPU 核数）')
+    ingest.add_argument('--no-logs', action='store_true', help='只导入 JSON 结果文件，不解析运行日志')
+    _add_profiling_options(ingest)
+    ingest.set_defaults(func=cmd_ingest)
+
+    export = subparsers.add_parser('export', help='导出为列式数据集（Parquet/Arrow）')
+    export.add_argument('files', nargs='*', help='要导出的结果文件（支持通配符）')
+    export.add_argument('--out', default='dataset', help='数据集目录（默认：dataset）')
+    export.add_argument('--format', choices=['parquet', 'arrow'], default='parquet', help='文件格式')
+    export.add_argument('--compact', action='store_true', help='导出后合并各分区的小文件')
+    export.set_defaults(func=cmd_export)
+
+    bench = subparsers.add_parser('bench', help='基准测试')
+    bench.add_argument('target', choices=list(BENCHMARKS), help='测试项目')
+    bench.add_argument('--repeat', type=int, default=10, help='重复次数（默认：10）')
+    bench.add_argument('--profiles', nargs='+', default=None,
+                       help='bench profiles 要比较的启动配置（默认：内置矩阵）')
+    bench.add_argument('--latency', type=float, default=0.0,
+                       help='bench profiles / egress 模拟网站的 API 延迟（秒）')
+    bench.add_argument('--max-egress', type=int, default=4, help='bench egress 最多比较的出口数（默认：4）')
+    bench.add_argument('--rate-limit', type=float, default=3.0,
+                       help='bench egress 模拟网站每个客户端每秒允许的 API 请求数（默认：3）')
+    bench.add_argument('--egress-rate', type=float, default=1.0,
+                       help='bench egress 每个出口每秒的查询数预算（默认：1）')
+    _add_profiling_options(bench)
+    bench.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with contextlib.ExitStack() as stack:
+        if getattr(args, 'log_format', None) is not None:
+            stack.enter_context(_log_output(args))
+        if getattr(args, 'profiling', None) is not None:
+            from phone_spider.profiling import Profiler
+            stack.enter_context(Profiler(args.profiling or None, slow=args.slow_callback / 1000))
+        args.func(args)
@@ -0,0 +1,111 @@
+"""
+库存覆盖率估计
+
+在一次扫描过程中估计已经看到的号码占城市可售库存的比例，达到目标覆盖率时提前停止。
+
+两种估计：
+- Chao2（发生率型捕获-再捕获）：把每个查询看成一次抽样，用只被 1 个/2 个查询看到的号码数
+  估计还没看到的号码数。适合结果互相重叠的查询（如 000*、111* 的后7位包含匹配）。
+- Lincoln-Petersen：把"为您推荐"区看成与搜索无关的第二次抽样，推荐号码中已被搜索结果覆盖的比例
+  就是覆盖率的估计。尾号枚举（0000-9999）各查询互不重叠时只能用这种方法。
+
+有推荐区样本时优先使用 Lincoln-Petersen（它不要求查询之间有重叠）；
+没有推荐区样本时才使用 Chao2，且要求至少有号码被两个查询同时看到。
+"""
+
+
+class CoverageEstimator:
+    """扫描覆盖率估计器
+
+    Args:
+        target: 目标覆盖率（0-1），达到后 should_stop() 返回 True
+        min_queries: 至少完成多少个查询后才允许提前停止
+        window: 发现曲线窗口：最近多少个查询
+    """
+
+    def __init__(self, target=0.95, min_queries=5, window=5):
+        self.target = target
+        self.min_queries = min_queries
+        self.window = window
+        self.queries = 0
+        self._incidence = {}     # 号码 -> 出现在多少个查询的搜索结果中
+        self._recommend = set()  # 推荐区看到的号码
+        self._curve = []         # 每个查询后累计看到的号码数（发现曲线）
+
+    def add(self, query, search, recommend=()):
+        """记录一个查询看到的号码
+
+        Args:
+            query: 查询
+            search: 搜索结果中的所有号码（不论是否匹配模式）
+            recommend: 推荐区的号码
+        """
+        self.queries += 1
+        for phone in set(search):
+            self._incidence[phone] = self._incidence.get(phone, 0) + 1
+        self._recommend.update(recommend)
+        self._curve.append(len(self._incidence))
+
+    @property
+    def observed(self):
+        return len(self._incidence)
+
+    def chao2(self):
+        """Chao2 库存估计（偏差修正形式）"""
+        m = self.queries
+        s = self.observed
+        if m < 2 or s == 0:
+            return None
+        q1 = sum(1 for c in self._incidence.values() if c == 1)
+        q2 = sum(1 for c in self._incidence.values() if c == 2)
+        factor = (m - 1) / m
+        if q2 > 0:
+            return s + factor * q1 * q1 / (2 * q2)
+        return s + factor * q1 * (q1 - 1) / 2
+
+    def lincoln_petersen(self):
+        """以推荐区为再捕获样本的 Lincoln-Petersen 估计（Chapman 修正）"""
+        n2 = len(self._recommend)
+        if not n2 or not self.observed:
+            return None
+        m = sum(1 for phone in self._recommend if phone in self._incidence)
+        return (self.observed + 1) * (n2 + 1) / (m + 1) - 1
+
+    def discovery_rate(self):
+        """最近 window 个查询平均每个查询新发现的号码数"""
+        if len(self._curve) < 2:
+            return None
+        recent = self._curve[-(self.window + 1):]
+        return (recent[-1] - recent[0]) / (len(recent) - 1)
+
+    def estimate(self):
+        """返回 {'observed', 'estimated', 'coverage', 'discovery_rate'}"""
+        estimated = self.lincoln_petersen()
+        if estimated is None and any(c >= 2 for c in self._incidence.values()):
+            estimated = self.chao2()
+        if estimated is not None:
+            estimated = max(estimated, self.observed)
+        coverage = self.observed / estimated if estimated else None
+        return {
+            'observed': self.observed,
+            'estimated': estimated,
+            'coverage': coverage,
+            'discovery_rate': self.discovery_rate(),
+        }
+
+    def should_stop(self):
+        """估计覆盖率达到目标时返回 True"""
+        if self.queries < self.min_queries:
+            return False
+        coverage = self.estimate()['coverage']
+        return coverage is not None and coverage >= self.target
+
+    def format_report(self, city=None):
+        e = self.estimate()
+        prefix = f'{city} ' if city else ''
+        if e['estimated'] is None:
+            return f'📈 {prefix}覆盖率: 数据不足（已看到 {e["observed"]} 个号码）'
+        rate = e['discovery_rate']
+        rate_text = f'，最近每查询新增 {rate:.1f} 个' if rate is not None else ''
+        return (f'📈 {prefix}覆盖率: 已看到 {e["observed"]} 个号码，估计库存约 {e["estimated"]:.0f} 个，'
+                f'覆盖率 {e["coverage"]:.0%}（{self.queries} 个查询{rate_text}）')
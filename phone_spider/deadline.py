@@ -0,0 +1,89 @@
+"""
+截止时间
+
+调用方给整次爬取一个时间预算（如 30 秒），Deadline 对象贯穿城市选择、每个查询、
+"更多号码"翻页和提取：每一步只用剩余的时间，到点后正在进行的查询被取消，
+已经完成的查询照常保存，结果中注明哪些查询完成了、哪些没来得及执行。
+"""
+
+import asyncio
+import time
+
+
+# 截止时间前留给提取已加载号码的时间（秒），不足时不再翻页
+EXTRACT_RESERVE = 2.0
+
+
+class DeadlineExceeded(Exception):
+    """截止时间已到"""
+
+
+class Deadline:
+    """截止时间
+
+    Args:
+        seconds: 从现在起的时间预算（秒），None 表示不限时
+        clock: 时钟函数（测试时可替换）
+    """
+
+    def __init__(self, seconds=None, clock=time.monotonic):
+        self.clock = clock
+        self.seconds = seconds
+        self.expires_at = clock() + seconds if seconds is not None else None
+
+    def remaining(self):
+        """剩余秒数（不限时时返回 None，已过期时返回 0）"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self, margin=0.0):
+        """是否已到（或剩余时间不足 margin 秒）"""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= margin
+
+    def timeout_ms(self, default_ms, reserve=0.0):
+        """Playwright 超时参数：取默认值与剩余时间（减去留出的 reserve 秒）中较小的一个（毫秒）"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default_ms
+        return max(1, min(default_ms, int((remaining - reserve) * 1000)))
+
+    async def sleep(self, seconds):
+        """等待 seconds 秒，但不超过截止时间"""
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        await asyncio.sleep(seconds)
+
+    async def run(self, awaitable):
+        """在剩余时间内执行，到点时取消并抛出 DeadlineExceeded
+
+        Raises:
+            DeadlineExceeded: 截止时间已到
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return await awaitable
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded()
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError:
+            # 内部操作自己的超时不算截止时间
+            if self.expired():
+                raise DeadlineExceeded() from None
+            raise
+
+
+def format_progress(completed, pending, unit='个查询'):
+    """截止时间到达后的完成情况"""
+    total = len(completed) + len(pending)
+    line = f'⏱  截止时间已到：完成 {len(completed)}/{total} {unit}'
+    if pending:
+        shown = ', '.join(str(u) for u in pending[:10])
+        more = f' 等 {len(pending)} 个' if len(pending) > 10 else ''
+        line += f'，未完成: {shown}{more}'
+    return line
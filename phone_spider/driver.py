@@ -0,0 +1,295 @@
+"""
+搜索驱动
+
+app 方式：通过 page.evaluate 在页面内写入搜索框（触发 input 事件更新 v-model），
+直接调用 Vue 组件的搜索方法（找不到时对搜索按钮做一次 DOM click），
+再等待本次搜索发出的 fetch/XHR 请求全部结束、结果区域（号码列表或"查不到号码信息"）出现且 DOM 稳定。
+每个查询只触发一次搜索，没有固定 sleep；等待超时按失败处理。
+
+ui：原来的模拟输入 + 点击两次"搜索" + 固定等待。
+
+auto（默认）：先用 app 方式，页面结构不符或等待超时时自动退回 ui 方式。
+
+app/auto 与 ui 方式的结果一致性由 compare_paths 在本地模拟网站上检查
+（phone_spider/tests/test_driver.py，以及 python -m phone_spider bench driver）。
+"""
+
+import asyncio
+import time
+
+from phone_spider.sites import SiteProfile
+
+
+MODES = ('auto', 'app', 'ui')
+
+# 页面内执行：写入关键字、触发搜索、等待本次搜索的请求完成且结果区域渲染稳定
+APP_SEARCH_JS = '''
+async ({placeholder, buttonText, query, methods, resultItem, noResultText, settleMs, graceMs, timeoutMs, wait}) => {
+  const input = document.querySelector(`input[placeholder="${placeholder}"]`);
+  if (!input) {
+    return {ok: false, reason: 'no-input'};
+  }
+
+  // 0. 统计页面发出的 fetch/XHR 请求（只安装一次）：搜索触发后发出的请求全部结束才算有结果
+  if (!window.__spiderNet) {
+    const net = window.__spiderNet = {started: 0, pending: 0, lastEnd: 0};
+    const begin = () => { net.started += 1; net.pending += 1; };
+    const end = () => { net.pending -= 1; net.lastEnd = performance.now(); };
+    if (window.fetch) {
+      const fetch = window.fetch;
+      window.fetch = function () {
+        begin();
+        return fetch.apply(this, arguments).finally(end);
+      };
+    }
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+      begin();
+      this.addEventListener('loadend', end, {once: true});
+      return send.apply(this, arguments);
+    };
+  }
+  const net = window.__spiderNet;
+
+  // 1. 写入关键字并派发 input 事件（v-model 监听 input 事件）
+  input.value = query;
+  input.dispatchEvent(new Event('input', {bubbles: true}));
+
+  // 2. 从搜索框向上查找 Vue 组件实例上的搜索方法
+  const findMethod = () => {
+    for (let el = input; el; el = el.parentElement) {
+      const candidates = [];
+      if (el.__vue__) {
+        candidates.push([el.__vue__, Object.assign({}, el.__vue__.$options && el.__vue__.$options.methods)]);
+      }
+      const component = el.__vueParentComponent;
+      if (component && component.proxy) {
+        candidates.push([component.proxy, component.proxy]);
+      }
+      for (const [vm, table] of candidates) {
+        for (const name of methods) {
+          if (typeof table[name] === 'function') {
+            return {vm, name};
+          }
+        }
+      }
+    }
+    return null;
+  };
+
+  // 3. 等待结果：本次触发后发出的请求全部结束（graceMs 内没有发出请求时视为页面直接渲染），
+  //    结果区域出现（号码列表或"查不到号码信息"），且请求和 DOM 都安静了 settleMs。
+  //    加载动画、清空列表这类中间状态不满足"请求结束 + 结果出现"，不会被当成结果。
+  const base = net.started;
+  const begun = performance.now();
+  let lastChange = begun;
+  const observer = new MutationObserver(() => { lastChange = performance.now(); });
+  if (wait) {
+    observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+  }
+  const ready = () => {
+    const now = performance.now();
+    const requested = net.started > base;
+    if (requested ? net.pending > 0 || now - net.lastEnd < settleMs : now - begun < graceMs) {
+      return false;
+    }
+    const shown = document.querySelector(resultItem) !== null
+      || document.body.innerText.includes(noResultText);
+    return shown && now - lastChange >= settleMs;
+  };
+  const settled = !wait ? Promise.resolve('skipped') : new Promise((resolve) => {
+    const poll = () => {
+      if (ready()) {
+        resolve(net.started > base ? 'requests' : 'render');
+      } else if (performance.now() - begun >= timeoutMs) {
+        resolve(null);
+      } else {
+        setTimeout(poll, 50);
+      }
+    };
+    setTimeout(poll, 50);
+  });
+
+  const target = findMethod();
+  let trigger;
+  if (target) {
+    target.vm[target.name]();
+    trigger = 'vue:' + target.name;
+  } else {
+    const button = Array.from(document.querySelectorAll('button, div, span, a'))
+      .find((el) => el.children.length === 0 && el.textContent.trim() === buttonText);
+    if (!button) {
+      observer.disconnect();
+      return {ok: false, reason: 'no-button'};
+    }
+    button.click();
+    trigger = 'dom-click';
+  }
+  const signal = await settled;
+  observer.disconnect();
+  if (signal === null) {
+    return {ok: false, reason: 'timeout', trigger};
+  }
+  return {ok: true, trigger, signal};
+}
+'''
+
+
+class SearchDriver:
+    """执行一次搜索
+
+    Args:
+        mode: auto / app / ui
+        placeholder: 搜索框 placeholder（默认取站点配置，下同）
+        button_text: 搜索按钮文字
+        methods: 依次尝试的 Vue 搜索方法名
+        settle_ms: 请求结束、DOM 停止变化多久后认为结果已渲染（毫秒）
+        grace_ms: 触发后这么久都没有发出请求时，视为页面不经请求直接渲染（毫秒）
+        timeout_ms: app 方式等待结果的最长时间（毫秒）
+        ui_waits: ui 方式的等待时间 (清空后, 输入后, 第一次点击后, 第二次点击后)（秒），
+                  第二次点击后的等待为 None 时只点击一次
+    """
+
+    def __init__(self, mode='auto', placeholder=None, button_text=None, methods=None,
+                 settle_ms=300, grace_ms=1000, timeout_ms=8000, ui_waits=(0.5, 1, 2, 5)):
+        if mode not in MODES:
+            raise ValueError(f'未知的搜索方式: {mode}（可选: {", ".join(MODES)}）')
+        self.mode = mode
+        self.use_site(SiteProfile.resolve())
+        if placeholder is not None:
+            self.placeholder = placeholder
+        if button_text is not None:
+            self.button_text = button_text
+        if methods is not None:
+            self.methods = list(methods)
+        self.settle_ms = settle_ms
+        self.grace_ms = grace_ms
+        self.timeout_ms = timeout_ms
+        self.ui_waits = ui_waits
+        self.counts = {'app': 0, 'ui': 0, 'fallback': 0}
+        self.seconds = {'app': 0.0, 'ui': 0.0}
+
+    def use_site(self, site):
+        """使用站点配置中的搜索框、搜索按钮文字、搜索方法名和结果区域"""
+        self.placeholder = site.search_placeholder
+        self.button_text = site.search_button_text
+        self.methods = list(site.search_methods)
+        self.result_item = site.result_item
+        self.no_result_text = site.no_result_text
+        return self
+
+    async def search(self, page, query, ui_waits=None, wait=True):
+        """搜索一个查询，返回实际使用的方式（app 或 ui）
+
+        Args:
+            ui_waits: 可选，本次退回 ui 方式时使用的等待时间
+            wait: 是否等待结果渲染；为 False 时触发搜索后立即返回（由调用方等待接口响应）
+        """
+        start = time.perf_counter()
+        if not wait:
+            ui_waits = (0, 0, 0, None)
+        if self.mode in ('auto', 'app'):
+            result = await self.app_search(page, query, wait)
+            if result.get('ok'):
+                self.counts['app'] += 1
+                self.seconds['app'] += time.perf_counter() - start
+                return 'app'
+            if self.mode == 'app':
+                raise RuntimeError(f'页面内搜索失败: {result.get("reason")}')
+            self.counts['fallback'] += 1
+            start = time.perf_counter()
+        await self.ui_search(page, query, ui_waits)
+        self.counts['ui'] += 1
+        self.seconds['ui'] += time.perf_counter() - start
+        return 'ui'
+
+    async def app_search(self, page, query, wait=True):
+        """页面内触发搜索并（wait 为 True 时）等待请求完成、结果渲染稳定"""
+        try:
+            return await page.evaluate(APP_SEARCH_JS, {
+                'placeholder': self.placeholder,
+                'buttonText': self.button_text,
+                'query': query,
+                'methods': self.methods,
+                'resultItem': self.result_item,
+                'noResultText': self.no_result_text,
+                'settleMs': self.settle_ms,
+                'graceMs': self.grace_ms,
+                'timeoutMs': self.timeout_ms,
+                'wait': wait,
+            })
+        except Exception as e:
+            return {'ok': False, 'reason': str(e)}
+
+    async def ui_search(self, page, query, ui_waits=None):
+        """模拟用户输入并点击搜索（原有方式）"""
+        after_clear, after_fill, after_first, after_second = ui_waits or self.ui_waits
+
+        # 清空搜索框并输入新模式
+        search_box = page.get_by_placeholder(self.placeholder)
+        await search_box.clear()
+        await asyncio.sleep(after_clear)
+        await search_box.fill(query)
+        await asyncio.sleep(after_fill)
+
+        # 点击搜索按钮（多次尝试确保点击成功）
+        search_button = page.get_by_text(self.button_text)
+        await search_button.click()
+        await asyncio.sleep(after_first)
+
+        # 再次点击确保搜索执行
+        if after_second is not None:
+            await search_button.click()
+            await asyncio.sleep(after_second)
+
+    def format_stats(self):
+        parts = []
+        for mode in ('app', 'ui'):
+            count = self.counts[mode]
+            if count:
+                parts.append(f'{mode} {count} 次（平均 {self.seconds[mode] / count:.2f}s）')
+        if self.counts['fallback']:
+            parts.append(f'退回 ui {self.counts["fallback"]} 次')
+        return '搜索方式: ' + ('，'.join(parts) if parts else '无')
+
+
+async def compare_paths(crawler_factory, queries, city='深圳', modes=('app', 'ui')):
+    """在模拟网站上比较两种搜索方式（默认 app 与 ui）的结果是否一致
+
+    Args:
+        crawler_factory: 接受 (url, driver) 返回 TelecomCrawler 的函数
+        queries: 要比较的查询
+        city: 城市
+        modes: 要比较的两种方式
+
+    Returns:
+        [(查询, 第一种方式的结果, 第二种方式的结果, 第一种耗时, 第二种耗时)]
+    """
+    from playwright.async_api import async_playwright
+    from phone_spider.mocksite import MockSite
+    from phone_spider.profiles import LaunchProfile
+
+    rows = []
+    with MockSite() as site:
+        async with async_playwright() as p:
+            browser = await LaunchProfile.resolve().launch(p)
+            try:
+                pages = {}
+                for mode in modes:
+                    crawler = crawler_factory(site.url, SearchDriver(mode=mode))
+                    crawler.city = city
+                    context, page = await crawler._open_page(browser)
+                    await crawler._select_city(page, load_wait=0)
+                    pages[mode] = (crawler, page)
+                for query in queries:
+                    results = {}
+                    timings = {}
+                    for mode, (crawler, page) in pages.items():
+                        start = time.perf_counter()
+                        results[mode] = sorted(await crawler._search_on_page(page, query))
+                        timings[mode] = time.perf_counter() - start
+                    first, second = modes
+                    rows.append((query, results[first], results[second], timings[first], timings[second]))
+            finally:
+                await browser.close()
+    return rows
@@ -0,0 +1,378 @@
+"""
+出口池
+
+网站按客户端限流，所有请求都从一个地址、用同一个 User-Agent 发出时，吞吐量的上限就是网站对单个客户端的容忍度。
+出口池把流量分散到多个出口（代理或本机源地址）：
+
+    direct                  直接连接
+    http://host:port        HTTP 代理（也支持 https:// / socks5://）
+    source:10.0.0.5         本机源地址：启动一个绑定该源地址的本地转发代理
+
+每个出口有自己的令牌桶预算（每秒查询数）和固定的 User-Agent。新建上下文时选择余量最多的健康出口，
+上下文整个生命周期都使用这个出口（粘性分配）。页面上 XHR/fetch/文档请求的响应状态计入出口的健康分
+（429/403/5xx 和查询出错扣分），健康分过低的出口被暂时剔除，冷却后以半健康状态重新加入。
+
+使用方法:
+    python -m phone_spider crawl --engine playwright-pool --egress direct http://proxy1:8080 --egress-rate 0.5
+    python -m phone_spider bench egress     # 本地模拟网站 + 本地转发代理，比较不同出口数的吞吐量
+"""
+
+import asyncio
+import selectors
+import socket
+import socketserver
+import threading
+import time
+from urllib.parse import urlsplit
+
+from phone_spider import logs
+from phone_spider.profiles import USER_AGENTS
+
+
+# 计入健康分的请求类型（静态资源不计）
+TRACKED_RESOURCES = ('document', 'xhr', 'fetch')
+# 视为被限流/封禁的响应状态
+THROTTLE_STATUSES = (403, 429)
+# 健康分的指数移动平均系数
+HEALTH_ALPHA = 0.2
+# 让 Chromium 对回环地址也走代理（默认回环地址不走代理，本地模拟网站需要）
+LOOPBACK_BYPASS = '<-loopback>'
+
+EGRESS_LOG = logs.get_logger('egress')
+
+
+class TokenBucket:
+    """令牌桶
+
+    Args:
+        rate: 每秒补充的令牌数
+        burst: 桶容量（默认 max(1, rate)）
+        clock: 时钟函数（测试时可替换）
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.burst
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self):
+        """当前可用的令牌数（已预约的令牌使其为负）"""
+        self._refill()
+        return self.tokens
+
+    def reserve(self):
+        """预约一个令牌，返回需要等待的秒数"""
+        self._refill()
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+
+class Egress:
+    """一个出口
+
+    Args:
+        name: 出口名（即配置中的写法）
+        proxy: 传给 new_context(proxy=...) 的代理参数，直接连接时为 None
+        rate: 每秒查询数预算，None 表示不限
+        burst: 令牌桶容量
+        user_agent: 该出口固定使用的 User-Agent
+    """
+
+    def __init__(self, name, proxy=None, rate=None, burst=None, user_agent=None, clock=time.monotonic):
+        self.name = name
+        self.proxy = proxy
+        self.bucket = TokenBucket(rate, burst, clock) if rate else None
+        self.user_agent = user_agent
+        self.health = 1.0
+        self.samples = 0
+        self.queries = 0
+        self.throttled = 0
+        self.errors = 0
+        self.contexts = 0  # 正在使用该出口的上下文数
+        self.evicted_at = None
+
+    def headroom(self):
+        """余量：可用令牌数减去正在使用的上下文数"""
+        if self.bucket is None:
+            return -self.contexts
+        return self.bucket.available() - self.contexts
+
+
+class EgressPool:
+    """出口池
+
+    Args:
+        egresses: Egress 列表
+        min_health: 健康分低于该值的出口被剔除
+        min_samples: 至少观察到这么多次结果后才会剔除
+        cooldown: 剔除后多少秒重新加入（健康分重置为 0.5）
+    """
+
+    def __init__(self, egresses, min_health=0.3, min_samples=5, cooldown=300, clock=time.monotonic):
+        if not egresses:
+            raise ValueError('出口池至少需要一个出口')
+        self.egresses = list(egresses)
+        self.min_health = min_health
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.clock = clock
+        self.evictions = 0
+        self.forwarders = []  # source: 出口启动的本地转发代理
+        self._pages = {}  # page -> Egress
+
+    @classmethod
+    def from_specs(cls, specs, rate=None, burst=None, user_agents=USER_AGENTS, **kwargs):
+        """按配置创建出口池，每个出口依次分配一个 User-Agent
+
+        Raises:
+            ValueError: 无法识别的出口配置
+        """
+        egresses = []
+        forwarders = []
+        for i, spec in enumerate(specs):
+            user_agent = user_agents[i % len(user_agents)] if user_agents else None
+            if spec == 'direct':
+                proxy = None
+            elif spec.startswith('source:'):
+                forwarder = ForwardProxy(source_address=spec[len('source:'):])
+                forwarder.start()
+                forwarders.append(forwarder)
+                proxy = {'server': forwarder.server, 'bypass': LOOPBACK_BYPASS}
+            elif urlsplit(spec).scheme in ('http', 'https', 'socks5'):
+                proxy = {'server': spec, 'bypass': LOOPBACK_BYPASS}
+            else:
+                for forwarder in forwarders:
+                    forwarder.stop()
+                raise ValueError(f'无法识别的出口: {spec}（可选: direct、http://host:port、socks5://host:port、source:地址）')
+            egresses.append(Egress(spec, proxy, rate, burst, user_agent))
+        pool = cls(egresses, **kwargs)
+        pool.forwarders = forwarders
+        return pool
+
+    def __len__(self):
+        return len(self.egresses)
+
+    def active(self):
+        """当前可用的出口（冷却结束的出口重新加入）"""
+        now = self.clock()
+        for egress in self.egresses:
+            if egress.evicted_at is not None and now - egress.evicted_at >= self.cooldown:
+                egress.evicted_at = None
+                egress.health = 0.5
+                egress.samples = 0
+        return [egress for egress in self.egresses if egress.evicted_at is None]
+
+    def assign(self):
+        """为新上下文选择余量最多的出口（余量相同时选健康分高的）
+
+        分配后必须 bind() 到页面（上下文关闭时释放）；上下文或页面没能创建时调用 release()。
+        """
+        egress = max(self.active(), key=lambda e: (e.headroom(), e.health))
+        egress.contexts += 1
+        return egress
+
+    def release(self, egress):
+        """归还 assign() 分配的名额"""
+        egress.contexts -= 1
+
+    def context_options(self, egress, user_agent=True):
+        """该出口的上下文参数（代理和 User-Agent）"""
+        options = {}
+        if egress.proxy:
+            options['proxy'] = dict(egress.proxy)
+        if user_agent and egress.user_agent:
+            options['user_agent'] = egress.user_agent
+        return options
+
+    def bind(self, page, egress):
+        """记录页面使用的出口，观察其响应状态，上下文关闭时释放"""
+        self._pages[page] = egress
+
+        def on_response(response):
+            if response.request.resource_type in TRACKED_RESOURCES:
+                self.observe(egress, response.status)
+
+        def on_close(context):
+            self._pages.pop(page, None)
+            self.release(egress)
+
+        page.on('response', on_response)
+        page.context.on('close', on_close)
+
+    def egress_of(self, page):
+        return self._pages.get(page)
+
+    async def acquire(self, page):
+        """在页面的出口上执行一次查询前调用：按令牌桶预算等待"""
+        egress = self._pages.get(page)
+        if egress is None:
+            return
+        egress.queries += 1
+        if egress.bucket is not None:
+            wait = egress.bucket.reserve()
+            if wait:
+                await asyncio.sleep(wait)
+
+    def observe(self, egress, status):
+        """记录一个响应状态"""
+        if status in THROTTLE_STATUSES:
+            egress.throttled += 1
+            self.report(egress, False)
+        else:
+            self.report(egress, status < 500)
+
+    def failed(self, page):
+        """页面上的查询出错"""
+        egress = self._pages.get(page)
+        if egress is not None:
+            egress.errors += 1
+            self.report(egress, False)
+
+    def report(self, egress, ok):
+        """更新健康分，过低时剔除（至少保留一个出口）"""
+        egress.samples += 1
+        egress.health += HEALTH_ALPHA * ((1.0 if ok else 0.0) - egress.health)
+        if (egress.evicted_at is None and egress.samples >= self.min_samples
+                and egress.health < self.min_health and len(self.active()) > 1):
+            egress.evicted_at = self.clock()
+            self.evictions += 1
+            EGRESS_LOG.warning(f'🚫 出口 {egress.name} 健康分 {egress.health:.2f}，暂时剔除',
+                               egress=egress.name, health=round(egress.health, 3), event='evicted')
+
+    def evicted(self, page):
+        """页面使用的出口是否已被剔除（应换一个上下文）"""
+        egress = self._pages.get(page)
+        return egress is not None and egress.evicted_at is not None
+
+    def close(self):
+        for forwarder in self.forwarders:
+            forwarder.stop()
+        self.forwarders = []
+
+    def format_stats(self):
+        lines = [f'出口池: {len(self.active())}/{len(self.egresses)} 个可用，剔除 {self.evictions} 次']
+        for egress in self.egresses:
+            state = '已剔除' if egress.evicted_at is not None else '可用'
+            lines.append(f'  {egress.name:<28} {state}  健康 {egress.health:.2f}  查询 {egress.queries}  '
+                         f'限流 {egress.throttled}  出错 {egress.errors}')
+        return '\n'.join(lines)
+
+
+class ForwardProxy:
+    """本地转发代理（HTTP 请求转发 + CONNECT 隧道），出站连接绑定指定的源地址
+
+    用于 source: 出口，也用作测试时的本地代理（绑定 127.0.0.x 时模拟网站看到的是不同的客户端）。
+
+    Args:
+        source_address: 出站连接的源地址，None 表示由系统选择
+        host: 监听地址
+        port: 监听端口，0 表示自动分配
+    """
+
+    def __init__(self, source_address=None, host='127.0.0.1', port=0):
+        self.source_address = source_address
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def server(self):
+        return f'http://{self.host}:{self.port}'
+
+    def _connect(self, host, port):
+        source = (self.source_address, 0) if self.source_address else None
+        return socket.create_connection((host, port), timeout=30, source_address=source)
+
+    def _handler(self):
+        proxy = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                head = b''
+                while b'\r\n\r\n' not in head:
+                    chunk = self.request.recv(65536)
+                    if not chunk:
+                        return
+                    head += chunk
+                head, rest = head.split(b'\r\n\r\n', 1)
+                request_line, *headers = head.decode('latin-1').split('\r\n')
+                method, target, version = request_line.split(' ', 2)
+                proxy.requests += 1
+                try:
+                    if method == 'CONNECT':
+                        host, _, port = target.rpartition(':')
+                        upstream = proxy._connect(host, int(port))
+                        self.request.sendall(b'HTTP/1.1 200 Connection Established\r\n\r\n')
+                        if rest:
+                            upstream.sendall(rest)
+                    else:
+                        url = urlsplit(target)
+                        upstream = proxy._connect(url.hostname, url.port or 80)
+                        path = url.path or '/'
+                        if url.query:
+                            path += '?' + url.query
+                        # 每个连接只转发一个请求，客户端收到 Connection: close 后会新建连接
+                        kept = [h for h in headers
+                                if h.split(':', 1)[0].lower() not in ('connection', 'proxy-connection', 'keep-alive')]
+                        lines = [f'{method} {path} {version}', *kept, 'Connection: close']
+                        upstream.sendall(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + rest)
+                except OSError:
+                    self.request.sendall(b'HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n')
+                    return
+                with upstream:
+                    _relay(self.request, upstream)
+
+        return Handler
+
+    def start(self):
+        self._server = socketserver.ThreadingTCPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.server
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _relay(client, upstream):
+    """双向转发，直到任意一端关闭"""
+    peers = {client: upstream, upstream: client}
+    with selectors.DefaultSelector() as selector:
+        for sock in peers:
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ)
+        while True:
+            events = selector.select(timeout=60)
+            if not events:
+                return  # 空闲超时
+            for key, _ in events:
+                try:
+                    data = key.fileobj.recv(65536)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    return
+                if not data:
+                    return
+                peer = peers[key.fileobj]
+                peer.setblocking(True)
+                try:
+                    peer.sendall(data)
+                except OSError:
+                    return
+                finally:
+                    peer.setblocking(False)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+号码数据列式导出
+把每次运行生成的 JSON 文件转换成按 城市/日期 分区的 Parquet（或 Arrow IPC）数据集，
+便于长期分析时只扫描需要的列和分区，而不必重新解析成千上万个 JSON 文件。
+已导出的文件按内容 SHA-256 记在数据集目录的 _exported.json 中，重复导出时跳过；
+合并小文件时按 (号码, 城市, 爬取时间) 去重。
+
+使用方法:
+    python -m phone_spider.export phones_*.json --out dataset
+    python -m phone_spider.export --compact --out dataset
+"""
+
+import argparse
+import functools
+import glob
+import hashlib
+import json
+import os
+import re
+import uuid
+from datetime import datetime
+
+
+# 金额文本，如 "最低消费0元/月"、"预存100元"、"预存话费50.5元"
+AMOUNT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*元')
+# 文件名中的时间戳，如 phones_深圳_20260107_163434.json
+FILENAME_TIME_RE = re.compile(r'(\d{8}_\d{6})')
+
+# 没有爬取时间的行写入的日期分区
+UNKNOWN_DATE = 'unknown'
+
+FORMATS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+# 已导出文件清单（以 _ 开头，读取数据集时会被忽略）
+MANIFEST = '_exported.json'
+# 去重的键（分区文件中没有 city 列时只按号码和爬取时间）
+DEDUP_KEYS = ('phone', 'city', 'crawl_time')
+
+
+def _require_pyarrow():
+    """按需导入 pyarrow（可选依赖）"""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.parquet
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError('列式导出需要 pyarrow，请先安装: pip install pyarrow')
+    return pyarrow
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_amount_fen(text):
+    """把金额文本解析为整数（单位：分）
+
+    Args:
+        text: 原始文本，如 "最低消费0元/月"；也接受数字
+
+    Returns:
+        金额（分），无法解析时返回 None
+    """
+    if text is None or text == '':
+        return None
+    if isinstance(text, (int, float)):
+        return int(round(text * 100))
+    match = AMOUNT_RE.search(text)
+    if not match:
+        return None
+    return int(round(float(match.group(1)) * 100))
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_crawl_time(value):
+    """解析爬取时间：支持 "%Y-%m-%d %H:%M:%S" 字符串和文件名中的时间戳（同一批文件里重复的值只解析一次）"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        pass
+    match = FILENAME_TIME_RE.search(os.path.basename(value))
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+    return None
+
+
+def _entry_fen(entry, key):
+    if key + '_fen' in entry:
+        return entry[key + '_fen']
+    return parse_amount_fen(entry.get(key))
+
+
+def normalize_rows(data, file_time=None):
+    """把两种历史 JSON 格式统一成行记录
+
+    支持：
+    - 按城市分组格式: [{"city": "深圳", "phone": ["133...", ...]}, ...]
+    - Scrapy 格式: [{"phone": "133...", "min_cost": "...", "deposit": "...",
+                    "city": "深圳", "crawl_time": "..."}, ...]
+      （新版 Scrapy 爬虫在原文之外另写 min_cost_fen / deposit_fen 整数"分"，存在时优先使用）
+
+    Returns:
+        行记录列表，每行包含 phone(int)、city、min_cost_fen、deposit_fen、crawl_time
+    """
+    rows = []
+    for entry in data:
+        if not isinstance(entry, dict):
+            continue
+        phones = entry.get('phone')
+        if isinstance(phones, list):
+            for phone in phones:
+                phone = str(phone).strip('"')
+                if not phone.isdigit():
+                    continue
+                rows.append({
+                    'phone': int(phone),
+                    'city': entry.get('city', ''),
+                    'min_cost_fen': None,
+                    'deposit_fen': None,
+                    'crawl_time': file_time,
+                })
+        elif phones is not None:
+            phone = str(phones).strip('"')
+            if not phone.isdigit():
+                continue
+            rows.append({
+                'phone': int(phone),
+                'city': entry.get('city', ''),
+                'min_cost_fen': _entry_fen(entry, 'min_cost'),
+                'deposit_fen': _entry_fen(entry, 'deposit'),
+                'crawl_time': parse_crawl_time(entry.get('crawl_time')) or file_time,
+            })
+    return rows
+
+
+def load_result_file(path):
+    """读取一个结果文件，返回统一的行记录（文件名中没有时间戳时用文件的修改时间作为爬取时间）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    file_time = parse_crawl_time(path) or datetime.fromtimestamp(int(os.path.getmtime(path)))
+    return normalize_rows(data, file_time=file_time)
+
+
+def rows_to_table(rows):
+    """把行记录转换为 Arrow 表（号码 int64，城市字典编码；没有爬取时间的行日期为 unknown）"""
+    pa = _require_pyarrow()
+    crawl_times = [r['crawl_time'] for r in rows]
+    table = pa.table({
+        'phone': pa.array([r['phone'] for r in rows], type=pa.int64()),
+        'city': pa.array([r['city'] for r in rows], type=pa.string()).dictionary_encode(),
+        'min_cost_fen': pa.array([r['min_cost_fen'] for r in rows], type=pa.int64()),
+        'deposit_fen': pa.array([r['deposit_fen'] for r in rows], type=pa.int64()),
+        'crawl_time': pa.array(crawl_times, type=pa.timestamp('s')),
+        'date': pa.array([t.strftime('%Y-%m-%d') if t else UNKNOWN_DATE for t in crawl_times],
+                         type=pa.string()).dictionary_encode(),
+    })
+    return table
+
+
+def _file_format(fmt):
+    pa = _require_pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f'不支持的格式: {fmt}（可选: {", ".join(FORMATS)}）')
+    return pa.dataset.ParquetFileFormat() if fmt == 'parquet' else pa.dataset.IpcFileFormat()
+
+
+def write_dataset(table, root, fmt='parquet'):
+    """把表追加写入分区数据集（目录结构: root/city=深圳/date=2026-01-07/part-*.parquet）"""
+    pa = _require_pyarrow()
+    partitioning = pa.dataset.partitioning(
+        pa.schema([('city', pa.string()), ('date', pa.string())]), flavor='hive'
+    )
+    table = table.cast(pa.schema([
+        ('phone', pa.int64()),
+        ('city', pa.string()),
+        ('min_cost_fen', pa.int64()),
+        ('deposit_fen', pa.int64()),
+        ('crawl_time', pa.timestamp('s')),
+        ('date', pa.string()),
+    ]))
+    pa.dataset.write_dataset(
+        table,
+        root,
+        format=_file_format(fmt),
+        partitioning=partitioning,
+        basename_template=f'part-{uuid.uuid4().hex[:12]}-{{i}}{FORMATS[fmt]}',
+        existing_data_behavior='overwrite_or_ignore',
+    )
+
+
+def read_dataset(root, columns=None, filter=None, fmt='parquet'):
+    """读取分区数据集，只扫描需要的列和分区
+
+    Args:
+        root: 数据集目录
+        columns: 需要的列名列表，None 表示全部
+        filter: pyarrow.dataset 表达式，如 ds.field('city') == '深圳'
+    """
+    pa = _require_pyarrow()
+    dataset = pa.dataset.dataset(
+        root,
+        format=_file_format(fmt),
+        partitioning=pa.dataset.HivePartitioning.discover(infer_dictionary=True),
+    )
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_manifest(root):
+    """已导出文件的清单 {SHA-256: {"path": 路径, "rows": 行数}}"""
+    try:
+        with open(os.path.join(root, MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(root, manifest):
+    path = os.path.join(root, MANIFEST)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def export_files(paths, root, fmt='parquet'):
+    """把若干结果文件导出到数据集（内容与已导出的文件相同时跳过）
+
+    Returns:
+        (写入的行数, 跳过的文件数)
+    """
+    manifest = load_manifest(root)
+    rows = []
+    exported = {}
+    skipped = 0
+    for path in paths:
+        digest = _file_digest(path)
+        if digest in manifest or digest in exported:
+            skipped += 1
+            continue
+        file_rows = load_result_file(path)
+        exported[digest] = {'path': path, 'rows': len(file_rows)}
+        rows.extend(file_rows)
+    if rows:
+        write_dataset(rows_to_table(rows), root, fmt)
+    if exported:
+        os.makedirs(root, exist_ok=True)
+        manifest.update(exported)
+        _save_manifest(root, manifest)
+    return len(rows), skipped
+
+
+def dedup_table(table):
+    """按 (号码, 城市, 爬取时间) 去重，保留第一次出现的行"""
+    pa = _require_pyarrow()
+    keys = [name for name in DEDUP_KEYS if name in table.column_names]
+    if not keys or table.num_rows == 0:
+        return table
+    table = table.append_column('_row', pa.array(range(table.num_rows), type=pa.int64()))
+    first = table.group_by(keys, use_threads=False).aggregate([('_row', 'min')])['_row_min']
+    # first 是每组第一行的行号：按行号排序后取这些行（保持原来的顺序）
+    rows = first.take(pa.compute.sort_indices(first))
+    return table.take(rows).drop_columns(['_row'])
+
+
+def compact(root, fmt='parquet', min_files=2):
+    """合并每个分区里的小文件
+
+    每个叶子分区中文件数 >= min_files 时，读出全部数据、按 (号码, 城市, 爬取时间) 去重后写成一个新文件，
+    新文件写完后再删除旧文件，中途失败不会丢数据。
+
+    Returns:
+        被合并的分区数量
+    """
+    pa = _require_pyarrow()
+    suffix = FORMATS[fmt]
+    merged = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        parts = sorted(f for f in filenames if f.endswith(suffix))
+        if len(parts) < min_files:
+            continue
+        paths = [os.path.join(dirpath, f) for f in parts]
+        if fmt == 'parquet':
+            tables = [pa.parquet.read_table(p, partitioning=None) for p in paths]
+        else:
+            tables = [pa.ipc.open_file(p).read_all() for p in paths]
+        table = dedup_table(pa.concat_tables(tables, promote_options='default'))
+        target = os.path.join(dirpath, f'part-compacted-{uuid.uuid4().hex[:12]}{suffix}')
+        tmp = target + '.tmp'
+        if fmt == 'parquet':
+            pa.parquet.write_table(table, tmp)
+        else:
+            with pa.ipc.new_file(tmp, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, target)
+        for p in paths:
+            os.remove(p)
+        merged += 1
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='号码数据列式导出')
+    parser.add_argument('files', nargs='*', help='要导出的结果文件（支持通配符）')
+    parser.add_argument('--out', default='dataset', help='数据集目录（默认：dataset）')
+    parser.add_argument('--format', choices=list(FORMATS), default='parquet', help='文件格式')
+    parser.add_argument('--compact', action='store_true', help='导出后合并各分区的小文件')
+    args = parser.parse_args(argv)
+
+    paths = []
+    for pattern in args.files:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+
+    if paths:
+        count, skipped = export_files(paths, args.out, args.format)
+        print(f'📦 已导出 {len(paths) - skipped} 个文件，共 {count} 条记录到 {args.out}'
+              + (f'（跳过 {skipped} 个已导出的文件）' if skipped else ''))
+    if args.compact:
+        merged = compact(args.out, args.format)
+        print(f'🗜  已合并 {merged} 个分区')
+
+
+if __name__ == '__main__':
+    main()
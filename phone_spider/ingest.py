@@ -0,0 +1,224 @@
+"""
+历史结果导入号码库存
+
+发现历史结果文件（phones_<城市>_<时间>.json、phones_multi_<时间>.json，两种 JSON 格式）和运行日志
+（spider_run.log 等，逐行的 "📱 号码 - 最低消费..."），在进程池中解析，统一成
+(城市, 号码, 最低消费, 预存话费, 首次时间, 最近时间) 后批量写入号码库存：同一个号码只保留一行，
+合并首次/最近看到的时间，seen_count 为包含该号码的文件数。
+
+每个文件按内容的 SHA-256 记录在 ingested_files 表中，重新运行时跳过已经导入过的文件（改名或复制也能识别）。
+安装了 orjson 时用它解析 JSON（快数倍），否则用标准库 json。
+
+使用方法:
+    python -m phone_spider ingest . --db phones.db
+    python -m phone_spider ingest archive/ --jobs 8
+"""
+
+import concurrent.futures
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+
+from phone_spider.export import normalize_rows, parse_amount_fen, parse_crawl_time
+
+
+# 目录中要导入的文件
+RESULT_PATTERNS = ('phones_*.json',)
+LOG_PATTERNS = ('*.log',)
+# 每次写库的最大行数（一个事务）
+BATCH_ROWS = 200000
+
+# 日志中的号码行和城市行
+LOG_PHONE_RE = re.compile(r'📱\s*(1\d{10})(?:\s*-\s*(.*))?')
+LOG_CITY_RE = re.compile(r'^(?:选择城市|开始爬取城市|目标城市):\s*([^\s,，]+)\s*$')
+
+# 工作进程中的全局状态（由 _init_worker 设置）
+_known = frozenset()
+_loads = json.loads
+
+
+def _json_loads():
+    """优先使用 orjson（可选依赖），没有安装时用标准库 json"""
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+def _init_worker(known):
+    global _known, _loads
+    _known = known
+    _loads = _json_loads()
+
+
+def discover(paths, logs=True):
+    """展开文件、通配符和目录（递归），返回去重排序后的文件列表"""
+    patterns = RESULT_PATTERNS + (LOG_PATTERNS if logs else ())
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = [d for d in dirnames if not d.startswith('.') and d != '__pycache__']
+                for name in filenames:
+                    if any(fnmatch.fnmatch(name, p) for p in patterns):
+                        found.add(os.path.join(dirpath, name))
+        else:
+            found.update(glob.glob(path) or [path])
+    return sorted(found)
+
+
+def _file_time(path):
+    """文件的爬取时间（Unix 秒）：优先取文件名中的时间戳，没有时用修改时间"""
+    try:
+        crawl_time = parse_crawl_time(path)
+    except ValueError:
+        crawl_time = None  # 文件名中的时间戳不合法
+    if crawl_time:
+        return int(crawl_time.timestamp())
+    return int(os.path.getmtime(path))
+
+
+def _merge(merged, city, phone, min_cost, deposit, seen_at):
+    key = (city, phone)
+    current = merged.get(key)
+    if current is None:
+        merged[key] = [min_cost, deposit, seen_at, seen_at]
+        return
+    if min_cost is not None:
+        current[0] = min_cost
+    if deposit is not None:
+        current[1] = deposit
+    current[2] = min(current[2], seen_at)
+    current[3] = max(current[3], seen_at)
+
+
+def _parse_json(data, file_time, merged):
+    timestamps = {None: file_time}
+    for row in normalize_rows(_loads(data)):
+        if not row['city']:
+            continue
+        crawl_time = row['crawl_time']
+        seen_at = timestamps.get(crawl_time)
+        if seen_at is None:
+            seen_at = timestamps[crawl_time] = int(crawl_time.timestamp())
+        _merge(merged, row['city'], row['phone'], row['min_cost_fen'], row['deposit_fen'], seen_at)
+
+
+def _parse_log(data, file_time, merged):
+    city = None
+    for line in data.decode('utf-8', errors='replace').splitlines():
+        match = LOG_PHONE_RE.search(line)
+        if match:
+            if city:
+                _merge(merged, city, int(match.group(1)), parse_amount_fen(match.group(2)), None, file_time)
+            continue
+        match = LOG_CITY_RE.match(line.strip())
+        if match:
+            city = match.group(1)
+
+
+def parse_file(path):
+    """解析一个文件（在工作进程中运行）
+
+    Returns:
+        (路径, SHA-256, 行列表或 None（已导入过）, 错误信息或 None)
+        行为 (城市, 号码, 最低消费分, 预存话费分, 首次时间, 最近时间)，同一文件内已去重
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return path, None, None, str(e)
+    digest = hashlib.sha256(data).hexdigest()
+    if digest in _known:
+        return path, digest, None, None
+    merged = {}
+    try:
+        file_time = _file_time(path)
+        if path.endswith('.json'):
+            _parse_json(data, file_time, merged)
+        else:
+            _parse_log(data, file_time, merged)
+    except Exception as e:
+        return path, digest, None, f'{type(e).__name__}: {e}'
+    rows = [(city, phone, v[0], v[1], v[2], v[3]) for (city, phone), v in merged.items()]
+    return path, digest, rows, None
+
+
+class Ingestor:
+    """把历史文件批量导入号码库存
+
+    Args:
+        store: PhoneStore
+        jobs: 解析进程数（默认 CPU 核数，1 表示在当前进程中解析）
+    """
+
+    def __init__(self, store, jobs=None):
+        self.store = store
+        self.jobs = jobs or os.cpu_count() or 1
+        self.files = 0
+        self.skipped = 0
+        self.failed = []
+        self.rows = 0
+        self.new_numbers = 0
+        self.elapsed = 0.0
+
+    def run(self, paths):
+        """解析并导入文件（已导入过的文件按内容哈希跳过）
+
+        Returns:
+            本次新增的号码数
+        """
+        start = time.perf_counter()
+        known = frozenset(self.store.ingested_digests())
+        seen = set(known)
+        rows, files = [], []
+        for path, digest, file_rows, error in self._parse_all(paths, known):
+            if error:
+                self.failed.append((path, error))
+                continue
+            if file_rows is None or digest in seen:
+                self.skipped += 1
+                continue
+            seen.add(digest)  # 本次运行中内容相同的文件只导入一次
+            self.files += 1
+            rows.extend(file_rows)
+            files.append((digest, path, len(file_rows)))
+            if len(rows) >= BATCH_ROWS:
+                self._flush(rows, files)
+                rows, files = [], []
+        if files:
+            self._flush(rows, files)
+        self.elapsed = time.perf_counter() - start
+        return self.new_numbers
+
+    def _parse_all(self, paths, known):
+        if self.jobs <= 1 or len(paths) < 2:
+            _init_worker(known)
+            for path in paths:
+                yield parse_file(path)
+            return
+        chunksize = max(1, min(64, len(paths) // (self.jobs * 8)))
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.jobs, initializer=_init_worker, initargs=(known,)) as pool:
+            yield from pool.map(parse_file, paths, chunksize=chunksize)
+
+    def _flush(self, rows, files):
+        self.new_numbers += self.store.bulk_load(rows, files)
+        self.rows += len(rows)
+
+    def format_stats(self):
+        rate = self.files / self.elapsed if self.elapsed > 0 else 0
+        lines = [f'导入 {self.files} 个文件（{rate:.0f} 个/秒，{self.elapsed:.1f}s），'
+                 f'跳过已导入 {self.skipped} 个，失败 {len(self.failed)} 个',
+                 f'号码行 {self.rows} 条（文件内已去重），库存新增号码 {self.new_numbers} 个']
+        for path, error in self.failed[:10]:
+            lines.append(f'  ⚠️  {path}: {error}')
+        if len(self.failed) > 10:
+            lines.append(f'  ... 另有 {len(self.failed) - 10} 个文件失败')
+        return '\n'.join(lines)
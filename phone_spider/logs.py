@@ -0,0 +1,454 @@
+"""
+结构化日志
+
+爬虫热路径上的事件（开始/完成一个查询、找到的每个号码、写库存、浏览器异常）不再直接 print，
+而是写到按阶段命名的 logger（phone_spider.<阶段>，如 phone_spider.phone、phone_spider.query）：
+
+- 级别：每个号码是 DEBUG，每个查询是 INFO，异常是 WARNING；级别不够的事件在调用处就被丢弃（不格式化）
+- 采样和限流：按阶段每 N 条保留 1 条、每秒最多 N 条（WARNING 及以上总是保留），在进入队列之前完成
+- 非阻塞输出：调用方（事件循环）只把 (时间, 阶段, 级别, 消息, 字段) 放进队列，由后台线程（QueueListener）
+  生成日志记录、格式化并成批写出，队列空了才刷新一次；其它代码通过 logging 写到 phone_spider.* 的记录
+  经 QueueHandler 进入同一个队列
+- 两种输出可以同时使用：给人看的控制台（text 逐行，与原来的输出相同；progress 只保留一行进度和警告），
+  给程序看的 JSON Lines 文件（每条记录一行，带城市、查询、号码等字段）
+
+没有启动 LogOutput 时（作为库使用），这些 logger 沿用 logging 的默认配置。
+
+使用方法:
+    python -m phone_spider crawl --city 深圳 --log-level info,phone=debug
+    python -m phone_spider sweep --cities 深圳 广州 --log-format progress --log-json crawl.jsonl
+    python -m phone_spider crawl --city 深圳 --log-level debug --log-sample phone=100 --log-rate 200
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+
+LOGGER = 'phone_spider'
+CONSOLE_FORMATS = ('text', 'progress')
+LEVELS = {'debug': logging.DEBUG, 'info': logging.INFO, 'warning': logging.WARNING, 'error': logging.ERROR}
+# 后台线程一次最多合并写出的行数
+BATCH_LINES = 256
+# progress 视图刷新进度行的间隔（秒）；输出不是终端时每隔 PROGRESS_LINE_INTERVAL 秒打印一行
+PROGRESS_INTERVAL = 0.5
+PROGRESS_LINE_INTERVAL = 10.0
+
+# 正在运行的日志输出（由 LogOutput.start/stop 设置）
+_active = None
+
+
+def _json_dumps():
+    """优先使用 orjson（可选依赖），没有安装时用标准库 json"""
+    try:
+        import orjson
+    except ImportError:
+        return lambda data: json.dumps(data, ensure_ascii=False, default=str)
+    return lambda data: orjson.dumps(data, default=str).decode('utf-8')
+
+
+def _parse_pairs(spec, convert, what):
+    """解析 "值" 或 "阶段=值,阶段=值"，返回 {阶段或 '*': 值}
+
+    Raises:
+        ValueError: 值不合法
+    """
+    values = {}
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, value = part.rpartition('=')
+        name = name.strip() if sep else '*'
+        try:
+            values[name] = convert(value.strip())
+        except (KeyError, ValueError):
+            raise ValueError(f'{what}不合法: {part!r}')
+    return values
+
+
+def parse_levels(spec):
+    """解析日志级别，如 "info"、"warning,phone=debug"（没写全局级别时为 info）"""
+    levels = _parse_pairs(spec, lambda v: LEVELS[v.lower()], '日志级别')
+    levels.setdefault('*', logging.INFO)
+    return levels
+
+
+def parse_limits(spec, convert=float):
+    """解析采样/限流设置，如 "100"（所有阶段）或 "phone=100,query=10" """
+    limits = _parse_pairs(spec, convert, '采样/限流设置')
+    for name, value in limits.items():
+        if value <= 0:
+            raise ValueError(f'采样/限流设置必须大于 0: {name}={value}')
+    return limits
+
+
+def get_logger(stage):
+    """某个阶段的日志（logger 名称为 phone_spider.<阶段>）"""
+    return StageLogger(stage)
+
+
+def flush():
+    """等待队列中的记录全部写出（打印汇总之前调用，保证顺序；没有启动 LogOutput 时什么都不做）"""
+    if _active is not None:
+        _active.flush()
+
+
+class StageLogger:
+    """一个阶段的日志：事件带关键字字段，级别不够时直接返回
+
+    Args:
+        stage: 阶段名称，如 phone、query、harvest、browser
+    """
+
+    __slots__ = ('stage', 'logger')
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.logger = logging.getLogger(f'{LOGGER}.{stage}')
+
+    def enabled(self, level='info'):
+        """该级别（debug/info/warning/error）的事件是否会被记录"""
+        return self.logger.isEnabledFor(LEVELS[level])
+
+    def log(self, level, msg, fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        output = _active
+        if output is None:
+            # 没有启动 LogOutput：交给 logging 的默认配置
+            self.logger.log(level, msg, extra={'fields': fields})
+            return
+        # 快速路径：不在调用方创建 LogRecord（创建记录比放进队列慢得多）
+        output.put(self.stage, level, msg, fields)
+
+    def debug(self, msg, **fields):
+        self.log(logging.DEBUG, msg, fields)
+
+    def info(self, msg, **fields):
+        self.log(logging.INFO, msg, fields)
+
+    def warning(self, msg, **fields):
+        self.log(logging.WARNING, msg, fields)
+
+    def error(self, msg, **fields):
+        self.log(logging.ERROR, msg, fields)
+
+
+def _stage(record):
+    return record.name.rpartition('.')[2]
+
+
+class StageLimiter(logging.Filter):
+    """按阶段采样（每 N 条保留 1 条）和限流（每秒最多 N 条，令牌桶），WARNING 及以上总是保留
+
+    被限流丢弃的条数记在下一条保留的记录上（record.suppressed）。
+
+    Args:
+        sample: {阶段或 '*': N}
+        rate: {阶段或 '*': 每秒条数}
+    """
+
+    def __init__(self, sample=None, rate=None):
+        super().__init__()
+        self.sample = sample or {}
+        self.rate = rate or {}
+        self.counts = {}
+        self.buckets = {}  # {阶段: [令牌数, 上次时间]}
+        self.suppressed = {}
+        self.sampled_out = 0
+        self.rate_limited = 0
+
+    def filter(self, record):
+        suppressed = self.allow(_stage(record), record.levelno)
+        if suppressed is None:
+            return False
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+    def allow(self, stage, level):
+        """是否保留一条记录
+
+        Returns:
+            None 表示丢弃，否则为之前被限流丢弃的条数
+        """
+        if level >= logging.WARNING:
+            return 0
+        every = self.sample.get(stage, self.sample.get('*'))
+        if every and every > 1:
+            count = self.counts[stage] = self.counts.get(stage, 0) + 1
+            if (count - 1) % every:
+                self.sampled_out += 1
+                return None
+        rate = self.rate.get(stage, self.rate.get('*'))
+        if rate:
+            now = time.monotonic()
+            bucket = self.buckets.get(stage)
+            if bucket is None:
+                bucket = self.buckets[stage] = [max(1.0, rate), now]
+            bucket[0] = min(max(1.0, rate), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                self.suppressed[stage] = self.suppressed.get(stage, 0) + 1
+                self.rate_limited += 1
+                return None
+            bucket[0] -= 1
+        return self.suppressed.pop(stage, 0)
+
+
+class TextFormatter(logging.Formatter):
+    """控制台逐行输出：消息原样输出（与原来的 print 相同），被限流时注明省略的条数"""
+
+    def format(self, record):
+        msg = record.getMessage()
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            msg = f'{msg}（之前省略 {suppressed} 条）'
+        if record.exc_info:
+            msg = f'{msg}\n{self.formatException(record.exc_info)}'
+        return msg
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON Lines：时间、级别、阶段、消息和事件字段"""
+
+    def __init__(self):
+        super().__init__()
+        self.dumps = _json_dumps()
+
+    def format(self, record):
+        data = {
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'stage': _stage(record),
+            'msg': record.getMessage().strip(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            data.update(fields)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            data['suppressed'] = suppressed
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return self.dumps(data)
+
+
+class _BatchHandler(logging.Handler):
+    """在后台线程中把格式化后的行攒成一批写出：队列空了或攒够 BATCH_LINES 行时写一次并刷新"""
+
+    def __init__(self, stream, formatter, pending, close=False):
+        super().__init__()
+        self.stream = stream
+        self.setFormatter(formatter)
+        self.pending = pending  # 日志队列（判断是否还有待处理的记录）
+        self.close_stream = close
+        self.lines = []
+
+    def emit(self, record):
+        try:
+            self.lines.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.lines) >= BATCH_LINES or self.pending.empty():
+            self.flush()
+
+    def flush(self):
+        if not self.lines:
+            return
+        self.stream.write('\n'.join(self.lines) + '\n')
+        self.lines = []
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        if self.close_stream:
+            self.stream.close()
+        super().close()
+
+
+class ProgressHandler(logging.Handler):
+    """紧凑的进度视图：完成的查询只更新计数，终端上原地刷新一行进度；WARNING 及以上单独成行
+
+    Args:
+        stream: 输出流
+    """
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+        self.setFormatter(TextFormatter())
+        self.tty = hasattr(stream, 'isatty') and stream.isatty()
+        self.queries = 0
+        self.phones = 0
+        self.warnings = 0
+        self.last = ''
+        self.drawn = 0.0
+        self.dirty = False
+
+    def emit(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        now = time.monotonic()
+        if record.levelno >= logging.WARNING:
+            self.warnings += 1
+            self._write(self.format(record).strip() + '\n')
+            self.drawn = 0.0  # 警告之后立即重画进度行
+        elif fields.get('event') == 'done':
+            self.queries += 1
+            self.phones += fields.get('count', 0)
+            self.last = ' '.join(str(fields[k]) for k in ('city', 'query') if fields.get(k))
+        else:
+            return
+        self.dirty = True
+        if now - self.drawn >= (PROGRESS_INTERVAL if self.tty else PROGRESS_LINE_INTERVAL):
+            self.draw(now)
+
+    def line(self):
+        return (f'⏳ 已完成 {self.queries} 个查询，找到 {self.phones} 个号码'
+                + (f'，最近: {self.last}' if self.last else '')
+                + (f'，警告 {self.warnings} 条' if self.warnings else ''))
+
+    def _write(self, text):
+        self.stream.write(('\r\033[K' if self.tty else '') + text)
+        self.stream.flush()
+
+    def draw(self, now=None):
+        self._write(self.line() + ('' if self.tty else '\n'))
+        self.drawn = now or time.monotonic()
+        self.dirty = False
+
+    def close(self):
+        if self.dirty or (self.tty and self.queries):
+            self.draw()
+        if self.tty and self.queries:
+            self.stream.write('\n')
+            self.stream.flush()
+        super().close()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """只把记录放进队列：消息的格式化留给后台线程（同一进程内，不需要 QueueHandler 默认的预先格式化）"""
+
+    def prepare(self, record):
+        return record
+
+
+class _Listener(logging.handlers.QueueListener):
+    """后台线程：把快速路径放进来的元组变成日志记录；遇到 flush 标记时刷新输出并通知调用方"""
+
+    def prepare(self, item):
+        if isinstance(item, logging.LogRecord):
+            return item
+        created, stage, level, msg, fields, suppressed = item
+        record = logging.LogRecord(f'{LOGGER}.{stage}', level, '', 0, msg, (), None)
+        record.created = created
+        record.fields = fields
+        if suppressed:
+            record.suppressed = suppressed
+        return record
+
+    def handle(self, item):
+        if isinstance(item, threading.Event):
+            for handler in self.handlers:
+                handler.flush()
+            item.set()
+            return
+        super().handle(item)
+
+
+class LogOutput:
+    """启动结构化日志输出（with 使用，或 start/stop）
+
+    Args:
+        level: 日志级别，如 "info"、"info,phone=debug"
+        console: 控制台视图：text（逐行）/ progress（一行进度）/ None（不输出到控制台）
+        json_path: JSON Lines 文件路径（可选）
+        sample: 采样设置，如 "phone=100"
+        rate: 限流设置（每秒条数），如 "200" 或 "phone=50"
+        stream: 控制台输出流（默认 sys.stdout）
+    """
+
+    def __init__(self, level='info', console='text', json_path=None, sample=None, rate=None, stream=None):
+        self.levels = parse_levels(level)
+        self.console = console
+        self.json_path = json_path
+        self.limiter = StageLimiter(parse_limits(sample, int), parse_limits(rate))
+        self.stream = stream
+        self.queue = None
+        self.listener = None
+        self.handler = None
+        self.outputs = []
+        self._saved = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        global _active
+        root = logging.getLogger(LOGGER)
+        self._saved = (root.level, root.propagate,
+                       {stage: logging.getLogger(f'{LOGGER}.{stage}').level for stage in self.levels if stage != '*'})
+        root.setLevel(self.levels['*'])
+        root.propagate = False
+        for stage, level in self.levels.items():
+            if stage != '*':
+                logging.getLogger(f'{LOGGER}.{stage}').setLevel(level)
+
+        self.queue = queue.SimpleQueue()
+        stream = self.stream or sys.stdout
+        if self.console == 'text':
+            self.outputs.append(_BatchHandler(stream, TextFormatter(), self.queue))
+        elif self.console == 'progress':
+            self.outputs.append(ProgressHandler(stream))
+        if self.json_path:
+            self.outputs.append(_BatchHandler(open(self.json_path, 'a', encoding='utf-8'), JsonFormatter(),
+                                              self.queue, close=True))
+        self.handler = _QueueHandler(self.queue)
+        self.handler.addFilter(self.limiter)
+        root.addHandler(self.handler)
+        self.listener = _Listener(self.queue, *self.outputs)
+        self.listener.start()
+        _active = self
+
+    def put(self, stage, level, msg, fields):
+        """快速路径：采样/限流后把事件放进队列（由 StageLogger 调用）"""
+        suppressed = self.limiter.allow(stage, level)
+        if suppressed is not None:
+            self.queue.put((time.time(), stage, level, msg, fields, suppressed))
+
+    def flush(self):
+        """等待队列中的记录全部写出"""
+        marker = threading.Event()
+        self.queue.put(marker)
+        marker.wait()
+
+    def stop(self):
+        global _active
+        if self.listener is None:
+            return
+        _active = None
+        root = logging.getLogger(LOGGER)
+        root.removeHandler(self.handler)
+        self.listener.stop()
+        self.listener = None
+        for output in self.outputs:
+            output.close()
+        self.outputs = []
+        level, propagate, stages = self._saved
+        root.setLevel(level)
+        root.propagate = propagate
+        for stage, stage_level in stages.items():
+            logging.getLogger(f'{LOGGER}.{stage}').setLevel(stage_level)
+
+    def format_stats(self):
+        return f'日志: 采样丢弃 {self.limiter.sampled_out} 条，限流丢弃 {self.limiter.rate_limited} 条'
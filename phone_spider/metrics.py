@@ -0,0 +1,243 @@
+"""
+爬取过程指标
+
+进程内计数器/仪表/直方图，通过本地 HTTP 端点以 Prometheus 文本格式暴露，
+另外可以定期打印一行紧凑的状态，代替逐个号码的输出。
+指标更新只是字典里的整数加法，可以放在提取号码的热路径中。
+
+使用方法:
+    python spider_simple.py --metrics-port 9108 --status-interval 10
+    curl http://127.0.0.1:9108/metrics
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    body = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+    return '{' + body + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """只增不减的计数器"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, amount=1, *labels):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels):
+        return self.values.get(labels, 0)
+
+    def total(self):
+        return sum(self.values.values())
+
+    def render(self):
+        lines = []
+        for labels, value in sorted(self.values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        if not self.values and not self.labelnames:
+            lines.append(f'{self.name} 0')
+        return lines
+
+
+class Gauge(Counter):
+    """可增可减、可直接设置的仪表"""
+
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        self.values[labels] = value
+
+    def dec(self, amount=1, *labels):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram:
+    """直方图（累计分桶 + sum + count）"""
+
+    kind = 'histogram'
+
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}  # labels -> [每个桶的计数..., +Inf 桶计数, sum]
+
+    def observe(self, value, *labels):
+        state = self.values.get(labels)
+        if state is None:
+            state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def time(self, *labels):
+        """计时上下文管理器：with histogram.time('extract'): ..."""
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = []
+        for labels, state in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                label_text = _format_labels(self.labelnames, labels, ('le', _format_value(float(bound))))
+                lines.append(f'{self.name}_bucket{label_text} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(state[-1])}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class CrawlMetrics:
+    """爬虫使用的一组指标"""
+
+    def __init__(self):
+        self.registry = Registry()
+        r = self.registry
+        self.searches = r.register(Counter('phone_spider_searches_total', '完成的搜索次数'))
+        self.in_flight = r.register(Gauge('phone_spider_searches_in_flight', '正在进行的搜索数'))
+        self.found = r.register(Counter('phone_spider_numbers_found_total', '匹配到的号码（含重复）'))
+        self.unique = r.register(Counter('phone_spider_numbers_unique_total', '本次运行首次出现的号码'))
+        self.duplicate = r.register(Counter('phone_spider_numbers_duplicate_total', '本次运行中重复出现的号码'))
+        self.errors = r.register(Counter('phone_spider_errors_total', '错误次数', ('type',)))
+        self.stage = r.register(Histogram('phone_spider_stage_seconds', '各阶段耗时（秒）', ('stage',)))
+        self.queue_depth = r.register(Gauge('phone_spider_queue_depth', '分阶段管道各阶段的输入队列深度', ('stage',)))
+        self.rss = r.register(Gauge('phone_spider_browser_rss_bytes', '浏览器所有进程 RSS 之和'))
+        self.heap = r.register(Gauge('phone_spider_js_heap_bytes', '最近一次采样的页面 JS 堆'))
+        self.started = time.time()
+        self._seen = set()
+        self._server = None
+
+    def record_numbers(self, phones):
+        """记录一次查询匹配到的号码，区分首次出现和重复"""
+        seen = self._seen
+        for phone in phones:
+            if phone in seen:
+                self.duplicate.inc()
+            else:
+                seen.add(phone)
+                self.unique.inc()
+        self.found.inc(len(phones))
+
+    def record_error(self, error):
+        self.errors.inc(1, type(error).__name__)
+
+    def record_memory(self, sample):
+        if sample.get('rss') is not None:
+            self.rss.set(sample['rss'])
+        if sample.get('heap') is not None:
+            self.heap.set(sample['heap'])
+
+    def serve(self, port, host='127.0.0.1'):
+        """在后台线程中启动 /metrics 端点"""
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                data = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f'📊 指标端点: http://{host}:{self._server.server_address[1]}/metrics')
+        return self._server.server_address[1]
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def status_line(self):
+        elapsed = time.time() - self.started
+        rate = self.searches.total() / elapsed * 60 if elapsed > 0 else 0
+        line = (f'[{time.strftime("%H:%M:%S")}] 搜索 {self.searches.total()}'
+                f'（进行中 {self.in_flight.get()}，{rate:.1f}/分钟）'
+                f' | 号码 {self.found.total()}（唯一 {self.unique.total()}，重复 {self.duplicate.total()}）'
+                f' | 错误 {self.errors.total()}')
+        rss = self.rss.get()
+        if rss:
+            line += f' | 内存 {rss / 1024 / 1024:.0f}MB'
+        return line
+
+    async def report_status(self, interval):
+        """每隔 interval 秒打印一行状态（作为后台任务运行，取消即停止）"""
+        while True:
+            await asyncio.sleep(interval)
+            print(self.status_line(), flush=True)
+
+    def start_status(self, interval):
+        """启动状态行后台任务，interval 为空时返回 None"""
+        if not interval:
+            return None
+        return asyncio.ensure_future(self.report_status(interval))
@@ -0,0 +1,347 @@
+"""
+本地模拟选号网站（测试/基准用）
+
+模拟真实网站的页面结构和交互：地区选择弹窗 → 搜索框/搜索按钮 → ul > li 号码列表、
+"更多号码"分页、"为您推荐"区、"查不到号码信息"、"更换"城市。
+页面通过 fetch 请求 /api/search、/api/recommend 获取数据后再渲染，根节点上挂有
+类似 Vue 2 的 __vue__ 实例（keyword 数据和 searchNum 方法）。
+
+号码库存按城市用固定种子生成，同样的参数每次结果都相同。
+设置 rate_limit 后按客户端地址限流（超出时 API 返回 429），用于测试出口池。
+
+使用方法:
+    python -m phone_spider.mocksite --port 8800
+    # 浏览器访问 http://127.0.0.1:8800/index.html#/
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from phone_spider.egress import TokenBucket
+from phone_spider.sites import SiteProfile
+
+
+CITIES = SiteProfile.resolve('mock').cities
+PREFIXES = ['133', '153', '173', '177', '180', '181', '189', '199']
+PAGE_SIZE = 10
+RECOMMEND_SIZE = 6
+
+
+INDEX_HTML = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>选号</title>
+<style>
+  .popup { position: fixed; top: 10%; left: 30%; background: #fff; border: 1px solid #ccc; padding: 20px; }
+  .popup span { display: inline-block; margin: 4px; padding: 4px 8px; cursor: pointer; }
+  .popup span.active { background: #1677ff; color: #fff; }
+  .moreNum { cursor: pointer; color: #1677ff; }
+  .hidden { display: none; }
+</style></head>
+<body>
+<div id="app">
+  <div id="popup" class="popup hidden">
+    <h3>请确认号码归属地</h3>
+    <div id="cities"></div>
+    <button id="confirm">确认,去选号</button>
+  </div>
+  <div id="main" class="hidden">
+    <div><span id="city-name"></span> <a id="change">更换</a></div>
+    <input id="keyword" placeholder="输入任意1-4位尾号搜索">
+    <button id="search-btn">搜索</button>
+    <div id="result"></div>
+    <div id="recommend"></div>
+  </div>
+</div>
+<script>
+(function () {
+  var CITIES = __CITIES__;
+  var vm = {
+    city: null, keyword: '', list: [], page: 1, hasMore: false, recommend: [], searched: false,
+    $options: { methods: {} },
+    loadCity: function () {
+      try { return localStorage.getItem('xhb_city') || sessionStorage.getItem('xhb_city'); }
+      catch (e) { return null; }
+    },
+    showPopup: function () {
+      var box = document.getElementById('cities');
+      box.innerHTML = '';
+      var selected = null;
+      CITIES.forEach(function (name) {
+        var span = document.createElement('span');
+        span.textContent = name;
+        span.onclick = function () {
+          selected = name;
+          Array.prototype.forEach.call(box.children, function (c) { c.className = ''; });
+          span.className = 'active';
+        };
+        box.appendChild(span);
+      });
+      document.getElementById('confirm').onclick = function () {
+        if (!selected) { return; }
+        vm.setCity(selected);
+      };
+      document.getElementById('popup').className = 'popup';
+      document.getElementById('main').className = 'hidden';
+    },
+    setCity: function (name) {
+      vm.city = name;
+      localStorage.setItem('xhb_city', name);
+      sessionStorage.setItem('xhb_city', name);
+      document.getElementById('popup').className = 'popup hidden';
+      document.getElementById('main').className = '';
+      document.getElementById('city-name').textContent = name;
+      vm.list = []; vm.recommend = []; vm.searched = false;
+      vm.render();
+    },
+    searchNum: function () {
+      vm.page = 1;
+      vm.fetchPage(true);
+    },
+    moreNum: function () {
+      vm.page += 1;
+      vm.fetchPage(false);
+    },
+    fetchPage: function (reset) {
+      var url = '/api/search?city=' + encodeURIComponent(vm.city) +
+                '&tail=' + encodeURIComponent(vm.keyword) + '&page=' + vm.page;
+      fetch(url).then(function (r) { return r.json(); }).then(function (body) {
+        vm.list = reset ? body.data.list : vm.list.concat(body.data.list);
+        vm.hasMore = body.data.hasMore;
+        vm.searched = true;
+        vm.render();
+        if (reset) { vm.fetchRecommend(); }
+      });
+    },
+    fetchRecommend: function () {
+      var url = '/api/recommend?city=' + encodeURIComponent(vm.city) +
+                '&tail=' + encodeURIComponent(vm.keyword);
+      fetch(url).then(function (r) { return r.json(); }).then(function (body) {
+        vm.recommend = body.data.list;
+        vm.render();
+      });
+    },
+    render: function () {
+      var result = document.getElementById('result');
+      if (vm.searched && vm.list.length === 0) {
+        result.innerHTML = '<p>查不到号码信息</p>';
+      } else {
+        var html = '<ul>';
+        vm.list.forEach(function (item) {
+          html += '<li><p>' + item.phoneNum + '</p><p>最低消费' + item.minCost + '元/月</p>' +
+                  '<p>预存' + item.prestore + '元</p></li>';
+        });
+        html += '</ul>';
+        if (vm.hasMore) { html += '<div class="moreNum">更多号码</div>'; }
+        result.innerHTML = html;
+        var more = result.querySelector('.moreNum');
+        if (more) { more.onclick = vm.moreNum; }
+      }
+      var rec = document.getElementById('recommend');
+      if (vm.recommend.length) {
+        var rhtml = '<h4>为您推荐</h4><div>';
+        vm.recommend.forEach(function (item) {
+          rhtml += '<p data-v-mock><span>' + item.phoneNum.slice(0, 3) + '</span>' +
+                   '<span>' + item.phoneNum.slice(3) + '</span></p>';
+        });
+        rec.innerHTML = rhtml + '</div>';
+      } else {
+        rec.innerHTML = '';
+      }
+    }
+  };
+  vm.$options.methods.searchNum = vm.searchNum;
+  vm.$options.methods.moreNum = vm.moreNum;
+  document.getElementById('app').__vue__ = vm;
+  document.getElementById('keyword').addEventListener('input', function (e) {
+    vm.keyword = e.target.value;
+  });
+  document.getElementById('search-btn').onclick = function () { vm.searchNum(); };
+  document.getElementById('change').onclick = function () { vm.showPopup(); };
+
+  var saved = vm.loadCity();
+  setTimeout(function () {
+    if (saved && CITIES.indexOf(saved) >= 0) { vm.setCity(saved); } else { vm.showPopup(); }
+  }, __BOOT_DELAY__);
+})();
+</script>
+</body></html>
+'''
+
+
+def generate_inventory(city, size=3000):
+    """按城市生成固定的号码库存：[{phoneNum, minCost, prestore}]"""
+    rng = random.Random(zlib.crc32(city.encode('utf-8')))
+    numbers = set()
+    while len(numbers) < size:
+        numbers.add(rng.choice(PREFIXES) + f'{rng.randrange(10 ** 8):08d}')
+    inventory = []
+    for phone in sorted(numbers):
+        inventory.append({
+            'phoneNum': phone,
+            'minCost': rng.choice([0, 0, 0, 19, 39, 59, 99]),
+            'prestore': rng.choice([0, 0, 50, 100, 200]),
+        })
+    return inventory
+
+
+class MockSite:
+    """在后台线程中运行的模拟网站
+
+    Args:
+        port: 端口，0 表示自动分配
+        latency: 每个 API 请求的模拟网络延迟（秒）
+        boot_delay: 页面脚本启动前的延迟（毫秒），模拟 SPA 加载
+        inventory_size: 每个城市的号码数量
+        rate_limit: 每个客户端地址每秒允许的 API 请求数，None 表示不限流
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, boot_delay=300, inventory_size=3000,
+                 rate_limit=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.boot_delay = boot_delay
+        self.inventory_size = inventory_size
+        self.rate_limit = rate_limit
+        self.requests = 0  # API 请求计数
+        self.throttled = 0  # 被限流的请求数
+        self.clients = {}  # 客户端地址 -> API 请求数
+        self._buckets = {}
+        self._inventories = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """入口地址（与真实网站相同的 #/ 路由）"""
+        return f'http://{self.host}:{self.port}/index.html#/'
+
+    def inventory(self, city):
+        with self._lock:
+            if city not in self._inventories:
+                self._inventories[city] = generate_inventory(city, self.inventory_size)
+            return self._inventories[city]
+
+    def search(self, city, tail, page=1):
+        """搜索：返回后7位包含尾号的号码，并混入少量不匹配的号码（与真实网站一致）"""
+        inventory = self.inventory(city)
+        matched = [item for item in inventory if tail and tail in item['phoneNum'][-7:]]
+        rng = random.Random(zlib.crc32(f'{city}:{tail}'.encode('utf-8')))
+        filler = rng.sample(inventory, min(len(matched) // 4 + 1, len(inventory))) if matched else []
+        rows = matched + [item for item in filler if item not in matched]
+        start = (page - 1) * PAGE_SIZE
+        return rows[start:start + PAGE_SIZE], start + PAGE_SIZE < len(rows)
+
+    def recommend(self, city, tail=''):
+        inventory = self.inventory(city)
+        rng = random.Random(zlib.crc32(f'recommend:{city}:{tail}'.encode('utf-8')))
+        return rng.sample(inventory, min(RECOMMEND_SIZE, len(inventory)))
+
+    def admit(self, client):
+        """按客户端地址限流，返回是否允许该请求"""
+        with self._lock:
+            self.clients[client] = self.clients.get(client, 0) + 1
+            if not self.rate_limit:
+                return True
+            if client not in self._buckets:
+                self._buckets[client] = TokenBucket(self.rate_limit, burst=self.rate_limit * 2)
+            if self._buckets[client].available() < 1:
+                self.throttled += 1
+                return False
+            self._buckets[client].reserve()
+            return True
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, body, content_type):
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                if parsed.path in ('/', '/index.html'):
+                    html = (INDEX_HTML
+                            .replace('__CITIES__', json.dumps(CITIES, ensure_ascii=False))
+                            .replace('__BOOT_DELAY__', str(int(site.boot_delay))))
+                    self._send(html, 'text/html; charset=utf-8')
+                    return
+                if parsed.path.startswith('/api/'):
+                    site.requests += 1
+                    if not site.admit(self.client_address[0]):
+                        self.send_error(429)
+                        return
+                    if site.latency:
+                        time.sleep(site.latency)
+                    city = params.get('city', '')
+                    tail = params.get('tail', '').strip().rstrip('*')
+                    if parsed.path == '/api/search':
+                        rows, has_more = site.search(city, tail, int(params.get('page', 1)))
+                        body = {'code': 0, 'data': {'list': rows, 'hasMore': has_more}}
+                    elif parsed.path == '/api/recommend':
+                        body = {'code': 0, 'data': {'list': site.recommend(city, tail)}}
+                    else:
+                        self.send_error(404)
+                        return
+                    self._send(json.dumps(body, ensure_ascii=False), 'application/json; charset=utf-8')
+                    return
+                self.send_error(404)
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地模拟选号网站')
+    parser.add_argument('--port', type=int, default=8800, help='端口（默认：8800）')
+    parser.add_argument('--latency', type=float, default=0.0, help='API 模拟延迟（秒）')
+    parser.add_argument('--rate-limit', type=float, default=None, help='每个客户端地址每秒允许的 API 请求数')
+    args = parser.parse_args()
+
+    site = MockSite(port=args.port, latency=args.latency, rate_limit=args.rate_limit)
+    site.start()
+    print(f'模拟网站已启动: {site.url}（Ctrl+C 退出）')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+变化探测
+
+全量爬取一个城市要跑完所有查询并翻完"更多号码"，而很多城市两次运行之间几乎没有变化。
+探测只搜索几个代表性查询的第一页（不翻页、不等推荐区），把每个查询看到的号码排序后取哈希作为指纹，
+与该城市上一次的指纹比较：
+
+- 全部相同：跳过本次全量爬取（几秒钟即可结束）
+- 任一不同、上一次全量爬取没有完成、或距离上一次完成的全量爬取已经有 full_every 次运行：全量爬取
+- 任一探测查询出错或没有看到号码（超时、被拦截时也是空的）：无法判断，全量爬取；
+  这个查询不记录指纹，下一次探测时按"有变化"处理
+
+指纹和每次的决定记录在号码库存的 probes 表中。
+
+使用方法:
+    python -m phone_spider crawl --city 深圳 --probe
+    python -m phone_spider schedule --run --probe --full-every 6
+"""
+
+import hashlib
+
+
+# probes 表中的状态
+SKIPPED = 0  # 指纹相同，跳过了全量爬取
+STARTED = 1  # 开始了全量爬取（没有完成）
+COMPLETED = 2  # 全量爬取已完成
+
+
+class ChangeProbe:
+    """变化探测
+
+    Args:
+        store: PhoneStore（保存指纹）
+        size: 探测的查询数
+        full_every: 每隔多少次运行强制全量爬取一次
+    """
+
+    def __init__(self, store, size=3, full_every=6):
+        self.store = store
+        self.size = size
+        self.full_every = full_every
+        self.skipped = 0
+        self.full = 0
+
+    def queries(self, site):
+        """探测用的查询：从站点默认查询中等间隔取 size 个（每次运行相同，指纹才能比较）"""
+        queries = site.repeat_queries()
+        if self.size >= len(queries):
+            return queries
+        step = len(queries) / self.size
+        return [queries[int(i * step)] for i in range(self.size)]
+
+    @staticmethod
+    def fingerprint(phones):
+        """一组号码的指纹（与顺序无关）；没有号码时返回 None（无法判断，不能与上次比较）"""
+        if not phones:
+            return None
+        return hashlib.sha1(','.join(sorted(phones)).encode('ascii')).hexdigest()[:16]
+
+    def decide(self, city, fingerprints):
+        """与上一次的指纹比较并记录本次的决定
+
+        Args:
+            city: 城市
+            fingerprints: {查询: 指纹}，出错或没有看到号码的查询为 None
+
+        Returns:
+            (是否全量爬取, 原因, 记录 id)
+        """
+        previous, status, since_full = self.store.probe_history(city)
+        inconclusive = [q for q, value in fingerprints.items() if value is None]
+        if inconclusive:
+            full, reason = True, f'{", ".join(inconclusive)} 探测出错或没有结果，无法判断'
+        elif previous is None:
+            full, reason = True, '第一次探测'
+        elif status == STARTED:
+            full, reason = True, '上一次全量爬取没有完成'
+        elif since_full >= self.full_every:
+            full, reason = True, f'距离上一次全量爬取已有 {since_full} 次运行'
+        else:
+            changed = [q for q, value in fingerprints.items() if previous.get(q) != value]
+            if changed:
+                full, reason = True, f'{", ".join(changed)} 有变化'
+            else:
+                full, reason = False, f'{len(fingerprints)} 个探测查询与上次相同'
+        # 无法判断的查询不记录指纹，两次失败的探测不会被当作"相同"
+        comparable = {q: value for q, value in fingerprints.items() if value is not None}
+        probe_id = self.store.record_probe(city, comparable, STARTED if full else SKIPPED)
+        if full:
+            self.full += 1
+        else:
+            self.skipped += 1
+        return full, reason, probe_id
+
+    def completed(self, probe_id):
+        """全量爬取完成"""
+        self.store.finish_probe(probe_id, COMPLETED)
+
+    def format_stats(self):
+        return f'变化探测: 跳过 {self.skipped} 次，全量爬取 {self.full} 次'
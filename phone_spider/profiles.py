@@ -0,0 +1,220 @@
+"""
+浏览器启动配置
+
+一个启动配置 = 浏览器内核 + 启动参数 + 上下文参数。基础配置可以用 "+" 叠加参数组，如：
+
+    headless-shell                     默认：Chromium headless shell（与原来的启动方式相同）
+    chromium                           完整 Chromium 的新 headless 模式
+    firefox / webkit                   其他内核
+    headless-shell+no-gpu+viewport-720 叠加参数组
+
+基准测试在本地模拟网站上对每个配置跑同样的查询，比较冷启动、单次查询耗时、内存和每分钟号码数：
+
+    python -m phone_spider bench profiles
+"""
+
+import statistics
+import time
+
+
+# Chromium 内核配置可用的 User-Agent（出口池给每个出口固定分配一个，见 egress.py）
+USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+)
+USER_AGENT = USER_AGENTS[0]  # 不使用出口池时的默认值
+AUTOMATION_FLAG = '--disable-blink-features=AutomationControlled'
+
+# 基础配置：内核、启动参数、上下文参数
+BASES = {
+    'headless-shell': {
+        'engine': 'chromium',
+        'launch': {'headless': True, 'args': [AUTOMATION_FLAG]},
+        'context': {'viewport': {'width': 1920, 'height': 1080}, 'user_agent': USER_AGENT},
+    },
+    'chromium': {
+        'engine': 'chromium',
+        'launch': {'headless': True, 'channel': 'chromium', 'args': [AUTOMATION_FLAG]},
+        'context': {'viewport': {'width': 1920, 'height': 1080}, 'user_agent': USER_AGENT},
+    },
+    'firefox': {
+        'engine': 'firefox',
+        'launch': {'headless': True},
+        'context': {'viewport': {'width': 1920, 'height': 1080}},
+    },
+    'webkit': {
+        'engine': 'webkit',
+        'launch': {'headless': True},
+        'context': {'viewport': {'width': 1920, 'height': 1080}},
+    },
+}
+
+# 参数组：额外的启动参数（只对 Chromium 生效）和上下文参数
+FLAG_SETS = {
+    'no-gpu': {'args': ['--disable-gpu', '--disable-software-rasterizer']},
+    'no-cache': {'args': ['--disk-cache-size=1', '--media-cache-size=1']},
+    'process-per-site': {'args': ['--process-per-site']},
+    'single-process': {'args': ['--renderer-process-limit=1', '--disable-site-isolation-trials']},
+    'viewport-720': {'context': {'viewport': {'width': 1280, 'height': 720}}},
+    'no-images': {'args': ['--blink-settings=imagesEnabled=false']},
+}
+
+DEFAULT_PROFILE = 'headless-shell'
+
+# bench profiles 默认比较的配置
+DEFAULT_MATRIX = [
+    'headless-shell',
+    'chromium',
+    'headless-shell+no-gpu',
+    'headless-shell+no-cache',
+    'headless-shell+process-per-site',
+    'headless-shell+viewport-720',
+    'headless-shell+no-images',
+    'firefox',
+    'webkit',
+]
+
+
+class LaunchProfile:
+    """浏览器启动配置
+
+    Args:
+        name: 配置名
+        engine: chromium / firefox / webkit
+        launch_options: 传给 browser_type.launch() 的参数
+        context_options: 传给 browser.new_context() 的参数
+    """
+
+    def __init__(self, name, engine, launch_options, context_options):
+        self.name = name
+        self.engine = engine
+        self.launch_options = launch_options
+        self.context_options = context_options
+
+    @classmethod
+    def resolve(cls, spec=None):
+        """按名称解析配置，如 "headless-shell+no-gpu"
+
+        Raises:
+            ValueError: 未知的基础配置或参数组
+        """
+        if isinstance(spec, cls):
+            return spec
+        name = spec or DEFAULT_PROFILE
+        base_name, *flag_names = name.split('+')
+        if base_name not in BASES:
+            raise ValueError(f'未知的启动配置: {base_name}（可选: {", ".join(BASES)}）')
+        base = BASES[base_name]
+        launch = dict(base['launch'])
+        launch['args'] = list(launch.get('args', []))
+        context = dict(base['context'])
+        for flag_name in flag_names:
+            if flag_name not in FLAG_SETS:
+                raise ValueError(f'未知的参数组: {flag_name}（可选: {", ".join(FLAG_SETS)}）')
+            flags = FLAG_SETS[flag_name]
+            if base['engine'] == 'chromium':
+                launch['args'].extend(flags.get('args', []))
+            context.update(flags.get('context', {}))
+        if not launch['args']:
+            del launch['args']
+        return cls(name, base['engine'], launch, context)
+
+    async def launch(self, playwright):
+        """启动浏览器"""
+        return await getattr(playwright, self.engine).launch(**self.launch_options)
+
+    def __repr__(self):
+        return f'LaunchProfile({self.name!r})'
+
+
+def profile_names():
+    """所有基础配置与参数组名（用于命令行帮助）"""
+    return list(BASES), list(FLAG_SETS)
+
+
+async def bench_profile(crawler_factory, profile, url, queries, city='深圳'):
+    """用一个启动配置在指定网站上跑一组查询
+
+    Args:
+        crawler_factory: 接受 (url, profile) 返回 TelecomCrawler 的函数
+        profile: LaunchProfile
+        url: 网站入口（通常是本地模拟网站）
+        queries: 查询列表
+
+    Returns:
+        {'cold_start': 秒, 'latencies': [秒], 'rss': 字节或 None, 'numbers': 号码数, 'elapsed': 秒}
+    """
+    from playwright.async_api import async_playwright
+    from phone_spider.resources import MemoryMonitor
+
+    crawler = crawler_factory(url, profile)
+    crawler.city = city
+    crawler.verbose = False
+    monitor = MemoryMonitor()
+    async with async_playwright() as p:
+        start = time.perf_counter()
+        browser = await profile.launch(p)
+        try:
+            context, page = await crawler._open_page(browser)
+            await crawler._select_city(page, load_wait=0)
+            cold_start = time.perf_counter() - start
+
+            latencies = []
+            numbers = 0
+            for query in queries:
+                query_start = time.perf_counter()
+                numbers += len(await crawler._search_on_page(page, query))
+                latencies.append(time.perf_counter() - query_start)
+            sample = await monitor.sample(page)
+        finally:
+            await browser.close()
+    return {
+        'cold_start': cold_start,
+        'latencies': latencies,
+        'rss': sample['rss'],
+        'numbers': numbers,
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+async def run_matrix(crawler_factory, specs, queries, city='深圳', latency=0.0):
+    """在本地模拟网站上依次测试各启动配置
+
+    Returns:
+        [(配置名, 结果 dict 或 None, 错误信息)]，结果按每分钟号码数从高到低排序
+    """
+    from phone_spider.mocksite import MockSite
+
+    rows = []
+    with MockSite(latency=latency) as site:
+        for spec in specs:
+            profile = LaunchProfile.resolve(spec)
+            try:
+                result = await bench_profile(crawler_factory, profile, site.url, queries, city)
+            except Exception as e:
+                rows.append((profile.name, None, str(e).splitlines()[0]))
+                continue
+            rows.append((profile.name, result, ''))
+    rows.sort(key=lambda row: -numbers_per_minute(row[1]) if row[1] else float('inf'))
+    return rows
+
+
+def numbers_per_minute(result):
+    return result['numbers'] / result['elapsed'] * 60 if result['elapsed'] else 0.0
+
+
+def format_matrix(rows):
+    lines = [f'{"配置":<36}{"冷启动":>8}{"查询中位":>10}{"查询P90":>10}{"内存":>9}{"号码/分钟":>11}']
+    for name, result, error in rows:
+        if result is None:
+            lines.append(f'{name:<36}  ❌ 不可用: {error}')
+            continue
+        latencies = sorted(result['latencies'])
+        p90 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))]
+        rss = f'{result["rss"] / 1024 / 1024:.0f}MB' if result['rss'] else '-'
+        lines.append(f'{name:<36}{result["cold_start"]:>7.2f}s{statistics.median(latencies):>9.2f}s'
+                     f'{p90:>9.2f}s{rss:>9}{numbers_per_minute(result):>11.0f}')
+    return '\n'.join(lines)
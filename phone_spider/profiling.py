@@ -0,0 +1,363 @@
+"""
+性能剖析
+
+爬取慢的原因可能在浏览器/网络、Python 计算（正则匹配、打印），也可能是阻塞了事件循环的同步调用
+（写结果文件、写数据库）。--profiling 打开后，整个运行期间：
+
+- 采样剖析：后台线程每隔 interval 秒用 sys._current_frames() 取一次所有线程的调用栈，结束时写出
+  火焰图（<前缀>.svg）和折叠栈（<前缀>.folded，可以用 flamegraph.pl、speedscope 或 inferno 查看）
+- 事件循环延迟：在每个事件循环上每隔 LAG_INTERVAL 秒安排一次回调，记录实际执行时间比预定晚了多少；
+  事件循环被占住超过阈值（slow）时，采样线程立即抓取事件循环线程当时的调用栈，记为一次卡顿
+- 按 (城市, 查询) 归属：爬虫在每个查询外层调用 track(city, query)，采样时事件循环正在运行的任务属于
+  哪个查询，这个样本就记在哪个查询上（即该查询在事件循环上消耗的 CPU）；同时累计每个查询的墙钟时间
+
+结束时打印摘要（事件循环忙碌比例、延迟分位数、最耗时的函数和查询、最长的卡顿），
+完整报告写入 <前缀>.txt。没有开启剖析时 track() 什么都不做。
+
+使用方法:
+    python -m phone_spider crawl --city 深圳 --profiling
+    python -m phone_spider sweep --cities 深圳 广州 --profiling sweep_profile --slow-callback 50
+    python spider_simple.py --city 深圳 --profiling
+"""
+
+import asyncio
+import contextlib
+import os
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+from html import escape
+
+
+# 采样间隔（秒）
+DEFAULT_INTERVAL = 0.005
+# 事件循环心跳间隔（秒）
+LAG_INTERVAL = 0.05
+# 超过该时间（秒）算一次卡顿
+DEFAULT_SLOW = 0.1
+# 调用栈最多保留的层数
+MAX_DEPTH = 128
+# 线程空闲时最内层的 Python 函数（文件名, 函数名）：等待 I/O、锁或任务
+IDLE_FRAMES = {
+    ('selectors.py', 'select'),
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('thread.py', '_worker'),
+    ('connection.py', 'wait'),
+    ('epollreactor.py', 'doPoll'),
+}
+IDLE = '<空闲>'
+NO_QUERY = ('-', '-')
+
+# 正在运行的剖析器（由 Profiler.start/stop 设置）
+_active = None
+
+
+def track(city, query):
+    """把当前任务在 with 块内的时间记在 (城市, 查询) 上（没有开启剖析时什么都不做）"""
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.track(city, query)
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _LoopState:
+    """一个事件循环的心跳状态"""
+
+    __slots__ = ('loop', 'thread', 'due', 'stack', 'label')
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.thread = None
+        self.due = None  # 下一次心跳的预定时间（perf_counter）
+        self.stack = None  # 本次卡顿中抓取的调用栈
+        self.label = None  # 卡顿时正在运行的查询
+
+
+class _LoopPolicy(asyncio.DefaultEventLoopPolicy):
+    """新建的事件循环（asyncio.run 等）自动开始心跳"""
+
+    def __init__(self, profiler):
+        super().__init__()
+        self.profiler = profiler
+
+    def new_event_loop(self):
+        loop = super().new_event_loop()
+        self.profiler.attach(loop)
+        return loop
+
+
+class Profiler:
+    """采样剖析 + 事件循环延迟 + 按查询归属（with 使用，或 start/stop）
+
+    Args:
+        prefix: 输出文件前缀（默认 profile_<时间>）
+        interval: 采样间隔（秒）
+        slow: 卡顿阈值（秒）
+    """
+
+    def __init__(self, prefix=None, interval=DEFAULT_INTERVAL, slow=DEFAULT_SLOW):
+        self.prefix = prefix or f'profile_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+        self.interval = interval
+        self.slow = slow
+        self.stacks = {}  # {折叠栈: 样本数}
+        self.leaves = {}  # {最内层函数: 非空闲样本数}
+        self.queries = {}  # {(城市, 查询): [墙钟秒数, 事件循环样本数]}
+        self.lags = []  # 每次心跳的延迟（秒）
+        self.stalls = []  # [(延迟秒数, 调用栈, (城市, 查询))]
+        self.samples = 0
+        self.loop_samples = 0  # 事件循环运行期间的样本数
+        self.loop_busy = 0  # 其中事件循环在执行代码（而不是等待 I/O）的样本数
+        self.elapsed = 0.0
+        self._loops = {}  # {线程 id: _LoopState}
+        self._labels = {}  # {任务: (城市, 查询)}
+        self._names = {}  # {线程 id: 线程名}
+        self._codes = {}  # {code 对象: 帧名}
+        self._stop = threading.Event()
+        self._thread = None
+        self._policy = None
+        self._started = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """开始采样；之后新建的事件循环自动开始心跳"""
+        global _active
+        _active = self
+        self._started = time.perf_counter()
+        self._policy = asyncio.get_event_loop_policy()
+        asyncio.set_event_loop_policy(_LoopPolicy(self))
+        self._thread = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+        self._thread.start()
+
+    def attach(self, loop):
+        """在事件循环上开始心跳（已经在运行的事件循环，如脚本的 main() 中，需要手动调用）"""
+        state = _LoopState(loop)
+        loop.call_soon(self._first_beat, state)
+
+    def stop(self):
+        """停止采样，写出火焰图和报告并打印摘要"""
+        global _active
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        _active = None
+        asyncio.set_event_loop_policy(self._policy)
+        self.elapsed = time.perf_counter() - self._started
+        self.write()
+        print(self.format_report(limit=10))
+
+    @contextlib.contextmanager
+    def track(self, city, query):
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None  # 不在事件循环中（如工作线程），只记墙钟时间
+        label = (city, query)
+        previous = self._labels.get(task)
+        if task is not None:
+            self._labels[task] = label
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = self.queries.setdefault(label, [0.0, 0])
+            stats[0] += time.perf_counter() - start
+            if task is not None:
+                if previous is None:
+                    self._labels.pop(task, None)
+                else:
+                    self._labels[task] = previous
+
+    # 事件循环心跳（在事件循环线程中运行）
+
+    def _first_beat(self, state):
+        state.thread = threading.get_ident()
+        self._loops[state.thread] = state
+        self._schedule(state, time.perf_counter())
+
+    def _schedule(self, state, now):
+        state.due = now + LAG_INTERVAL
+        state.loop.call_later(LAG_INTERVAL, self._beat, state)
+
+    def _beat(self, state):
+        now = time.perf_counter()
+        lag = max(0.0, now - state.due)
+        self.lags.append(lag)
+        if lag >= self.slow:
+            self.stalls.append((lag, state.stack, state.label or NO_QUERY))
+        state.stack = None
+        state.label = None
+        self._schedule(state, now)
+
+    # 采样线程
+
+    def _frame_name(self, code):
+        name = self._codes.get(code)
+        if name is None:
+            name = self._codes[code] = (
+                f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        return name
+
+    def _walk(self, frame):
+        """调用栈（从外到内的帧名）和最内层帧的 (文件名, 函数名)"""
+        code = frame.f_code
+        leaf = (os.path.basename(code.co_filename), code.co_name)
+        names = []
+        while frame is not None and len(names) < MAX_DEPTH:
+            names.append(self._frame_name(frame.f_code))
+            frame = frame.f_back
+        names.reverse()
+        return names, leaf
+
+    def _thread_name(self, ident):
+        name = self._names.get(ident)
+        if name is None:
+            self._names = {t.ident: t.name for t in threading.enumerate()}
+            name = self._names.get(ident, str(ident))
+        return name
+
+    def _label(self, state):
+        try:
+            task = asyncio.current_task(state.loop)
+        except RuntimeError:
+            return NO_QUERY
+        return self._labels.get(task, NO_QUERY)
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                names, leaf = self._walk(frame)
+                idle = leaf in IDLE_FRAMES
+                state = self._loops.get(ident)
+                if state is not None and state.loop.is_running():
+                    self.loop_samples += 1
+                    if idle:
+                        names = [IDLE]
+                    else:
+                        self.loop_busy += 1
+                        label = self._label(state)
+                        if label is not NO_QUERY:
+                            self.queries.setdefault(label, [0.0, 0])[1] += 1
+                        # 事件循环被占住超过阈值：记下这次卡顿的调用栈
+                        if state.stack is None and state.due is not None and now - state.due >= self.slow:
+                            state.stack = names
+                            state.label = label
+                elif idle:
+                    continue
+                if not idle:
+                    self.leaves[names[-1]] = self.leaves.get(names[-1], 0) + 1
+                key = ';'.join([self._thread_name(ident)] + names)
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    # 输出
+
+    def write(self):
+        """写出 <前缀>.folded、<前缀>.svg 和 <前缀>.txt"""
+        with open(f'{self.prefix}.folded', 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f'{stack} {count}\n')
+        with open(f'{self.prefix}.svg', 'w', encoding='utf-8') as f:
+            f.write(render_flamegraph(self.stacks, title=f'phone_spider {self.prefix}'))
+        with open(f'{self.prefix}.txt', 'w', encoding='utf-8') as f:
+            f.write(self.format_report(limit=None) + '\n')
+
+    def format_report(self, limit=10):
+        """剖析报告（limit 为各列表显示的条数，None 表示全部）"""
+        ms = 1000
+        busy = self.loop_busy / self.loop_samples if self.loop_samples else 0.0
+        lines = [f'性能剖析（{self.elapsed:.1f}s，采样 {self.samples} 次，间隔 {self.interval * ms:.0f}ms）:']
+        if self.loop_samples:
+            lines.append(f'  事件循环忙碌 {busy:.1%}（其余时间在等待浏览器/网络）')
+        if self.lags:
+            lines.append(f'  事件循环延迟: p50 {_percentile(self.lags, 0.5) * ms:.1f}ms，'
+                         f'p99 {_percentile(self.lags, 0.99) * ms:.1f}ms，最大 {max(self.lags) * ms:.0f}ms；'
+                         f'卡顿（≥{self.slow * ms:.0f}ms）{len(self.stalls)} 次')
+
+        busy_samples = sum(self.leaves.values())
+        if busy_samples:
+            lines.append('  最耗时的函数（自身时间占非空闲样本的比例）:')
+            for name, count in sorted(self.leaves.items(), key=lambda kv: -kv[1])[:limit]:
+                lines.append(f'    {count / busy_samples:>6.1%}  {name}')
+
+        if self.queries:
+            lines.append('  耗时最多的查询（墙钟 / 事件循环 CPU）:')
+            ranked = sorted(self.queries.items(), key=lambda kv: -kv[1][0])[:limit]
+            for (city, query), (wall, samples) in ranked:
+                lines.append(f'    {city} {query:<8}{wall:>9.1f}s{samples * self.interval:>9.2f}s')
+
+        if self.stalls:
+            lines.append('  最长的卡顿:')
+            for lag, stack, (city, query) in sorted(self.stalls, key=lambda s: -s[0])[:limit]:
+                where = '' if (city, query) == NO_QUERY else f'  {city} {query}'
+                lines.append(f'    {lag * ms:.0f}ms{where}')
+                if stack is None:
+                    lines.append('      （没有采到调用栈）')
+                    continue
+                # 摘要只显示最内层的几帧
+                for name in stack if limit is None else stack[-8:]:
+                    lines.append(f'      {name}')
+        lines.append(f'  火焰图: {self.prefix}.svg（折叠栈: {self.prefix}.folded），完整报告: {self.prefix}.txt')
+        return '\n'.join(lines)
+
+
+def render_flamegraph(stacks, title='flamegraph', width=1200, row=16):
+    """把折叠栈 {"a;b;c": 样本数} 画成 SVG 火焰图（根在底部，宽度与样本数成比例）"""
+    tree = [0, {}]  # [样本数, {帧名: 子树}]
+    for stack, count in stacks.items():
+        node = tree
+        node[0] += count
+        for name in stack.split(';'):
+            node = node[1].setdefault(name, [0, {}])
+            node[0] += count
+    total = tree[0] or 1
+    min_width = 0.5  # 比这更窄的帧不画
+
+    def depth(node):
+        return 1 + max((depth(child) for child in node[1].values()), default=0)
+
+    height = (depth(tree) + 1) * row + 30
+    scale = width / total
+    rects = []
+
+    def draw(node, x, level):
+        for name, child in sorted(node[1].items()):
+            w = child[0] * scale
+            if w >= min_width:
+                y = height - (level + 1) * row
+                hue = zlib.crc32(name.encode('utf-8')) % 60
+                label = escape(name)
+                text = escape(name[:int(w / 7)]) if w > 50 else ''
+                rects.append(
+                    f'<g><title>{label}（{child[0]} 个样本，{child[0] / total:.1%}）</title>'
+                    f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row - 1}" '
+                    f'fill="hsl({hue},80%,60%)"/>'
+                    f'<text x="{x + 3:.1f}" y="{y + row - 4}">{text}</text></g>')
+                draw(child, x, level + 1)
+            x += w
+
+    draw(tree, 0.0, 0)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'font-family="monospace" font-size="11">\n'
+            f'<text x="{width / 2}" y="20" text-anchor="middle" font-size="14">{escape(title)}</text>\n'
+            + '\n'.join(rects) + '\n</svg>\n')
@@ -0,0 +1,48 @@
+"""
+尾号查询的生成与解析
+
+查询语法由站点配置决定（phone_spider.sites.SiteProfile）；这里的函数只是委托给站点配置的快捷方式，
+不指定站点时使用默认站点 gd189：搜索框接受 1-4 位尾号，不足 4 位时在末尾加 *，如 "000*"。
+"""
+
+from phone_spider.sites import DEFAULT_SITE, SITES, SiteProfile
+
+
+MAX_TAIL_DIGITS = SITES[DEFAULT_SITE]['max_tail_digits']
+
+
+def make_query(tail, site=None):
+    """尾号 -> 搜索框输入，如 "000" -> "000*"，"1234" -> "1234" """
+    return SiteProfile.resolve(site).make_query(tail)
+
+
+def query_tail(query, site=None):
+    """搜索框输入 -> 要匹配的尾号，如 "000*" -> "000" """
+    return SiteProfile.resolve(site).query_tail(query)
+
+
+def repeat_queries(site=None):
+    """默认的 10 个查询：000* 到 999*"""
+    return SiteProfile.resolve(site).repeat_queries()
+
+
+def tail_queries(digits, site=None):
+    """枚举所有 N 位尾号（N = 1..4），如 digits=2 时为 00* 到 99*"""
+    return SiteProfile.resolve(site).tail_queries(digits)
+
+
+def order_by_yield(queries, yields):
+    """按历史产出从高到低排列查询（时间有限时先跑最可能出号码的查询）
+
+    Args:
+        queries: 查询列表
+        yields: {查询: 历史匹配号码数}，没有记录的查询按已知查询的平均产出排
+
+    Returns:
+        排序后的新列表（产出相同时保持原顺序）
+    """
+    if not yields:
+        return list(queries)
+    known = [yields[q] for q in queries if q in yields]
+    default = sum(known) / len(known) if known else 0
+    return sorted(queries, key=lambda q: -yields.get(q, default))
@@ -0,0 +1,281 @@
+"""
+爬取结果记录与流式接口
+
+把爬虫当作库使用时，不必等整个城市爬完再读 JSON 文件：
+
+    crawler = TelecomCrawler(city='深圳')
+    async for record in crawler.stream():
+        print(record.city, record.query, record.phone)
+
+每个查询提取完成后立即产出该查询匹配到的号码。记录经过一个有界队列交给调用方，
+调用方处理得慢时爬虫会在放入队列处等待（浏览器随之放慢），内存不会无限增长；
+调用方提前退出循环（break / 取消）时爬虫任务被取消，页面和浏览器在各自的 finally 中关闭。
+需要在 break 之后立即关闭浏览器时，用 contextlib.aclosing(crawler.stream()) 包住迭代器。
+
+RecordBatch 是一次查询（或一页）结果的紧凑表示：号码、最低消费、预存话费各是一个 int64 数组，
+城市、查询和金额原文（如 "最低消费39元/月"，取值很少）只存一个整数 id，整批共用一个时间戳。转换为 Arrow 表时号码和金额列直接复用
+数组的内存（零拷贝），可以直接交给 phone_spider.export 写入数据集。
+"""
+
+import asyncio
+import contextlib
+import time
+from array import array
+
+# 金额缺失时在数组中的占位值（转换为 Arrow 时变为 null）
+MISSING = -1
+
+
+class Interner:
+    """字符串 <-> 小整数 id（同一个字符串只保存一份）"""
+
+    def __init__(self):
+        self._ids = {}
+        self.values = []
+
+    def id(self, value):
+        try:
+            return self._ids[value]
+        except KeyError:
+            self._ids[value] = len(self.values)
+            self.values.append(value)
+            return self._ids[value]
+
+    def value(self, id):
+        return self.values[id]
+
+
+CITIES = Interner()
+QUERIES = Interner()
+TEXTS = Interner()
+
+
+class PhoneRecord:
+    """一个号码的爬取记录
+
+    Args:
+        city: 城市
+        query: 找到该号码的查询，如 "888*"
+        phone: 11位手机号（字符串）
+        found_at: 查询完成时间（Unix 秒，同一批记录共用）
+        min_cost_fen: 最低消费（分），不知道时为 None
+        deposit_fen: 预存话费（分），不知道时为 None
+    """
+
+    __slots__ = ('city', 'query', 'phone', 'found_at', 'min_cost_fen', 'deposit_fen')
+
+    def __init__(self, city, query, phone, found_at, min_cost_fen=None, deposit_fen=None):
+        self.city = city
+        self.query = query
+        self.phone = phone
+        self.found_at = found_at
+        self.min_cost_fen = min_cost_fen
+        self.deposit_fen = deposit_fen
+
+    def as_dict(self):
+        return {'city': self.city, 'query': self.query, 'phone': self.phone, 'found_at': self.found_at,
+                'min_cost_fen': self.min_cost_fen, 'deposit_fen': self.deposit_fen}
+
+    def __repr__(self):
+        return f'PhoneRecord(city={self.city!r}, query={self.query!r}, phone={self.phone!r})'
+
+    def __eq__(self, other):
+        if not isinstance(other, PhoneRecord):
+            return NotImplemented
+        return (self.city, self.query, self.phone) == (other.city, other.query, other.phone)
+
+    def __hash__(self):
+        return hash((self.city, self.query, self.phone))
+
+
+async def stream_records(crawler, maxsize=100):
+    """运行爬虫并逐条产出 PhoneRecord
+
+    爬虫需要提供 run() 和 sink 属性：每个查询完成后爬虫调用 await sink(城市, 查询, 号码[, 金额])，
+    金额为可选的 {号码: (最低消费分, 预存话费分)}（接口响应提取时才有）。
+
+    Args:
+        crawler: TelecomCrawler 或 TelecomMultiCityCrawler
+        maxsize: 队列容量（条），满了之后爬虫等待调用方取走记录
+    """
+    queue = asyncio.Queue(maxsize)
+    finished = object()
+
+    async def sink(city, query, phones, prices=None):
+        batch = RecordBatch(city, query)
+        if prices:
+            for phone in sorted(phones):
+                batch.append(phone, *prices.get(phone, (None, None)))
+        else:
+            batch.extend(sorted(phones))
+        for record in batch.records():
+            await queue.put(record)
+
+    async def produce():
+        try:
+            await crawler.run()
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(finished)
+
+    crawler.sink = sink
+    task = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is finished:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        crawler.sink = None
+        if not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+
+class RecordBatch:
+    """一批号码记录（按列存储）
+
+    Args:
+        city: 城市
+        query: 产生这批号码的查询，如 "888*"（可选）
+        crawl_time: 整批共用的时间（Unix 秒），默认当前时间
+    """
+
+    __slots__ = ('city_id', 'query_id', 'crawl_time', 'phones', 'min_cost_fen', 'deposit_fen',
+                 'min_cost_text', 'deposit_text')
+
+    def __init__(self, city, query=None, crawl_time=None):
+        self.city_id = CITIES.id(city)
+        self.query_id = QUERIES.id(query) if query is not None else None
+        self.crawl_time = int(crawl_time if crawl_time is not None else time.time())
+        self.phones = array('q')
+        self.min_cost_fen = array('q')
+        self.deposit_fen = array('q')
+        # 金额原文的 id（TEXTS），没有原文时为 MISSING
+        self.min_cost_text = array('l')
+        self.deposit_text = array('l')
+
+    @property
+    def city(self):
+        return CITIES.value(self.city_id)
+
+    @property
+    def query(self):
+        return QUERIES.value(self.query_id) if self.query_id is not None else None
+
+    def append(self, phone, min_cost_fen=None, deposit_fen=None, min_cost=None, deposit=None):
+        """追加一个号码
+
+        Args:
+            min_cost_fen / deposit_fen: 解析后的金额（分）
+            min_cost / deposit: 页面上的金额原文（写入 JSON 结果文件时原样保留）
+        """
+        self.phones.append(int(phone))
+        self.min_cost_fen.append(MISSING if min_cost_fen is None else min_cost_fen)
+        self.deposit_fen.append(MISSING if deposit_fen is None else deposit_fen)
+        self.min_cost_text.append(MISSING if min_cost is None else TEXTS.id(min_cost))
+        self.deposit_text.append(MISSING if deposit is None else TEXTS.id(deposit))
+
+    def extend(self, phones):
+        """追加一组没有金额信息的号码"""
+        for phone in phones:
+            self.append(phone)
+
+    def __len__(self):
+        return len(self.phones)
+
+    def records(self):
+        """逐条产出 PhoneRecord（流式接口使用）"""
+        city = self.city
+        query = self.query
+        for phone, cost, deposit in zip(self.phones, self.min_cost_fen, self.deposit_fen):
+            yield PhoneRecord(city, query, str(phone), self.crawl_time,
+                              None if cost == MISSING else cost, None if deposit == MISSING else deposit)
+
+    def to_rows(self):
+        """转换为 phone_spider.export 使用的行记录"""
+        from datetime import datetime
+
+        city = self.city
+        crawl_time = datetime.fromtimestamp(self.crawl_time)
+        return [
+            {
+                'phone': phone,
+                'city': city,
+                'min_cost_fen': None if cost == MISSING else cost,
+                'deposit_fen': None if deposit == MISSING else deposit,
+                'crawl_time': crawl_time,
+            }
+            for phone, cost, deposit in zip(self.phones, self.min_cost_fen, self.deposit_fen)
+        ]
+
+    def to_dicts(self):
+        """转换为 JSON 结果文件中的记录（Scrapy 格式：min_cost/deposit 为原文，另加整数"分"的 *_fen 字段）"""
+        city = self.city
+        crawl_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.crawl_time))
+        text = TEXTS.value
+        return [
+            {
+                'phone': str(phone),
+                'min_cost': '' if cost_text == MISSING else text(cost_text),
+                'deposit': '' if deposit_text == MISSING else text(deposit_text),
+                'min_cost_fen': None if cost == MISSING else cost,
+                'deposit_fen': None if deposit == MISSING else deposit,
+                'city': city,
+                'crawl_time': crawl_time,
+            }
+            for phone, cost, deposit, cost_text, deposit_text in zip(
+                self.phones, self.min_cost_fen, self.deposit_fen, self.min_cost_text, self.deposit_text)
+        ]
+
+    def to_arrow(self):
+        """转换为与 phone_spider.export 数据集相同结构的 Arrow 表
+
+        号码列以及没有缺失值的金额列直接引用数组内存，不复制；
+        因此表还在使用时不能再向这一批追加号码（array 无法扩容，会抛出 BufferError）。
+        """
+        from phone_spider.export import _require_pyarrow
+        from datetime import datetime
+
+        pa = _require_pyarrow()
+        n = len(self.phones)
+        crawl_time = datetime.fromtimestamp(self.crawl_time)
+        zeros = pa.repeat(pa.scalar(0, pa.int32()), n)
+        return pa.table({
+            'phone': _int64_column(pa, self.phones),
+            'city': pa.DictionaryArray.from_arrays(zeros, pa.array([self.city], pa.string())),
+            'min_cost_fen': _fen_column(pa, self.min_cost_fen),
+            'deposit_fen': _fen_column(pa, self.deposit_fen),
+            'crawl_time': pa.repeat(pa.scalar(crawl_time, pa.timestamp('s')), n),
+            'date': pa.DictionaryArray.from_arrays(zeros, pa.array([crawl_time.strftime('%Y-%m-%d')], pa.string())),
+        })
+
+
+def _int64_column(pa, values):
+    return pa.Array.from_buffers(pa.int64(), len(values), [None, pa.py_buffer(values)])
+
+
+def _fen_column(pa, values):
+    """金额列：全部缺失时为 null 列，没有缺失时零拷贝，否则带空值掩码"""
+    missing = values.count(MISSING)
+    if missing == len(values):
+        return pa.nulls(len(values), pa.int64())
+    if missing == 0:
+        return _int64_column(pa, values)
+    return pa.array(values, type=pa.int64(), mask=[v == MISSING for v in values])
+
+
+def batches_to_table(batches):
+    """把多批记录合并成一个 Arrow 表（各批的列按块拼接，不复制数据）"""
+    from phone_spider.export import _require_pyarrow
+
+    pa = _require_pyarrow()
+    tables = [batch.to_arrow() for batch in batches if len(batch)]
+    if not tables:
+        return None
+    return pa.concat_tables(tables).unify_dictionaries()
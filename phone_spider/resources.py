@@ -0,0 +1,157 @@
+"""
+浏览器资源监控
+通过 CDP 采样浏览器/渲染进程的常驻内存（RSS）和每个页面的 JS 堆，
+超过预算时由爬虫在两次查询之间回收（重建）浏览器上下文。
+"""
+
+import os
+
+
+MB = 1024 * 1024
+
+
+def _read_rss(pid):
+    """读取进程常驻内存（字节），非 Linux 或进程已退出时返回 None"""
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RunningStats:
+    """采样值的峰值和平均值（只保存计数、总和和最大值，长时间运行也不增长）"""
+
+    __slots__ = ('count', 'total', 'peak')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.peak = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.peak is None or value > self.peak:
+            self.peak = value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class MemoryMonitor:
+    """内存预算监控
+
+    Args:
+        rss_budget_mb: 浏览器全部进程 RSS 之和的预算（MB），None 表示不限制
+        heap_budget_mb: 单个页面 JS 堆的预算（MB），None 表示不限制
+    """
+
+    def __init__(self, rss_budget_mb=None, heap_budget_mb=None):
+        self.rss_budget = rss_budget_mb * MB if rss_budget_mb else None
+        self.heap_budget = heap_budget_mb * MB if heap_budget_mb else None
+        self.recycles = 0
+        self._browser_sessions = {}
+        self._page_sessions = {}
+        self._rss = RunningStats()
+        self._heap = RunningStats()
+        self.last = {'rss': None, 'heap': None}  # 最近一次采样
+
+    async def _browser_session(self, browser):
+        if browser not in self._browser_sessions:
+            try:
+                self._browser_sessions[browser] = await browser.new_browser_cdp_session()
+            except Exception:
+                # 非 Chromium 内核不支持 CDP
+                self._browser_sessions[browser] = None
+        return self._browser_sessions[browser]
+
+    async def _page_session(self, page):
+        if page not in self._page_sessions:
+            try:
+                self._page_sessions[page] = await page.context.new_cdp_session(page)
+            except Exception:
+                self._page_sessions[page] = None
+        return self._page_sessions[page]
+
+    async def browser_rss(self, browser):
+        """浏览器所有进程（browser/renderer/gpu/utility）的 RSS 之和"""
+        session = await self._browser_session(browser)
+        if session is None:
+            return None
+        try:
+            info = await session.send('SystemInfo.getProcessInfo')
+        except Exception:
+            return None
+        total = 0
+        for process in info.get('processInfo', []):
+            rss = _read_rss(process.get('id'))
+            if rss:
+                total += rss
+        return total or None
+
+    async def page_heap(self, page):
+        """页面 JS 堆已用大小（字节）"""
+        session = await self._page_session(page)
+        if session is None:
+            return None
+        try:
+            usage = await session.send('Runtime.getHeapUsage')
+        except Exception:
+            return None
+        return usage.get('usedSize')
+
+    async def sample(self, page):
+        """采样一次，返回 {'rss': 字节, 'heap': 字节}（无法获取的项为 None）"""
+        rss = await self.browser_rss(page.context.browser)
+        heap = await self.page_heap(page)
+        if rss is not None:
+            self._rss.add(rss)
+        if heap is not None:
+            self._heap.add(heap)
+        self.last = {'rss': rss, 'heap': heap}
+        return self.last
+
+    async def should_recycle(self, page):
+        """采样并判断是否超出预算（在两次查询之间调用）"""
+        sample = await self.sample(page)
+        if self.rss_budget and sample['rss'] and sample['rss'] > self.rss_budget:
+            return True
+        if self.heap_budget and sample['heap'] and sample['heap'] > self.heap_budget:
+            return True
+        return False
+
+    def forget(self, page):
+        """丢弃页面的 CDP 会话（关闭上下文之前调用，否则页面和会话一直被引用）"""
+        self._page_sessions.pop(page, None)
+
+    def summary(self):
+        """峰值/平均内存（MB）"""
+        def stats(values):
+            if not values.count:
+                return None, None
+            return values.peak / MB, values.mean / MB
+
+        rss_peak, rss_avg = stats(self._rss)
+        heap_peak, heap_avg = stats(self._heap)
+        return {
+            'rss_peak_mb': rss_peak,
+            'rss_avg_mb': rss_avg,
+            'heap_peak_mb': heap_peak,
+            'heap_avg_mb': heap_avg,
+            'recycles': self.recycles,
+        }
+
+    def format_summary(self):
+        s = self.summary()
+        if s['rss_peak_mb'] is None and s['heap_peak_mb'] is None:
+            return '内存: 无采样数据'
+        parts = []
+        if s['rss_peak_mb'] is not None:
+            parts.append(f'浏览器RSS 峰值 {s["rss_peak_mb"]:.0f}MB / 平均 {s["rss_avg_mb"]:.0f}MB')
+        if s['heap_peak_mb'] is not None:
+            parts.append(f'JS堆 峰值 {s["heap_peak_mb"]:.0f}MB / 平均 {s["heap_avg_mb"]:.0f}MB')
+        parts.append(f'上下文回收 {s["recycles"]} 次')
+        return '内存: ' + '，'.join(parts)
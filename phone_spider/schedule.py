@@ -0,0 +1,224 @@
+"""
+按变化速度安排重新爬取
+
+号码库存的 runs 表记录了每个 (城市, 查询) 每次运行的耗时和与上一次相比新增/下架的号码数。
+由此估计每个查询的新号码出现速度 a（个/小时）和下架速度 d，新号码的平均在架时间 L = 当前号码数 / d。
+
+每隔 I 小时爬一次时，新号码在下架之前被发现的概率是 (L/I)·(1 - e^(-I/L))，
+所以每小时能发现的新号码数为 a·(L/I)·(1 - e^(-I/L))，每小时占用的浏览器时间为 耗时/I。
+在浏览器时间预算内，从每个查询都用最长间隔开始，反复把"每多花一秒浏览器时间多发现号码最多"的
+查询缩短一档间隔，直到预算用完。变化快的城市（如深圳、广州）因此刷新得勤，变化慢的城市少占用资源。
+
+历史很少时用城市整体的速度作为先验（新查询沿用所在城市的速度），城市也没有历史时用全局先验。
+
+使用方法:
+    python -m phone_spider schedule --budget 2          # 每天 2 浏览器小时，打印计划
+    python -m phone_spider schedule --budget 2 --run    # 爬取当前到期的查询
+"""
+
+import math
+import time
+
+
+# 可选的重新爬取间隔（小时）
+INTERVALS = (1, 2, 4, 8, 12, 24, 48, 96, 168)
+# 先验：每个查询每天 1 个新增/下架，权重相当于 24 小时的观察
+PRIOR_CHANGES = 1.0
+PRIOR_HOURS = 24.0
+# 没有历史时假设的单次查询耗时（秒）和号码数
+DEFAULT_COST = 30.0
+DEFAULT_LIVE = 10
+
+
+class UnitEstimate:
+    """一个 (城市, 查询) 的估计
+
+    Args:
+        city: 城市
+        query: 查询
+        arrival: 新号码出现速度（个/小时）
+        departure: 号码下架速度（个/小时）
+        live: 最近一次的号码数
+        cost: 单次运行耗时（浏览器秒）
+        last_run: 最近一次运行时间（Unix 秒），没运行过为 None
+    """
+
+    def __init__(self, city, query, arrival, departure, live, cost, last_run=None):
+        self.city = city
+        self.query = query
+        self.arrival = arrival
+        self.departure = departure
+        self.live = live
+        self.cost = cost
+        self.last_run = last_run
+        self.interval = INTERVALS[-1]
+
+    @property
+    def lifetime(self):
+        """新号码平均在架时间（小时）"""
+        return max(self.live, 1) / self.departure
+
+    def discoveries(self, interval):
+        """按 interval 小时的间隔爬取时，每小时能在下架前发现的新号码数"""
+        ratio = interval / self.lifetime
+        return self.arrival * (1 - math.exp(-ratio)) / ratio
+
+    def usage(self, interval):
+        """每小时占用的浏览器秒数"""
+        return self.cost / interval
+
+    @property
+    def change_rate(self):
+        return self.arrival + self.departure
+
+    def hours_since(self, now):
+        return None if self.last_run is None else (now - self.last_run) / 3600
+
+    def due(self, now):
+        hours = self.hours_since(now)
+        return hours is None or hours >= self.interval
+
+
+def estimate(history, cities, queries):
+    """由运行历史估计每个 (城市, 查询) 的变化速度和耗时
+
+    Args:
+        history: PhoneStore.run_history() 的结果
+        cities: 要安排的城市
+        queries: 要安排的查询
+
+    Returns:
+        [UnitEstimate]
+    """
+    rows = {(row[0], row[1]): row for row in history}
+
+    # 全局和城市的每查询平均速度（作为先验）
+    def pooled(selected):
+        added = sum(r[3] for r in selected)
+        removed = sum(r[4] for r in selected)
+        hours = sum(r[5] for r in selected) / 3600
+        return ((added + PRIOR_CHANGES) / (hours + PRIOR_HOURS),
+                (removed + PRIOR_CHANGES) / (hours + PRIOR_HOURS))
+
+    def median(values, default):
+        values = sorted(v for v in values if v)
+        return values[len(values) // 2] if values else default
+
+    known = [row for row in history if row[5]]
+    global_rates = pooled(known)
+    default_cost = median((row[6] for row in history), DEFAULT_COST)
+    default_live = median((row[8] for row in history), DEFAULT_LIVE)
+
+    units = []
+    for city in cities:
+        city_rows = [row for row in known if row[0] == city]
+        city_rates = pooled(city_rows) if city_rows else global_rates
+        city_live = median((row[8] for row in history if row[0] == city), default_live)
+        for query in queries:
+            row = rows.get((city, query))
+            if row is None:
+                units.append(UnitEstimate(city, query, city_rates[0], city_rates[1], city_live, default_cost))
+                continue
+            _, _, runs, added, removed, seconds, cost, last_run, live = row
+            hours = seconds / 3600
+            # 以城市速度为先验，观察越多越接近该查询自己的速度
+            arrival = (added + city_rates[0] * PRIOR_HOURS) / (hours + PRIOR_HOURS)
+            departure = (removed + city_rates[1] * PRIOR_HOURS) / (hours + PRIOR_HOURS)
+            units.append(UnitEstimate(city, query, arrival, departure, live or 1,
+                                      cost or default_cost, last_run))
+    return units
+
+
+def allocate(units, budget_hours_per_day):
+    """在预算内分配重新爬取间隔（贪心：每次缩短边际收益最高的一档）
+
+    Args:
+        units: [UnitEstimate]，interval 被就地修改
+        budget_hours_per_day: 每天可用的浏览器小时数
+
+    Returns:
+        每小时实际占用的浏览器秒数
+    """
+    budget = budget_hours_per_day * 3600 / 24  # 每小时可用的浏览器秒数
+    for unit in units:
+        unit.interval = INTERVALS[-1]
+    used = sum(unit.usage(unit.interval) for unit in units)
+    while True:
+        best = None
+        for unit in units:
+            index = INTERVALS.index(unit.interval)
+            if index == 0:
+                continue
+            shorter = INTERVALS[index - 1]
+            extra = unit.usage(shorter) - unit.usage(unit.interval)
+            if used + extra > budget:
+                continue
+            gain = (unit.discoveries(shorter) - unit.discoveries(unit.interval)) / extra
+            if best is None or gain > best[0]:
+                best = (gain, unit, shorter, extra)
+        if best is None:
+            return used
+        _, unit, shorter, extra = best
+        unit.interval = shorter
+        used += extra
+
+
+class RecrawlPlan:
+    """重新爬取计划
+
+    Args:
+        units: 已分配间隔的 [UnitEstimate]
+        budget: 每天的浏览器小时预算
+        used: 每小时实际占用的浏览器秒数
+    """
+
+    def __init__(self, units, budget, used):
+        self.units = units
+        self.budget = budget
+        self.used = used
+
+    @classmethod
+    def build(cls, store, cities, queries, budget_hours_per_day):
+        units = estimate(store.run_history(), cities, queries)
+        used = allocate(units, budget_hours_per_day)
+        return cls(units, budget_hours_per_day, used)
+
+    def due(self, now=None):
+        """当前到期的查询：{城市: [查询]}，按城市的变化速度从快到慢"""
+        now = now if now is not None else time.time()
+        result = {}
+        for unit in sorted(self.units, key=lambda u: -u.change_rate):
+            if unit.due(now):
+                result.setdefault(unit.city, []).append(unit.query)
+        return result
+
+    def staleness(self, now=None):
+        """每个城市的陈旧程度
+
+        Returns:
+            {城市: (变化速度 个/小时, 当前估计未观察到的变化数, 按计划平均未观察到的变化数, 平均间隔小时)}
+        """
+        now = now if now is not None else time.time()
+        result = {}
+        for unit in self.units:
+            rate, pending, planned, interval, count = result.get(unit.city, (0.0, 0.0, 0.0, 0.0, 0))
+            hours = unit.hours_since(now)
+            if hours is None:
+                hours = unit.interval
+            result[unit.city] = (rate + unit.change_rate, pending + unit.change_rate * hours,
+                                 planned + unit.change_rate * unit.interval / 2,
+                                 interval + unit.interval, count + 1)
+        return {city: (rate, pending, planned, interval / count)
+                for city, (rate, pending, planned, interval, count) in result.items()}
+
+    def format_report(self, now=None):
+        now = now if now is not None else time.time()
+        lines = [f'浏览器时间预算 {self.budget:g} 小时/天，计划占用 {self.used * 24 / 3600:.2f} 小时/天，'
+                 f'预计每天发现 {sum(u.discoveries(u.interval) for u in self.units) * 24:.0f} 个新号码']
+        lines.append(f'{"城市":<6}{"变化/小时":>10}{"当前未观察":>10}{"计划平均":>10}{"平均间隔":>10}  到期')
+        due = self.due(now)
+        stale = self.staleness(now)
+        for city, (rate, pending, planned, interval) in sorted(stale.items(), key=lambda item: -item[1][0]):
+            lines.append(f'{city:<6}{rate:>10.2f}{pending:>10.1f}{planned:>10.1f}{interval:>9.0f}h  '
+                         f'{len(due.get(city, []))} 个查询')
+        return '\n'.join(lines)
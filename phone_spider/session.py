@@ -0,0 +1,127 @@
+"""
+按网站 + 城市缓存浏览器存储状态
+
+第一次在地区选择弹窗中选好城市后，把 cookies + localStorage（Playwright storage state）
+以及 sessionStorage 保存到磁盘；之后新建的上下文直接注入这些状态，页面打开就是该城市的搜索页。
+不同网站可能有同名城市，快照按 (网站名, 城市) 区分，文件名为 <网站名>-<城市>.json。
+快照过期或网站仍然弹出地区选择时，自动退回弹窗流程并重新保存快照。
+"""
+
+import json
+import os
+import re
+import time
+
+
+# 注入 sessionStorage（只写入页面上还没有的键，只对保存时的 origin 生效）
+SESSION_INIT_JS = '''
+(() => {
+  const origin = %s;
+  const items = %s;
+  if (location.origin !== origin) {
+    return;
+  }
+  for (const [key, value] of Object.entries(items)) {
+    if (sessionStorage.getItem(key) === null) {
+      sessionStorage.setItem(key, value);
+    }
+  }
+})();
+'''
+
+
+class StorageStateCache:
+    """(网站名, 城市) -> 存储状态快照
+
+    Args:
+        directory: 快照保存目录（默认：.state）
+        max_age: 快照有效期（秒），超过后视为过期
+    """
+
+    def __init__(self, directory='.state', max_age=24 * 3600):
+        self.directory = directory
+        self.max_age = max_age
+        self.restored = 0  # 使用快照直接进入搜索页的次数
+        self.stale = 0     # 快照失效、退回弹窗流程的次数
+        self.captured = 0  # 保存快照的次数
+
+    def path(self, site, city):
+        safe = re.sub(r'[\\/:*?"<>|\s]', '_', f'{site}-{city}')
+        return os.path.join(self.directory, f'{safe}.json')
+
+    def load(self, site, city):
+        """读取未过期的快照，没有、已过期或不属于该网站/城市时返回 None"""
+        path = self.path(site, city)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (snapshot.get('site'), snapshot.get('city')) != (site, city):
+            return None
+        if time.time() - snapshot.get('saved_at', 0) > self.max_age:
+            return None
+        return snapshot
+
+    def invalidate(self, site, city):
+        try:
+            os.remove(self.path(site, city))
+        except OSError:
+            pass
+
+    async def new_context(self, browser, site, city, **kwargs):
+        """新建上下文；有快照时注入 cookies/localStorage/sessionStorage
+
+        Returns:
+            (context, 是否使用了快照)
+        """
+        snapshot = self.load(site, city) if city else None
+        if snapshot is None:
+            return await browser.new_context(**kwargs), False
+        context = await browser.new_context(storage_state=snapshot['storage'], **kwargs)
+        for origin, items in snapshot.get('session', {}).items():
+            await context.add_init_script(
+                script=SESSION_INIT_JS % (json.dumps(origin), json.dumps(items, ensure_ascii=False))
+            )
+        return context, True
+
+    async def capture(self, page, site, city):
+        """在城市选择完成后保存快照（先写临时文件再替换，避免写坏）"""
+        storage = await page.context.storage_state()
+        origin = await page.evaluate('() => location.origin')
+        session = await page.evaluate('() => Object.assign({}, sessionStorage)')
+        snapshot = {
+            'site': site,
+            'city': city,
+            'saved_at': time.time(),
+            'storage': storage,
+            'session': {origin: session},
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(site, city)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self.captured += 1
+
+    async def wait_ready(self, page, placeholder, popup_text, timeout=10000):
+        """等待注入了快照的页面进入搜索页或弹出地区选择（只应在 new_context 确实使用了快照时调用）
+
+        Returns:
+            True 表示已直接进入搜索页，False 表示出现了地区选择弹窗或超时都没有出现（快照失效，走弹窗流程）
+        """
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        search_box = page.get_by_placeholder(placeholder)
+        popup = page.get_by_text(popup_text)
+        try:
+            await search_box.or_(popup).first.wait_for(state='visible', timeout=timeout)
+        except PlaywrightTimeoutError:
+            return False
+        if await popup.count() > 0 and await popup.first.is_visible():
+            return False
+        return True
+
+    def format_stats(self):
+        return f'会话快照: 直接进入 {self.restored} 次，失效 {self.stale} 次，保存 {self.captured} 次'
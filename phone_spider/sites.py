@@ -0,0 +1,188 @@
+"""
+站点配置
+
+一个选号网站 = 入口地址 + 城市列表 + 选择器/文字 + 查询语法 + 就绪信号 + 并发上限。
+内置 gd189（广东电信选号吧）和 mock（本地模拟网站，页面结构相同）；新的省份网站写一个 JSON 文件即可：
+
+    {
+      "name": "js189",
+      "url": "https://.../index.html#/",
+      "cities": ["南京", "苏州"],
+      "search_placeholder": "请输入尾号",
+      "concurrency": 2
+    }
+
+没有写的字段沿用 gd189 的值。配置在第一次使用时加载并预编译（选择器字符串、号码正则），之后按名称或路径复用。
+
+同时爬取多个网站（每个网站按自己的并发上限运行）:
+    python -m phone_spider portals gd189 sites/js189.json --cities 深圳 南京
+"""
+
+import asyncio
+import json
+import os
+import re
+
+
+GD189 = {
+    'name': 'gd189',
+    'url': 'https://gd.189.cn/TS/tysj/xhb/index.html#/',
+    'cities': ['广州', '深圳', '佛山', '中山', '江门', '珠海', '东莞', '惠州', '汕头', '揭阳', '潮州',
+               '汕尾', '湛江', '茂名', '阳江', '云浮', '肇庆', '梅州', '清远', '河源', '韶关'],
+    # 地区选择弹窗
+    'city_popup_text': '请确认号码归属地',
+    'city_confirm_text': '确认,去选号',
+    'city_change_text': '更换',
+    # 搜索（就绪信号：搜索框出现即可搜索，弹窗出现则需要选择城市）
+    'search_placeholder': '输入任意1-4位尾号搜索',
+    'search_button_text': '搜索',
+    'search_methods': ['searchNum', 'search', 'onSearch', 'handleSearch', 'doSearch', 'querySearch'],
+    # 结果
+    'result_item': 'ul > li',
+    'result_phone': 'p:first-child',
+    'result_min_cost': 'p:nth-child(2)',
+    'result_deposit': 'p:nth-child(3)',
+    'more_button': 'div.moreNum',
+    'no_result_text': '查不到号码信息',
+    'recommend_text': '为您推荐',
+    # 接口响应提取（--extract xhr）：接口 URL 片段（None 表示自动识别）和 JSON 字段名（依次尝试）
+    'xhr_search': None,
+    'xhr_recommend': None,
+    'xhr_phone_fields': ['phoneNum', 'phone', 'number', 'num'],
+    'xhr_min_cost_fields': ['minCost', 'minConsume', 'lowCost', 'min_cost'],
+    'xhr_deposit_fields': ['prestore', 'preStore', 'deposit', 'prepay'],
+    'xhr_more_fields': ['hasMore', 'more', 'hasNext'],
+    # 查询语法：最多 max_tail_digits 位尾号，不足时末尾加 wildcard；号码后 match_digits 位包含尾号即匹配
+    'max_tail_digits': 4,
+    'wildcard': '*',
+    'match_digits': 7,
+    # 同时运行的爬虫数上限（多网站爬取时每个网站分别计算）
+    'concurrency': 2,
+}
+
+SITES = {
+    'gd189': GD189,
+    # 本地模拟网站（python -m phone_spider.mocksite 默认端口），页面结构与 gd189 相同
+    'mock': dict(GD189, name='mock', url='http://127.0.0.1:8800/index.html#/', concurrency=4,
+                 xhr_search='/api/search', xhr_recommend='/api/recommend'),
+}
+
+DEFAULT_SITE = 'gd189'
+
+PHONE_RE = re.compile(r'1\d{10}')
+
+_loaded = {}
+
+
+class SiteProfile:
+    """站点配置（预编译后的只读对象）
+
+    Args:
+        options: 配置字典（缺少的字段沿用 gd189）
+    """
+
+    def __init__(self, options):
+        unknown = set(options) - set(GD189)
+        if unknown:
+            raise ValueError(f'未知的站点配置字段: {", ".join(sorted(unknown))}')
+        merged = dict(GD189, **options)
+        for key, value in merged.items():
+            setattr(self, key, value)
+        self.cities = list(merged['cities'])
+        self.search_methods = list(merged['search_methods'])
+        # 预编译
+        self.city_popup = f'text={self.city_popup_text}'
+        self.city_change = f'text={self.city_change_text}'
+        self.no_result = f'text={self.no_result_text}'
+        self.recommend = f'text={self.recommend_text}'
+
+    @classmethod
+    def resolve(cls, spec=None):
+        """按名称（内置）或 JSON 文件路径加载配置，同一个配置只加载一次
+
+        Raises:
+            ValueError: 未知的站点或配置字段
+        """
+        if isinstance(spec, cls):
+            return spec
+        spec = spec or DEFAULT_SITE
+        if spec not in _loaded:
+            if spec in SITES:
+                options = SITES[spec]
+            elif spec.endswith('.json') and os.path.exists(spec):
+                with open(spec, 'r', encoding='utf-8') as f:
+                    options = json.load(f)
+                options.setdefault('name', os.path.splitext(os.path.basename(spec))[0])
+            else:
+                raise ValueError(f'未知的站点: {spec}（可选: {", ".join(SITES)}，或站点配置 JSON 文件）')
+            _loaded[spec] = cls(options)
+        return _loaded[spec]
+
+    def make_query(self, tail):
+        """尾号 -> 搜索框输入，如 "000" -> "000*"，"1234" -> "1234" """
+        tail = str(tail)
+        return tail if len(tail) >= self.max_tail_digits else f'{tail}{self.wildcard}'
+
+    def query_tail(self, query):
+        """搜索框输入 -> 要匹配的尾号，如 "000*" -> "000" """
+        return str(query).strip().rstrip(self.wildcard)
+
+    def repeat_queries(self):
+        """默认的 10 个查询：000* 到 999*"""
+        return [self.make_query(f'{i}{i}{i}') for i in range(10)]
+
+    def tail_queries(self, digits):
+        """枚举所有 N 位尾号"""
+        if not 1 <= digits <= self.max_tail_digits:
+            raise ValueError(f'尾号位数必须在 1-{self.max_tail_digits} 之间')
+        return [self.make_query(f'{k:0{digits}d}') for k in range(10 ** digits)]
+
+    def matches(self, phone, tail):
+        """号码是否匹配尾号（后 match_digits 位包含尾号）"""
+        return len(phone) >= 11 and tail in phone[-self.match_digits:]
+
+    def find_phone(self, text):
+        """从文本中提取第一个11位手机号，没有时返回 None"""
+        match = PHONE_RE.search(text)
+        return match.group() if match else None
+
+    def driver_options(self):
+        """SearchDriver 的站点相关参数"""
+        return {
+            'placeholder': self.search_placeholder,
+            'button_text': self.search_button_text,
+            'methods': self.search_methods,
+        }
+
+    def __repr__(self):
+        return f'SiteProfile({self.name!r})'
+
+
+async def crawl_sites(sites, factory, cities=None):
+    """同时爬取多个网站，每个网站最多同时运行 concurrency 个城市
+
+    Args:
+        sites: 站点配置（名称、路径或 SiteProfile）
+        factory: 接受 (SiteProfile, 城市) 返回爬虫（有 run() 协程）的函数
+        cities: 只爬这些城市（每个网站取与自己城市列表的交集），None 表示全部城市
+
+    Returns:
+        [(站点名, 城市, 爬虫)]
+    """
+    results = []
+
+    async def crawl_site(site):
+        semaphore = asyncio.Semaphore(site.concurrency)
+        selected = [c for c in site.cities if cities is None or c in cities]
+
+        async def crawl_city(city):
+            async with semaphore:
+                crawler = factory(site, city)
+                print(f'🌐 [{site.name}] 开始爬取 {city}')
+                await crawler.run()
+                results.append((site.name, city, crawler))
+
+        await asyncio.gather(*(crawl_city(city) for city in selected))
+
+    await asyncio.gather(*(crawl_site(SiteProfile.resolve(site)) for site in sites))
+    return results
@@ -4,6 +4,11 @@ import json
 import asyncio
 from datetime import datetime
 
+from phone_spider.export import parse_amount_fen
+from phone_spider.profiling import track
+from phone_spider.records import RecordBatch
+from phone_spider.sites import SiteProfile
+
 
 class TelecomSpider(scrapy.Spider):
     name = 'telecom'
@@ -18,11 +23,12 @@ class TelecomSpider(scrapy.Spider):
         'DOWNLOAD_DELAY': 2,  # 添加延迟
     }
     
-    def __init__(self, city='深圳', *args, **kwargs):
+    def __init__(self, city='深圳', site=None, *args, **kwargs):
         super(TelecomSpider, self).__init__(*args, **kwargs)
         self.city = city
-        self.start_urls = ['https://gd.189.cn/TS/tysj/xhb/index.html#/']
-        self.phone_numbers = []
+        self.site = SiteProfile.resolve(site)  # scrapy crawl telecom -a site=mock
+        self.start_urls = [self.site.url]
+        self.batches = []  # 每次提取一批（RecordBatch）
         
     def start_requests(self):
         for url in self.start_urls:
@@ -44,7 +50,7 @@ class TelecomSpider(scrapy.Spider):
         
         try:
             # 等待地区选择弹窗出现
-            await page.wait_for_selector('text=请确认号码归属地', timeout=10000)
+            await page.wait_for_selector(self.site.city_popup, timeout=10000)
             self.logger.info(f'地区选择弹窗已出现')
             
             # 点击目标城市
@@ -52,28 +58,28 @@ class TelecomSpider(scrapy.Spider):
             self.logger.info(f'已选择城市: {self.city}')
             
             # 点击确认按钮
-            await page.get_by_text('确认,去选号').click()
+            await page.get_by_text(self.site.city_confirm_text).click()
             await page.wait_for_load_state('networkidle')
             self.logger.info('已确认城市选择')
             
             # 搜索所有号码模式 000* 到 999*
-            for i in range(10):
-                pattern = f'{i}{i}{i}*'
-                self.logger.info(f'开始搜索模式: {pattern}')
+            for pattern in self.site.repeat_queries():
+                with track(self.city, pattern):
+                    self.logger.info(f'开始搜索模式: {pattern}')
                 
-                # 清空搜索框并输入新模式
-                search_box = page.get_by_placeholder('输入任意1-4位尾号搜索')
-                await search_box.clear()
-                await search_box.fill(pattern)
+                    # 清空搜索框并输入新模式
+                    search_box = page.get_by_placeholder(self.site.search_placeholder)
+                    await search_box.clear()
+                    await search_box.fill(pattern)
                 
-                # 点击搜索按钮
-                await page.get_by_text('搜索').click()
-                await asyncio.sleep(3)  # 等待搜索结果加载
+                    # 点击搜索按钮
+                    await page.get_by_text(self.site.search_button_text).click()
+                    await asyncio.sleep(3)  # 等待搜索结果加载
                 
-                # 提取号码
-                phones = await self._extract_phones(page)
-                self.logger.info(f'模式 {pattern} 找到 {len(phones)} 个号码')
-                self.phone_numbers.extend(phones)
+                    # 提取号码
+                    batch = await self._extract_phones(page, RecordBatch(self.city, pattern))
+                    self.logger.info(f'模式 {pattern} 找到 {len(batch)} 个号码')
+                    self.batches.append(batch)
                 
             # 保存结果
             self._save_results()
@@ -83,63 +89,56 @@ class TelecomSpider(scrapy.Spider):
         finally:
             await page.close()
     
-    async def _extract_phones(self, page):
-        """提取页面上的所有手机号码"""
-        phones = []
+    async def _extract_phones(self, page, batch):
+        """提取页面上的所有手机号码，追加到 batch（整批共用一个时间戳和城市 id）"""
         try:
             # 等待号码列表加载
-            await page.wait_for_selector('ul > li', timeout=5000)
+            await page.wait_for_selector(self.site.result_item, timeout=5000)
             
             # 获取所有号码项
-            phone_items = await page.query_selector_all('ul > li')
+            phone_items = await page.query_selector_all(self.site.result_item)
             
             for item in phone_items:
                 try:
                     # 提取号码
-                    phone_text = await item.query_selector('p:first-child')
+                    phone_text = await item.query_selector(self.site.result_phone)
                     if phone_text:
                         phone = await phone_text.inner_text()
                         phone = phone.strip('"')
                         
                         # 提取最低消费
-                        min_cost_elem = await item.query_selector('p:nth-child(2)')
+                        min_cost_elem = await item.query_selector(self.site.result_min_cost)
                         min_cost = await min_cost_elem.inner_text() if min_cost_elem else ''
                         
                         # 提取预存话费
-                        deposit_elem = await item.query_selector('p:nth-child(3)')
+                        deposit_elem = await item.query_selector(self.site.result_deposit)
                         deposit = await deposit_elem.inner_text() if deposit_elem else ''
                         
-                        phones.append({
-                            'phone': phone,
-                            'min_cost': min_cost,
-                            'deposit': deposit,
-                            'city': self.city,
-                            'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        })
+                        batch.append(phone, parse_amount_fen(min_cost), parse_amount_fen(deposit), min_cost, deposit)
                 except Exception as e:
                     self.logger.error(f'提取单个号码信息时出错: {e}')
                     continue
                     
             # 检查是否有"更多号码"按钮，如果有则点击加载更多
-            more_button = await page.query_selector('text=更多号码')
+            more_button = await page.query_selector(self.site.more_button)
             if more_button:
                 await more_button.click()
                 await asyncio.sleep(2)
                 # 递归提取新加载的号码
-                new_phones = await self._extract_phones(page)
-                phones.extend(new_phones)
+                await self._extract_phones(page, batch)
                 
         except Exception as e:
             self.logger.warning(f'提取号码时出错: {e}')
         
-        return phones
+        return batch
     
     def _save_results(self):
         """保存结果到JSON文件"""
         filename = f'phones_{self.city}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+        records = [record for batch in self.batches for record in batch.to_dicts()]
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.phone_numbers, f, ensure_ascii=False, indent=2)
-        self.logger.info(f'保存了 {len(self.phone_numbers)} 个号码到 {filename}')
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        self.logger.info(f'保存了 {len(records)} 个号码到 {filename}')
     
     async def errback_close_page(self, failure):
         page = failure.request.meta.get('playwright_page')
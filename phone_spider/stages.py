@@ -0,0 +1,262 @@
+"""
+分阶段爬取管道
+
+一个查询的处理分成四个阶段，阶段之间用有界 asyncio 队列连接：
+
+    browse（浏览器工作者）→ parse（解析/匹配）→ enrich（汇总/统计）→ persist（写库存）
+
+浏览器工作者只负责搜索、翻页并一次取回页面上的原始文本，然后交给下一个阶段继续搜索下一个查询；
+解析（CPU）和写数据库（阻塞 I/O）在工作线程中进行，不占用事件循环，统计在事件循环上的任务中进行。下游处理不过来时队列满，上游在 put 时等待（背压）。
+每个阶段的工作者数量可以单独设置，结束时报告各阶段处理的条数、忙碌时间、等待下游的时间和队列的最大深度。
+
+使用方法:
+    python -m phone_spider crawl --city 深圳 --pipeline browse=3,parse=2 --harvest
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+import time
+
+from phone_spider import logs
+from phone_spider.profiling import track
+
+
+# 各阶段默认的工作者数量（persist 写同一个 SQLite 连接，只能有一个工作者）
+DEFAULT_WORKERS = {'browse': 2, 'parse': 1, 'enrich': 1, 'persist': 1}
+# 阶段之间的队列长度
+DEFAULT_QUEUE_SIZE = 32
+
+_DONE = object()
+
+
+def parse_workers(spec=None):
+    """解析工作者数量设置，如 "browse=3,parse=2"，没写的阶段使用默认值
+
+    Raises:
+        ValueError: 未知的阶段或数量不合法
+    """
+    workers = dict(DEFAULT_WORKERS)
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, value = part.partition('=')
+        name = name.strip()
+        if name not in workers:
+            raise ValueError(f'未知的阶段: {name}（可选: {", ".join(DEFAULT_WORKERS)}）')
+        try:
+            count = int(value)
+        except ValueError:
+            raise ValueError(f'阶段 {name} 的工作者数量不是整数: {value!r}')
+        if count < 1:
+            raise ValueError(f'阶段 {name} 至少需要 1 个工作者')
+        workers[name] = count
+    if workers['persist'] != 1:
+        raise ValueError('persist 阶段只能有 1 个工作者')
+    return workers
+
+
+class QueryResult:
+    """在各阶段之间传递的一个查询的结果
+
+    Args:
+        city: 城市
+        query: 查询，如 "000*"
+        started_at: 查询开始时间（Unix 秒）
+        items: 搜索结果区域每一项的号码文本（页面原始文本）
+        paragraphs: 出现"为您推荐"时页面上所有 p 标签的文本，否则为空
+        truncated: 翻页是否没翻完
+        prices: 接口响应提取时的金额 {号码: (最低消费分, 预存话费分)}，否则为空
+    """
+
+    __slots__ = ('city', 'query', 'started_at', 'finished_at', 'items', 'paragraphs', 'truncated',
+                 'prices', 'phones', 'observed')
+
+    def __init__(self, city, query, started_at, items, paragraphs, truncated=False, prices=None):
+        self.city = city
+        self.query = query
+        self.started_at = started_at
+        self.finished_at = time.time()
+        self.items = items
+        self.paragraphs = paragraphs
+        self.truncated = truncated
+        self.prices = prices or {}
+        self.phones = []  # parse 阶段填写：匹配的号码
+        self.observed = {}  # parse 阶段填写：{来源: 看到的所有号码}
+
+
+class Stage:
+    """管道中的一个阶段
+
+    Args:
+        name: 阶段名称
+        handler: 处理函数，接收一个条目，返回交给下一个阶段的条目（None 表示不再往下传）；
+                 可以是协程函数
+        workers: 工作者数量
+        maxsize: 输入队列长度
+        thread: 是否在工作线程中运行（用于解析等 CPU 操作和写文件/数据库等阻塞操作，handler 须为普通函数）
+    """
+
+    def __init__(self, name, handler, workers=1, maxsize=DEFAULT_QUEUE_SIZE, thread=False):
+        if thread and inspect.iscoroutinefunction(handler):
+            raise ValueError(f'阶段 {name}: 在线程中运行的处理函数不能是协程函数')
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.maxsize = maxsize
+        self.thread = thread
+        self.log = logs.get_logger(name)  # 阶段日志（stage 字段即阶段名称）
+        self.queue = None
+        self.next = None
+        self.metrics = None
+        self._tasks = []
+        self._executor = None
+        # 统计
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0.0  # 处理耗时之和（秒）
+        self.blocked = 0.0  # 等待下游队列空位的时间之和（秒）
+        self.max_depth = 0
+
+    def start(self):
+        self.queue = asyncio.Queue(self.maxsize)
+        if self.thread:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix=f'stage-{self.name}')
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def put(self, item):
+        """放入一个条目，队列满时等待，返回等待的秒数"""
+        start = time.perf_counter()
+        await self.queue.put(item)
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.metrics:
+            self.metrics.queue_depth.set(depth, self.name)
+        return time.perf_counter() - start
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self.queue.get()
+            if self.metrics:
+                self.metrics.queue_depth.set(self.queue.qsize(), self.name)
+            if item is _DONE:
+                return
+            start = time.perf_counter()
+            try:
+                with track(getattr(item, 'city', None), getattr(item, 'query', None)):
+                    if self.thread:
+                        result = await loop.run_in_executor(self._executor, self.handler, item)
+                    else:
+                        result = self.handler(item)
+                        if inspect.isawaitable(result):
+                            result = await result
+            except Exception as e:
+                # 单个条目出错不影响其它条目
+                self.errors += 1
+                if self.metrics:
+                    self.metrics.record_error(e)
+                self.log.warning(f'⚠️  阶段 {self.name} 处理出错: {e}', city=getattr(item, 'city', None),
+                                 query=getattr(item, 'query', None), error=str(e))
+                continue
+            finally:
+                elapsed = time.perf_counter() - start
+                self.busy += elapsed
+                if self.metrics:
+                    self.metrics.stage.observe(elapsed, self.name)
+            self.processed += 1
+            if result is not None and self.next is not None:
+                self.blocked += await self.next.put(result)
+
+    async def drain(self):
+        """等待已放入的条目处理完并停止工作者"""
+        for _ in self._tasks:
+            await self.queue.put(_DONE)
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def cancel(self):
+        """取消工作者并等待它们结束（已经停止时什么都不做）"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class Pipeline:
+    """由多个阶段组成的管道（第一个阶段的输入由调用方 put）
+
+    Args:
+        stages: [Stage]，按顺序连接
+        metrics: CrawlMetrics（可选，报告队列深度和各阶段耗时）
+
+    用法：
+        async with Pipeline([...]) as pipeline:
+            await pipeline.put(item)
+        # 正常退出时等待所有条目流过全部阶段；出错或被取消时取消并等待各阶段的工作者
+    """
+
+    def __init__(self, stages, metrics=None):
+        self.stages = list(stages)
+        for upstream, downstream in zip(self.stages, self.stages[1:]):
+            upstream.next = downstream
+        for stage in self.stages:
+            stage.metrics = metrics
+        self.producers = {}  # 外部生产者（如浏览器工作者）的统计: {名称: [条数, 忙碌秒数, 等待秒数]}
+        self.started = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.close()
+        else:
+            await self.cancel()
+
+    def start(self):
+        self.started = time.perf_counter()
+        for stage in self.stages:
+            stage.start()
+
+    async def put(self, item, producer=None, busy=0.0):
+        """交给第一个阶段；producer/busy 用于统计生产者（如浏览器工作者）的时间"""
+        blocked = await self.stages[0].put(item)
+        if producer is not None:
+            stats = self.producers.setdefault(producer, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += busy
+            stats[2] += blocked
+        return blocked
+
+    async def close(self):
+        """按顺序排空各阶段（上游全部处理完再停止下游）"""
+        for stage in self.stages:
+            await stage.drain()
+
+    async def cancel(self):
+        """取消所有阶段并等待工作者结束（已经排空的阶段什么都不做，可以在 finally 中调用）"""
+        for stage in self.stages:
+            await stage.cancel()
+
+    def format_stats(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        lines = [f'分阶段管道（{elapsed:.1f}s）:']
+        lines.append(f'  {"阶段":<10}{"工作者":>6}{"条数":>8}{"忙碌":>10}{"等待下游":>10}{"最大队列":>10}{"出错":>6}')
+        for name, (count, busy, blocked) in self.producers.items():
+            lines.append(f'  {name:<10}{"-":>6}{count:>8}{busy:>9.1f}s{blocked:>9.1f}s{"-":>10}{"-":>6}')
+        for stage in self.stages:
+            lines.append(f'  {stage.name:<10}{stage.workers:>6}{stage.processed:>8}{stage.busy:>9.1f}s'
+                         f'{stage.blocked:>9.1f}s{stage.max_depth:>7}/{stage.maxsize:<3}{stage.errors:>5}')
+        return '\n'.join(lines)
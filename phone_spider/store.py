@@ -0,0 +1,355 @@
+"""
+号码库存持久化（SQLite）
+
+numbers 表：每个 (城市, 号码) 一行，记录首次/最近一次看到的时间和次数
+observations 表：每次看到号码的明细（来源：search 搜索结果 / recommend 为您推荐，以及触发它的查询）
+runs 表：每次 (城市, 查询) 运行的耗时，以及与上一次运行相比新增/下架的号码数（用于估计变化速度）
+ingested_files 表：已导入的历史文件（按内容 SHA-256，重新导入时跳过）
+probes 表：每次变化探测的指纹，以及是否跳过/完成了全量爬取
+
+查询某个尾号模式的结果只是库存上的一个视图，不需要重新爬取。查询语法和匹配规则（号码后几位包含尾号）
+取自站点配置，按查询匹配的方法都接受 site 参数（默认 gd189）。
+"""
+
+import json
+import sqlite3
+import time
+
+from phone_spider.sites import SiteProfile
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS numbers (
+    city TEXT NOT NULL,
+    phone INTEGER NOT NULL,
+    min_cost_fen INTEGER,
+    deposit_fen INTEGER,
+    first_seen INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL,
+    seen_count INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (city, phone)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS observations (
+    city TEXT NOT NULL,
+    phone INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    query TEXT,
+    seen_at INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_observations_city_query ON observations (city, query);
+CREATE INDEX IF NOT EXISTS idx_observations_phone ON observations (phone);
+
+CREATE TABLE IF NOT EXISTS runs (
+    city TEXT NOT NULL,
+    query TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    found INTEGER NOT NULL,
+    added INTEGER,
+    removed INTEGER,
+    interval REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_runs_city_query ON runs (city, query, finished_at);
+
+CREATE TABLE IF NOT EXISTS probes (
+    city TEXT NOT NULL,
+    probed_at INTEGER NOT NULL,
+    fingerprints TEXT NOT NULL,
+    status INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_probes_city ON probes (city, probed_at);
+
+CREATE TABLE IF NOT EXISTS ingested_files (
+    digest TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    ingested_at INTEGER NOT NULL
+);
+'''
+
+SOURCES = ('search', 'recommend')
+
+
+class PhoneStore:
+    """号码库存
+
+    Args:
+        path: SQLite 数据库文件路径（默认：phones.db）
+    """
+
+    def __init__(self, path='phones.db'):
+        self.path = path
+        # 分阶段管道在工作线程中写库存（同一时间只有一个线程使用连接）
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def observe(self, city, query, source, phones, seen_at=None, prices=None):
+        """记录一批观察到的号码
+
+        Args:
+            city: 城市
+            query: 触发本次观察的查询，如 "000*"
+            source: 来源，search 或 recommend
+            phones: 号码（字符串或整数）
+            seen_at: 观察时间（Unix 秒），默认当前时间
+            prices: 可选，{号码: (最低消费分, 预存话费分)}，更新库存中这些号码的金额
+
+        Returns:
+            本次新发现（库存中原来没有）的号码数量
+        """
+        seen_at = int(seen_at if seen_at is not None else time.time())
+        phones = [int(p) for p in phones]
+        if not phones:
+            return 0
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO numbers (city, phone, first_seen, last_seen, seen_count) '
+                'VALUES (?, ?, ?, ?, 0)',
+                [(city, p, seen_at, seen_at) for p in phones],
+            )
+            new_count = self.conn.total_changes - before
+            self.conn.executemany(
+                'UPDATE numbers SET seen_count = seen_count + 1, '
+                'first_seen = MIN(first_seen, ?), last_seen = MAX(last_seen, ?) '
+                'WHERE city = ? AND phone = ?',
+                [(seen_at, seen_at, city, p) for p in phones],
+            )
+            self.conn.executemany(
+                'INSERT INTO observations (city, phone, source, query, seen_at) VALUES (?, ?, ?, ?, ?)',
+                [(city, p, source, query, seen_at) for p in phones],
+            )
+            if prices:
+                self.conn.executemany(
+                    'UPDATE numbers SET min_cost_fen = COALESCE(?, min_cost_fen), '
+                    'deposit_fen = COALESCE(?, deposit_fen) WHERE city = ? AND phone = ?',
+                    [(*prices[str(p)], city, p) for p in phones if str(p) in prices],
+                )
+        return new_count
+
+    def bulk_load(self, rows, files):
+        """批量导入历史数据（一个事务）
+
+        先写入临时表，再按 (城市, 号码) 聚合后一次性合并到 numbers：
+        首次/最近时间取最小/最大值，seen_count 加上出现的文件数，金额取批次内的非空值。
+
+        Args:
+            rows: [(城市, 号码, 最低消费分, 预存话费分, 首次时间, 最近时间)]，每个文件内已去重
+            files: [(SHA-256, 路径, 行数)]，记录为已导入
+
+        Returns:
+            新增（库存中原来没有）的号码数量
+        """
+        now = int(time.time())
+        self.conn.execute(
+            'CREATE TEMP TABLE IF NOT EXISTS staged (city TEXT, phone INTEGER, min_cost_fen INTEGER, '
+            'deposit_fen INTEGER, first_seen INTEGER, last_seen INTEGER)'
+        )
+        with self.conn:
+            self.conn.execute('DELETE FROM staged')
+            self.conn.executemany('INSERT INTO staged VALUES (?, ?, ?, ?, ?, ?)', rows)
+            new_count = self.conn.execute(
+                'SELECT COUNT(*) FROM (SELECT DISTINCT city, phone FROM staged) s '
+                'WHERE NOT EXISTS (SELECT 1 FROM numbers n WHERE n.city = s.city AND n.phone = s.phone)'
+            ).fetchone()[0]
+            self.conn.execute(
+                'INSERT INTO numbers (city, phone, min_cost_fen, deposit_fen, first_seen, last_seen, seen_count) '
+                'SELECT city, phone, MAX(min_cost_fen), MAX(deposit_fen), MIN(first_seen), MAX(last_seen), COUNT(*) '
+                'FROM staged WHERE true GROUP BY city, phone '
+                'ON CONFLICT (city, phone) DO UPDATE SET '
+                'seen_count = seen_count + excluded.seen_count, '
+                'min_cost_fen = COALESCE(excluded.min_cost_fen, min_cost_fen), '
+                'deposit_fen = COALESCE(excluded.deposit_fen, deposit_fen), '
+                'first_seen = MIN(first_seen, excluded.first_seen), '
+                'last_seen = MAX(last_seen, excluded.last_seen)'
+            )
+            self.conn.execute('DELETE FROM staged')
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO ingested_files (digest, path, rows, ingested_at) VALUES (?, ?, ?, ?)',
+                [(digest, path, count, now) for digest, path, count in files],
+            )
+        return new_count
+
+    def ingested_digests(self):
+        """已导入文件的内容哈希"""
+        return {row[0] for row in self.conn.execute('SELECT digest FROM ingested_files')}
+
+    def view(self, city, pattern=None, source=None, since=None, site=None):
+        """库存视图：按城市/尾号模式/来源/时间筛选号码
+
+        Args:
+            city: 城市
+            pattern: 尾号模式，如 "000"（与爬虫相同：号码后7位包含该模式）
+            source: 只看某个来源的观察
+            since: 只看该时间（Unix 秒）之后见过的号码
+            site: 站点配置（决定匹配的位数和通配符）
+
+        Returns:
+            排序后的号码字符串列表
+        """
+        if source is None:
+            sql = 'SELECT phone FROM numbers WHERE city = ?'
+            params = [city]
+            if since is not None:
+                sql += ' AND last_seen >= ?'
+                params.append(int(since))
+        else:
+            sql = 'SELECT DISTINCT phone FROM observations WHERE city = ? AND source = ?'
+            params = [city, source]
+            if since is not None:
+                sql += ' AND seen_at >= ?'
+                params.append(int(since))
+        if pattern:
+            site = SiteProfile.resolve(site)
+            sql += ' AND instr(substr(CAST(phone AS TEXT), ?), ?) > 0'
+            params.extend([-site.match_digits, site.query_tail(pattern)])
+        sql += ' ORDER BY phone'
+        return [str(row[0]) for row in self.conn.execute(sql, params)]
+
+    def query_yields(self, city, site=None):
+        """每个查询历史上在搜索结果中匹配到的号码数（用于按产出排列查询）
+
+        Returns:
+            {查询: 号码数}
+        """
+        site = SiteProfile.resolve(site)
+        rows = self.conn.execute(
+            "SELECT query, COUNT(DISTINCT phone) FROM observations "
+            "WHERE city = ? AND source = 'search' AND query IS NOT NULL "
+            "AND instr(substr(CAST(phone AS TEXT), ?), rtrim(trim(query), ?)) > 0 "
+            "GROUP BY query",
+            (city, -site.match_digits, site.wildcard),
+        )
+        return {query: count for query, count in rows}
+
+    def record_run(self, city, query, phones, started_at, finished_at, site=None):
+        """记录一次查询的运行，与同一查询上一次运行的结果比较
+
+        Args:
+            city: 城市
+            query: 查询，如 "000*"
+            phones: 本次搜索结果中的号码（不匹配该查询的会被忽略）
+            started_at: 开始时间（Unix 秒，time.time()，不取整）
+            finished_at: 结束时间（Unix 秒，与 started_at 同一个时钟，不取整），取整后应与本次 observe() 的 seen_at 相同
+            site: 站点配置（决定查询的尾号和匹配规则）
+
+        Returns:
+            (新增, 下架) 号码数，首次运行时为 (None, None)
+        """
+        site = SiteProfile.resolve(site)
+        tail = site.query_tail(query)
+        current = {int(p) for p in phones if site.matches(str(p), tail)}
+        started_at = float(started_at)
+        finished_at = float(finished_at)
+        previous = self.conn.execute(
+            'SELECT finished_at FROM runs WHERE city = ? AND query = ? AND finished_at < ? '
+            'ORDER BY finished_at DESC LIMIT 1',
+            (city, query, finished_at),
+        ).fetchone()
+        added = removed = interval = None
+        if previous:
+            before = {row[0] for row in self.conn.execute(
+                "SELECT DISTINCT phone FROM observations "
+                "WHERE city = ? AND query = ? AND source = 'search' AND seen_at = ? "
+                "AND instr(substr(CAST(phone AS TEXT), ?), ?) > 0",
+                (city, query, int(previous[0]), -site.match_digits, tail),
+            )}
+            added = len(current - before)
+            removed = len(before - current)
+            interval = finished_at - previous[0]
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO runs (city, query, started_at, finished_at, found, added, removed, interval) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (city, query, started_at, finished_at, len(current), added, removed, interval),
+            )
+        return added, removed
+
+    def run_history(self):
+        """每个 (城市, 查询) 的运行汇总
+
+        Returns:
+            [(城市, 查询, 运行次数, 新增合计, 下架合计, 有比较的间隔合计秒数, 平均耗时秒数, 最近运行时间, 最近号码数)]
+        """
+        return self.conn.execute(
+            'SELECT city, query, COUNT(*), COALESCE(SUM(added), 0), COALESCE(SUM(removed), 0), '
+            'COALESCE(SUM(interval), 0), AVG(finished_at - started_at), MAX(finished_at), '
+            '(SELECT found FROM runs AS last WHERE last.city = runs.city AND last.query = runs.query '
+            ' ORDER BY finished_at DESC LIMIT 1) '
+            'FROM runs GROUP BY city, query ORDER BY city, query'
+        ).fetchall()
+
+    def record_probe(self, city, fingerprints, status, probed_at=None):
+        """记录一次变化探测，返回记录 id
+
+        Args:
+            fingerprints: {查询: 指纹}
+            status: phone_spider.probe 中的 SKIPPED / STARTED / COMPLETED
+        """
+        probed_at = int(probed_at if probed_at is not None else time.time())
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO probes (city, probed_at, fingerprints, status) VALUES (?, ?, ?, ?)',
+                (city, probed_at, json.dumps(fingerprints, sort_keys=True), status),
+            )
+        return cursor.lastrowid
+
+    def finish_probe(self, probe_id, status):
+        with self.conn:
+            self.conn.execute('UPDATE probes SET status = ? WHERE rowid = ?', (status, probe_id))
+
+    def probe_history(self, city):
+        """城市最近一次探测的指纹和状态，以及最近一次完成的全量爬取之后的运行次数
+
+        Returns:
+            (指纹 {查询: 指纹} 或 None, 状态或 None, 运行次数)
+        """
+        row = self.conn.execute(
+            'SELECT fingerprints, status FROM probes WHERE city = ? ORDER BY probed_at DESC, rowid DESC LIMIT 1',
+            (city,),
+        ).fetchone()
+        if row is None:
+            return None, None, 0
+        # status 2：全量爬取已完成
+        since_full = self.conn.execute(
+            'SELECT COUNT(*) FROM probes WHERE city = ? AND rowid > '
+            'COALESCE((SELECT MAX(rowid) FROM probes WHERE city = ? AND status = 2), 0)',
+            (city, city),
+        ).fetchone()[0]
+        return json.loads(row[0]), row[1], since_full
+
+    def cities(self):
+        return [row[0] for row in self.conn.execute('SELECT DISTINCT city FROM numbers ORDER BY city')]
+
+    def totals(self):
+        """每个城市库存中的号码总数（包括导入的历史文件中只有号码、没有观察明细的）"""
+        return dict(self.conn.execute('SELECT city, COUNT(*) FROM numbers GROUP BY city ORDER BY city'))
+
+    def stats(self, city=None):
+        """按来源统计观察到的号码数量"""
+        sql = 'SELECT city, source, COUNT(DISTINCT phone) FROM observations'
+        params = []
+        if city is not None:
+            sql += ' WHERE city = ?'
+            params.append(city)
+        sql += ' GROUP BY city, source ORDER BY city, source'
+        result = {}
+        for row_city, source, count in self.conn.execute(sql, params):
+            result.setdefault(row_city, {})[source] = count
+        return result
@@ -0,0 +1,202 @@
+"""
+浏览器监督
+
+每个正在执行的查询都在 guard() 中运行：旁边的心跳任务定期对页面做一次很轻的 evaluate，
+同时监听页面 crash 事件（渲染进程崩溃）和浏览器 disconnected 事件。
+页面崩溃、超时无响应或浏览器断开时立即取消当前查询并抛出 BrowserInterrupted，
+爬虫据此重启浏览器（卡死的进程直接 kill）、重新打开页面（有会话快照时直接进入城市搜索页），
+再把被打断的 (城市, 查询) 重新排队，已经得到的结果不受影响。
+"""
+
+import asyncio
+import contextlib
+import os
+import signal
+
+
+# 同一个工作单元最多重新排队的次数
+MAX_UNIT_RETRIES = 2
+
+
+class BrowserInterrupted(Exception):
+    """浏览器或页面异常（crash / hang / disconnected），当前工作单元需要重新执行"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class BrowserSupervisor:
+    """浏览器监督
+
+    Args:
+        heartbeat_interval: 心跳间隔（秒）
+        heartbeat_timeout: 心跳超时（秒），超时视为页面卡死
+        max_restarts: 最多重启浏览器的次数，超过后不再重启（抛出原来的异常）
+    """
+
+    def __init__(self, heartbeat_interval=5.0, heartbeat_timeout=5.0, max_restarts=5):
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_restarts = max_restarts
+        self.playwright = None
+        self.profile = None
+        self.browser = None
+        self.pid = None  # Chromium 浏览器进程 pid（用于 kill 卡死的浏览器）
+        self.heartbeats = 0
+        self.failures = {}  # 原因 -> 次数
+        self.restarts = 0
+        self.requeued = 0
+        self._failed = {}  # page -> 原因（crash 事件）
+        self._wakeups = {}  # page -> asyncio.Event
+        self._lock = asyncio.Lock()
+
+    async def launch(self, playwright, profile):
+        """按启动配置启动浏览器并开始监听断开事件"""
+        self.playwright = playwright
+        self.profile = profile
+        browser = await profile.launch(playwright)
+        browser.on('disconnected', lambda b: self._on_disconnected(b))
+        self.browser = browser
+        self.pid = await self._browser_pid(browser)
+        return browser
+
+    async def _browser_pid(self, browser):
+        try:
+            session = await browser.new_browser_cdp_session()
+            info = await session.send('SystemInfo.getProcessInfo')
+        except Exception:
+            return None
+        for process in info.get('processInfo', []):
+            if process.get('type') == 'browser':
+                return process.get('id')
+        return None
+
+    def _on_disconnected(self, browser):
+        if browser is not self.browser:
+            return
+        for event in self._wakeups.values():
+            event.set()
+
+    def watch(self, page):
+        """开始监听页面的 crash 事件"""
+        if page in self._wakeups:
+            return
+        self._wakeups[page] = asyncio.Event()
+
+        def on_crash(p):
+            self._failed[page] = 'crash'
+            self._wakeups[page].set()
+
+        page.on('crash', on_crash)
+        page.on('close', lambda p: self._forget(page))
+
+    def _forget(self, page):
+        self._wakeups.pop(page, None)
+        self._failed.pop(page, None)
+
+    def failure(self, page):
+        """页面当前的异常原因，正常时返回 None"""
+        if page in self._failed:
+            return self._failed[page]
+        if not page.context.browser.is_connected():
+            return 'disconnected'
+        return None
+
+    async def ping(self, page):
+        """心跳：返回 None 表示正常，否则返回异常原因"""
+        self.heartbeats += 1
+        try:
+            await asyncio.wait_for(page.evaluate('1'), self.heartbeat_timeout)
+        except asyncio.TimeoutError:
+            return 'hang'
+        except Exception:
+            return self.failure(page) or 'closed'
+        return None
+
+    async def _monitor(self, page):
+        """心跳循环，页面异常时返回原因"""
+        wakeup = self._wakeups[page]
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(wakeup.wait(), self.heartbeat_interval)
+            reason = self.failure(page) or await self.ping(page)
+            if reason:
+                return reason
+
+    async def guard(self, page, awaitable):
+        """在心跳监督下执行 awaitable
+
+        Raises:
+            BrowserInterrupted: 执行期间页面崩溃、卡死或浏览器断开
+        """
+        self.watch(page)
+        work = asyncio.ensure_future(awaitable)
+        monitor = asyncio.ensure_future(self._monitor(page))
+        try:
+            await asyncio.wait({work, monitor}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            work.cancel()
+            raise
+        finally:
+            monitor.cancel()
+
+        if not work.done():
+            work.cancel()
+            with contextlib.suppress(BaseException):
+                await work
+            raise self._interrupted(monitor.result())
+        # 查询本身结束了，但页面在这期间崩溃的话结果不可信（提取时的异常会被吞掉）
+        reason = self.failure(page)
+        if reason:
+            raise self._interrupted(reason)
+        return work.result()
+
+    def _interrupted(self, reason):
+        self.failures[reason] = self.failures.get(reason, 0) + 1
+        return BrowserInterrupted(reason)
+
+    async def recover(self, browser, error):
+        """从异常中恢复，返回可用的浏览器
+
+        只是页面崩溃且浏览器仍然连接时沿用原浏览器；否则关闭（必要时 kill）并重新启动。
+        多个任务同时恢复时只重启一次。
+        """
+        async with self._lock:
+            if browser is not self.browser:
+                return self.browser  # 其它任务已经重启过
+            if error.reason == 'crash' and browser.is_connected():
+                return browser
+            if self.restarts >= self.max_restarts:
+                raise error
+            self.restarts += 1
+            await self._kill(browser)
+            return await self.launch(self.playwright, self.profile)
+
+    async def _kill(self, browser):
+        try:
+            await asyncio.wait_for(browser.close(), 5)
+            return
+        except Exception:
+            pass
+        if self.pid:
+            with contextlib.suppress(OSError):
+                os.kill(self.pid, signal.SIGKILL)
+
+    def requeue(self, unit, retries):
+        """记录一次重新排队，返回该单元是否还能重试"""
+        count = retries.get(unit, 0) + 1
+        retries[unit] = count
+        if count > MAX_UNIT_RETRIES:
+            return False
+        self.requeued += 1
+        return True
+
+    async def close(self):
+        if self.browser is not None:
+            await self._kill(self.browser)
+
+    def format_stats(self):
+        failures = '，'.join(f'{reason} {count} 次' for reason, count in self.failures.items()) or '无'
+        return (f'浏览器监督: 心跳 {self.heartbeats} 次，异常 {failures}，'
+                f'重启 {self.restarts} 次，重新排队 {self.requeued} 个查询')
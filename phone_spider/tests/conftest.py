@@ -0,0 +1,18 @@
+"""测试共用的假对象"""
+
+import pytest
+
+
+class FakeClock:
+    """可以手动拨动的时钟（代替 time.monotonic 传给 clock= 参数）"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
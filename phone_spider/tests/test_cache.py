@@ -0,0 +1,142 @@
+"""查询结果缓存的测试"""
+
+import asyncio
+
+import pytest
+
+from phone_spider.cache import QueryCache, normalize_query
+
+
+def counting_factory(calls, result):
+    async def factory():
+        calls.append(result)
+        return result
+    return factory
+
+
+def test_normalize_query():
+    assert normalize_query(' 000* ') == '000'
+    assert normalize_query('1234') == '1234'
+
+
+def test_hit_shares_normalized_key():
+    async def main():
+        cache = QueryCache()
+        calls = []
+        assert await cache.get_or_run('深圳', '000*', counting_factory(calls, ['13300000000'])) == ['13300000000']
+        assert await cache.get_or_run('深圳', ' 000 ', counting_factory(calls, ['other'])) == ['13300000000']
+        assert await cache.get_or_run('广州', '000*', counting_factory(calls, ['13300000001'])) == ['13300000001']
+        return cache, calls
+
+    cache, calls = asyncio.run(main())
+    assert len(calls) == 2
+    assert (cache.hits, cache.coalesced, cache.misses) == (1, 0, 2)
+
+
+def test_ttl_expiry(clock):
+    async def main():
+        cache = QueryCache(ttl=10, clock=clock)
+        calls = []
+        await cache.get_or_run('深圳', '000*', counting_factory(calls, 'a'))
+        clock.now = 10
+        assert await cache.get_or_run('深圳', '000*', counting_factory(calls, 'b')) == 'a'
+        clock.now = 10.5
+        assert await cache.get_or_run('深圳', '000*', counting_factory(calls, 'c')) == 'c'
+        return calls
+
+    assert asyncio.run(main()) == ['a', 'c']
+
+
+def test_lru_evicts_least_recently_used():
+    async def main():
+        cache = QueryCache(maxsize=2)
+        calls = []
+        await cache.get_or_run('深圳', '000*', counting_factory(calls, 'a'))
+        await cache.get_or_run('深圳', '111*', counting_factory(calls, 'b'))
+        await cache.get_or_run('深圳', '000*', counting_factory(calls, 'x'))  # 命中，000 变为最近使用
+        await cache.get_or_run('深圳', '222*', counting_factory(calls, 'c'))  # 淘汰 111
+        assert await cache.get_or_run('深圳', '000*', counting_factory(calls, 'y')) == 'a'
+        assert await cache.get_or_run('深圳', '111*', counting_factory(calls, 'd')) == 'd'
+        return calls
+
+    assert asyncio.run(main()) == ['a', 'b', 'c', 'd']
+
+
+def test_single_flight():
+    async def main():
+        cache = QueryCache()
+        calls = []
+        release = asyncio.Event()
+
+        async def factory():
+            calls.append(1)
+            await release.wait()
+            return ['13300000000']
+
+        waiters = [asyncio.ensure_future(cache.get_or_run('深圳', q, factory)) for q in ('000*', '000', ' 000* ')]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return cache, calls, results
+
+    cache, calls, results = asyncio.run(main())
+    assert calls == [1]
+    assert results == [['13300000000']] * 3
+    assert (cache.hits, cache.coalesced, cache.misses) == (0, 2, 1)
+    assert cache.saved == 2
+
+
+def test_cancelled_waiter_does_not_cancel_shared_run():
+    async def main():
+        cache = QueryCache()
+        release = asyncio.Event()
+
+        async def factory():
+            await release.wait()
+            return 'done'
+
+        first = asyncio.ensure_future(cache.get_or_run('深圳', '000*', factory))
+        second = asyncio.ensure_future(cache.get_or_run('深圳', '000*', factory))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == ('done', True)
+
+
+def test_failure_is_not_cached():
+    async def main():
+        cache = QueryCache()
+
+        async def failing():
+            raise RuntimeError('页面超时')
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_run('深圳', '000*', failing)
+        calls = []
+        assert await cache.get_or_run('深圳', '000*', counting_factory(calls, 'ok')) == 'ok'
+        return cache, calls
+
+    cache, calls = asyncio.run(main())
+    assert calls == ['ok']
+    assert cache.misses == 2
+
+
+def test_invalidate():
+    async def main():
+        cache = QueryCache()
+        calls = []
+        for city in ('深圳', '广州'):
+            for query in ('000*', '111*'):
+                await cache.get_or_run(city, query, counting_factory(calls, city + query))
+        cache.invalidate('深圳', '000')
+        await cache.get_or_run('深圳', '000*', counting_factory(calls, 'again'))
+        await cache.get_or_run('深圳', '111*', counting_factory(calls, 'cached'))
+        cache.invalidate('广州')
+        await cache.get_or_run('广州', '111*', counting_factory(calls, 'again'))
+        cache.invalidate()
+        await cache.get_or_run('深圳', '111*', counting_factory(calls, 'again'))
+        return calls
+
+    assert asyncio.run(main())[4:] == ['again', 'again', 'again']
@@ -0,0 +1,114 @@
+"""库存覆盖率估计的测试"""
+
+import random
+
+import pytest
+
+from phone_spider.coverage import CoverageEstimator
+
+
+def phones(*ids):
+    return [f'133{i:08d}' for i in ids]
+
+
+def test_lincoln_petersen_chapman():
+    estimator = CoverageEstimator()
+    estimator.add('000*', phones(*range(100)), phones(*range(90, 110)))
+    # n1=100, n2=20, m=10: (101 * 21) / 11 - 1
+    assert estimator.lincoln_petersen() == pytest.approx(101 * 21 / 11 - 1)
+
+
+def test_lincoln_petersen_needs_both_samples():
+    estimator = CoverageEstimator()
+    estimator.add('000*', phones(1, 2, 3))
+    assert estimator.lincoln_petersen() is None
+    empty = CoverageEstimator()
+    empty.add('000*', [], phones(1))
+    assert empty.lincoln_petersen() is None
+
+
+def test_chao2_with_doubletons():
+    estimator = CoverageEstimator()
+    estimator.add('000*', phones(1, 2, 3, 4))
+    estimator.add('111*', phones(3, 4, 5))
+    estimator.add('222*', phones(4, 6))
+    # m=3, S=6, Q1=4 (1,2,5,6), Q2=1 (3): 6 + (2/3) * 16 / 2
+    assert estimator.chao2() == pytest.approx(6 + 2 / 3 * 16 / 2)
+
+
+def test_chao2_without_doubletons_uses_bias_corrected_form():
+    estimator = CoverageEstimator()
+    estimator.add('000*', phones(1, 2, 3))
+    estimator.add('111*', phones(3, 3, 4))  # 同一查询中重复出现只算一次
+    # m=2, S=4, Q1=3, Q2=1 -> doubleton 形式
+    assert estimator.chao2() == pytest.approx(4 + 0.5 * 9 / 2)
+    singles = CoverageEstimator()
+    singles.add('000*', phones(1, 2))
+    singles.add('111*', phones(3))
+    # Q2=0: S + (m-1)/m * Q1 * (Q1-1) / 2
+    assert singles.chao2() == pytest.approx(3 + 0.5 * 3 * 2 / 2)
+
+
+def test_chao2_needs_two_queries():
+    estimator = CoverageEstimator()
+    estimator.add('000*', phones(1, 2))
+    assert estimator.chao2() is None
+
+
+def test_estimate_prefers_lincoln_petersen():
+    estimator = CoverageEstimator()
+    estimator.add('000*', phones(1, 2, 3), phones(1, 2, 3, 4))
+    estimator.add('111*', phones(3, 5))
+    e = estimator.estimate()
+    assert e['estimated'] == pytest.approx(estimator.lincoln_petersen())
+    assert e['coverage'] == pytest.approx(4 / e['estimated'])
+
+
+def test_estimate_without_overlap_is_unknown():
+    # 互不重叠的尾号枚举、又没有推荐区：无法估计，不能提前停止
+    estimator = CoverageEstimator(min_queries=1)
+    for q in range(5):
+        estimator.add(f'{q}000', phones(q * 10, q * 10 + 1))
+    assert estimator.estimate()['estimated'] is None
+    assert not estimator.should_stop()
+    assert '数据不足' in estimator.format_report('深圳')
+
+
+def test_estimate_never_below_observed():
+    estimator = CoverageEstimator()
+    estimator.add('000*', phones(1, 2, 3), phones(1, 2, 3))
+    e = estimator.estimate()
+    assert e['estimated'] >= e['observed']
+    assert e['coverage'] <= 1
+
+
+def test_should_stop_respects_min_queries_and_target():
+    estimator = CoverageEstimator(target=0.9, min_queries=3)
+    recommend = phones(*range(20))
+    estimator.add('000*', phones(*range(50)), recommend)
+    estimator.add('111*', phones(*range(50, 100)))
+    assert not estimator.should_stop()
+    estimator.add('222*', phones(100))
+    assert estimator.should_stop()
+    strict = CoverageEstimator(target=0.99, min_queries=1)
+    strict.add('000*', phones(*range(10)), phones(*range(5, 15)))
+    assert not strict.should_stop()
+
+
+def test_discovery_rate_window():
+    estimator = CoverageEstimator(window=2)
+    assert estimator.discovery_rate() is None
+    estimator.add('000*', phones(*range(10)))
+    estimator.add('111*', phones(*range(10, 14)))
+    estimator.add('222*', phones(*range(12, 16)))
+    estimator.add('333*', phones(15))
+    # 最近 2 个查询：14 -> 16 -> 16
+    assert estimator.discovery_rate() == pytest.approx(1.0)
+
+
+def test_lincoln_petersen_recovers_population_size():
+    rng = random.Random(7)
+    population = phones(*range(2000))
+    estimator = CoverageEstimator()
+    estimator.add('搜索', rng.sample(population, 800), rng.sample(population, 300))
+    assert estimator.lincoln_petersen() == pytest.approx(2000, rel=0.15)
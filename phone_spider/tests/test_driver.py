@@ -0,0 +1,149 @@
+"""搜索驱动的测试
+
+页面内触发（app/auto）与模拟点击（ui）的结果一致性在本地模拟网站上用真实浏览器检查，
+没有可用的浏览器时跳过这些测试。
+"""
+
+import asyncio
+
+import pytest
+
+from phone_spider.driver import MODES, SearchDriver, compare_paths
+from phone_spider.sites import SiteProfile
+
+
+class FakePage:
+    """记录 ui 方式操作的假页面，app 方式的 evaluate 返回预设结果"""
+
+    def __init__(self, app_result):
+        self.app_result = app_result
+        self.actions = []
+
+    async def evaluate(self, script, arg):
+        self.actions.append(('evaluate', arg['query'], arg['wait']))
+        if isinstance(self.app_result, Exception):
+            raise self.app_result
+        return self.app_result
+
+    def get_by_placeholder(self, placeholder):
+        return FakeLocator(self, 'input')
+
+    def get_by_text(self, text):
+        return FakeLocator(self, 'button')
+
+
+class FakeLocator:
+    def __init__(self, page, name):
+        self.page = page
+        self.name = name
+
+    async def clear(self):
+        self.page.actions.append(('clear', self.name))
+
+    async def fill(self, value):
+        self.page.actions.append(('fill', value))
+
+    async def click(self):
+        self.page.actions.append(('click', self.name))
+
+
+NO_WAITS = (0, 0, 0, 0)
+
+
+def run_search(driver, page, query='000*', **kwargs):
+    return asyncio.run(driver.search(page, query, **kwargs))
+
+
+def test_default_mode_is_auto():
+    assert SearchDriver().mode == 'auto'
+    with pytest.raises(ValueError):
+        SearchDriver(mode='fast')
+    assert set(MODES) == {'auto', 'app', 'ui'}
+
+
+def test_auto_uses_app_when_it_succeeds():
+    driver = SearchDriver(mode='auto', ui_waits=NO_WAITS)
+    page = FakePage({'ok': True, 'trigger': 'vue:searchNum', 'signal': 'requests'})
+    assert run_search(driver, page) == 'app'
+    assert page.actions == [('evaluate', '000*', True)]
+    assert driver.counts == {'app': 1, 'ui': 0, 'fallback': 0}
+
+
+@pytest.mark.parametrize('app_result', [{'ok': False, 'reason': 'timeout'}, RuntimeError('页面已关闭')])
+def test_auto_falls_back_to_ui(app_result):
+    driver = SearchDriver(mode='auto', ui_waits=NO_WAITS)
+    page = FakePage(app_result)
+    assert run_search(driver, page) == 'ui'
+    assert page.actions[1:] == [('clear', 'input'), ('fill', '000*'), ('click', 'button'), ('click', 'button')]
+    assert driver.counts == {'app': 0, 'ui': 1, 'fallback': 1}
+    assert '退回 ui 1 次' in driver.format_stats()
+
+
+def test_app_mode_raises_instead_of_falling_back():
+    driver = SearchDriver(mode='app')
+    with pytest.raises(RuntimeError, match='timeout'):
+        run_search(driver, FakePage({'ok': False, 'reason': 'timeout'}))
+
+
+def test_no_wait_clicks_once():
+    driver = SearchDriver(mode='ui')
+    page = FakePage(None)
+    run_search(driver, page, wait=False)
+    assert [a for a in page.actions if a[0] == 'click'] == [('click', 'button')]
+
+
+def test_use_site():
+    site = SiteProfile.resolve('mock')
+    driver = SearchDriver().use_site(site)
+    assert (driver.placeholder, driver.result_item, driver.no_result_text) == (
+        site.search_placeholder, site.result_item, site.no_result_text)
+
+
+# 以下测试在本地模拟网站上启动真实浏览器
+
+spider_simple = pytest.importorskip('spider_simple')
+
+
+def _browser_available():
+    from playwright.async_api import async_playwright
+    from phone_spider.profiles import LaunchProfile
+
+    async def probe():
+        async with async_playwright() as p:
+            browser = await LaunchProfile.resolve().launch(p)
+            await browser.close()
+
+    try:
+        asyncio.run(probe())
+    except Exception:
+        return False
+    return True
+
+
+@pytest.fixture(scope='module')
+def browser_available():
+    if not _browser_available():
+        pytest.skip('没有可用的浏览器（python -m playwright install chromium）')
+
+
+def factory(url, driver):
+    return spider_simple.TelecomCrawler(url=url, driver=driver)
+
+
+@pytest.mark.usefixtures('browser_available')
+def test_app_matches_ui_on_mock_site():
+    queries = SiteProfile.resolve('mock').repeat_queries()[:4] + ['9999']
+    rows = asyncio.run(compare_paths(factory, queries))
+    assert [row[0] for row in rows] == queries
+    for query, app_result, ui_result, app_time, ui_time in rows:
+        assert app_result == ui_result, query
+    # app 方式不点两次"搜索"、不固定等待，总耗时应明显少于 ui 方式
+    assert sum(r[3] for r in rows) < sum(r[4] for r in rows)
+
+
+@pytest.mark.usefixtures('browser_available')
+def test_auto_matches_ui_without_fallback():
+    queries = SiteProfile.resolve('mock').repeat_queries()[:3]
+    rows = asyncio.run(compare_paths(factory, queries, modes=('auto', 'ui')))
+    for query, auto_result, ui_result, _, _ in rows:
+        assert auto_result == ui_result, query
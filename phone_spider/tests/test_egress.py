@@ -0,0 +1,190 @@
+"""出口池的测试"""
+
+import asyncio
+
+import pytest
+
+from phone_spider import egress as egress_module
+from phone_spider.egress import HEALTH_ALPHA, Egress, EgressPool, TokenBucket
+
+
+class FakeEmitter:
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def emit(self, event, arg):
+        for handler in self.handlers.get(event, ()):
+            handler(arg)
+
+
+class FakePage(FakeEmitter):
+    def __init__(self):
+        super().__init__()
+        self.context = FakeEmitter()
+
+
+class FakeResponse:
+    def __init__(self, status, resource_type='xhr'):
+        self.status = status
+        self.request = type('Request', (), {'resource_type': resource_type})()
+
+
+def make_pool(clock, count=2, rate=None, **kwargs):
+    egresses = [Egress(f'e{i}', rate=rate, clock=clock) for i in range(count)]
+    return EgressPool(egresses, clock=clock, **kwargs)
+
+
+def test_token_bucket_burst_and_refill(clock):
+    bucket = TokenBucket(2, burst=3, clock=clock)
+    assert bucket.available() == 3
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # 桶空后每个预约多等 1/rate 秒
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.available() == pytest.approx(-2)
+    clock.now = 1.0
+    assert bucket.available() == pytest.approx(0)
+    clock.now = 100.0
+    assert bucket.available() == 3  # 不超过桶容量
+
+
+def test_token_bucket_default_burst(clock):
+    assert TokenBucket(0.5, clock=clock).burst == 1.0
+    assert TokenBucket(4, clock=clock).burst == 4
+
+
+def test_health_is_ewma(clock):
+    pool = make_pool(clock, min_samples=100)
+    egress = pool.egresses[0]
+    pool.report(egress, False)
+    assert egress.health == pytest.approx(1 - HEALTH_ALPHA)
+    pool.report(egress, True)
+    assert egress.health == pytest.approx((1 - HEALTH_ALPHA) + HEALTH_ALPHA * HEALTH_ALPHA)
+
+
+def test_observe_classifies_statuses(clock):
+    pool = make_pool(clock, min_samples=100)
+    egress = pool.egresses[0]
+    for status in (200, 304, 404):
+        pool.observe(egress, status)
+    assert egress.health == 1.0
+    pool.observe(egress, 429)
+    pool.observe(egress, 403)
+    pool.observe(egress, 502)
+    assert egress.throttled == 2
+    assert egress.health == pytest.approx((1 - HEALTH_ALPHA) ** 3)
+
+
+def test_eviction_after_min_samples_and_cooldown(clock):
+    pool = make_pool(clock, min_health=0.3, min_samples=5, cooldown=60)
+    bad = pool.egresses[0]
+    for _ in range(4):
+        pool.report(bad, False)
+    # 健康分已低于阈值，但样本数不足
+    assert bad.health < 0.5 and bad.evicted_at is None
+    for _ in range(2):
+        pool.report(bad, False)
+    assert bad.evicted_at == 0.0
+    assert pool.evictions == 1
+    assert pool.active() == [pool.egresses[1]]
+    clock.now = 59
+    assert bad not in pool.active()
+    clock.now = 60
+    assert bad in pool.active()
+    assert (bad.health, bad.samples) == (0.5, 0)
+
+
+def test_last_egress_is_never_evicted(clock):
+    pool = make_pool(clock, count=1, min_samples=1)
+    egress = pool.egresses[0]
+    for _ in range(20):
+        pool.report(egress, False)
+    assert egress.evicted_at is None
+    assert pool.active() == [egress]
+
+
+def test_assign_prefers_headroom_then_health(clock):
+    pool = make_pool(clock, count=3, rate=2)
+    first, second, third = (pool.assign() for _ in range(3))
+    assert {first.name, second.name, third.name} == {'e0', 'e1', 'e2'}
+    pool.egresses[1].health = 0.9
+    pool.egresses[2].health = 0.8
+    assert pool.assign() is pool.egresses[0]
+    assert pool.egresses[0].contexts == 2
+
+
+def test_assign_skips_evicted(clock):
+    pool = make_pool(clock, min_samples=1)
+    for _ in range(10):
+        pool.report(pool.egresses[0], False)
+    assert all(pool.assign() is pool.egresses[1] for _ in range(3))
+
+
+def test_release_returns_slot(clock):
+    pool = make_pool(clock, count=1)
+    egress = pool.assign()
+    pool.release(egress)
+    assert egress.contexts == 0
+
+
+def test_bind_tracks_responses_and_releases_on_close(clock):
+    pool = make_pool(clock, min_samples=100)
+    egress = pool.assign()
+    page = FakePage()
+    pool.bind(page, egress)
+    assert pool.egress_of(page) is egress
+    page.emit('response', FakeResponse(429))
+    page.emit('response', FakeResponse(500, resource_type='image'))  # 静态资源不计
+    assert egress.samples == 1 and egress.throttled == 1
+    pool.failed(page)
+    assert egress.errors == 1
+    page.context.emit('close', page.context)
+    assert pool.egress_of(page) is None
+    assert egress.contexts == 0
+
+
+def test_evicted_page(clock):
+    pool = make_pool(clock, min_samples=1)
+    pages = [FakePage(), FakePage()]
+    for page, egress in zip(pages, pool.egresses):
+        pool.bind(page, egress)
+    for _ in range(10):
+        pool.failed(pages[0])
+    assert pool.evicted(pages[0])
+    assert not pool.evicted(pages[1])
+    assert not pool.evicted(FakePage())
+
+
+def test_acquire_waits_for_budget(monkeypatch, clock):
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+
+    monkeypatch.setattr(egress_module.asyncio, 'sleep', fake_sleep)
+    pool = make_pool(clock, count=1, rate=1)
+    page = FakePage()
+    pool.bind(page, pool.assign())
+
+    async def main():
+        for _ in range(3):
+            await pool.acquire(page)
+
+    asyncio.run(main())
+    assert waits == [pytest.approx(1.0), pytest.approx(2.0)]
+    assert pool.egresses[0].queries == 3
+
+
+def test_from_specs():
+    pool = EgressPool.from_specs(['direct', 'http://127.0.0.1:8080'], rate=0.5, user_agents=['ua0', 'ua1'])
+    direct, proxied = pool.egresses
+    assert pool.context_options(direct) == {'user_agent': 'ua0'}
+    assert pool.context_options(proxied, user_agent=False)['proxy']['server'] == 'http://127.0.0.1:8080'
+    assert proxied.bucket.rate == 0.5
+    with pytest.raises(ValueError):
+        EgressPool.from_specs(['ftp://example.com'])
+    with pytest.raises(ValueError):
+        EgressPool([])
@@ -0,0 +1,39 @@
+"""旧入口脚本转发给统一命令行的测试"""
+
+import pytest
+
+from phone_spider import cli
+
+spider_simple = pytest.importorskip('spider_simple')
+spider_multi_city = pytest.importorskip('spider_multi_city')
+
+
+@pytest.fixture
+def forwarded(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cli, 'main', calls.append)
+    return calls
+
+
+def test_spider_simple_forwards_to_crawl(forwarded):
+    spider_simple.main(['--city', '广州', '--driver', 'ui'])
+    spider_simple.main(['--concurrent', '--harvest'])
+    assert forwarded == [
+        ['crawl', '--city', '广州', '--driver', 'ui'],
+        ['crawl', '--harvest', '--engine', 'playwright-pool'],
+    ]
+
+
+def test_spider_multi_city_forwards_to_sweep(forwarded, monkeypatch):
+    monkeypatch.setattr('sys.argv', ['spider_multi_city.py', '--cities', '深圳', '广州'])
+    spider_multi_city.main()
+    assert forwarded == [['sweep', '--cities', '深圳', '广州']]
+
+
+def test_legacy_flags_parse_as_subcommands():
+    # 旧入口的参数都由统一命令行的子命令解析
+    args = cli.build_parser().parse_args(['crawl', '--city', '广州', '--engine', 'playwright-pool', '--harvest',
+                                          '--pipeline', 'browse=3', '--extract', 'xhr', '--probe'])
+    assert (args.func, args.city, args.engine, args.pipeline) == (cli.cmd_crawl, '广州', 'playwright-pool', 'browse=3')
+    args = cli.build_parser().parse_args(['sweep', '--cities', '深圳', '广州', '--coverage-target', '0.95'])
+    assert (args.func, args.cities, args.coverage_target) == (cli.cmd_sweep, ['深圳', '广州'], 0.95)
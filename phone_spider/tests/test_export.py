@@ -0,0 +1,93 @@
+"""列式导出的测试"""
+
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+from phone_spider.export import (MANIFEST, UNKNOWN_DATE, compact, dedup_table, export_files, load_manifest,
+                                 parse_amount_fen, read_dataset)
+
+
+def scrapy_file(path, entries):
+    rows = [{'phone': phone, 'city': city, 'min_cost': '最低消费39元/月', 'deposit': '', 'crawl_time': crawl_time}
+            for phone, city, crawl_time in entries]
+    path.write_text(json.dumps(rows, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def dataset_rows(root):
+    table = read_dataset(root, columns=['phone', 'city', 'date'])
+    return sorted(zip(table['phone'].to_pylist(), [str(c) for c in table['city'].to_pylist()],
+                      [str(d) for d in table['date'].to_pylist()]))
+
+
+def part_files(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root)
+                  for d, _, files in os.walk(root) for f in files if f.endswith('.parquet'))
+
+
+def test_parse_amount_fen():
+    assert parse_amount_fen('最低消费39元/月') == 3900
+    assert parse_amount_fen('预存话费50.5元') == 5050
+    assert parse_amount_fen(0) == 0
+    assert parse_amount_fen('') is None
+    assert parse_amount_fen('面议') is None
+
+
+def test_dedup_table_keeps_first_of_each_key_in_order():
+    table = pa.table({'phone': [1, 1, 2, 2, 3, 1], 'city': ['深圳'] * 5 + ['广州'],
+                      'crawl_time': [0] * 6, 'min_cost_fen': [10, 11, 20, 21, 30, 40]})
+    result = dedup_table(table)
+    assert result.column_names == table.column_names
+    assert result['phone'].to_pylist() == [1, 2, 3, 1]
+    assert result['min_cost_fen'].to_pylist() == [10, 20, 30, 40]
+
+
+def test_export_skips_already_exported_files(tmp_path):
+    root = str(tmp_path / 'dataset')
+    first = scrapy_file(tmp_path / 'phones_a.json', [('13300000000', '深圳', '2026-01-07 10:00:00')])
+    copy = tmp_path / 'phones_copy.json'
+    copy.write_bytes(open(first, 'rb').read())
+    assert export_files([first, str(copy)], root) == (1, 1)
+    assert export_files([first], root) == (0, 1)
+    assert [entry['path'] for entry in load_manifest(root).values()] == [first]
+    assert os.path.exists(os.path.join(root, MANIFEST))
+    assert dataset_rows(root) == [(13300000000, '深圳', '2026-01-07')]
+
+
+def test_compact_dedups_across_part_files(tmp_path):
+    root = str(tmp_path / 'dataset')
+    day1, day2 = '2026-01-07 10:00:00', '2026-01-08 10:00:00'
+    batches = [
+        [('13300000001', '深圳', day1), ('13300000002', '深圳', day1), ('13300000001', '广州', day1)],
+        [('13300000002', '深圳', day1), ('13300000003', '深圳', day1), ('13300000001', '深圳', day2)],
+        [('13300000001', '深圳', day1), ('13300000003', '深圳', day1), ('13300000001', '广州', day1)],
+    ]
+    for i, batch in enumerate(batches):
+        export_files([scrapy_file(tmp_path / f'phones_{i}.json', batch)], root)
+    assert len(part_files(root)) == 6
+
+    assert compact(root) == 2  # 深圳/2026-01-07 和 广州/2026-01-07 各有多个文件
+    expected = [(13300000001, '广州', '2026-01-07'), (13300000001, '深圳', '2026-01-07'),
+                (13300000001, '深圳', '2026-01-08'), (13300000002, '深圳', '2026-01-07'),
+                (13300000003, '深圳', '2026-01-07')]
+    assert dataset_rows(root) == expected
+    assert len(part_files(root)) == 3
+    # 再次合并没有可合并的分区，数据不变
+    assert compact(root) == 0
+    assert dataset_rows(root) == expected
+
+
+def test_grouped_file_without_timestamp_uses_mtime(tmp_path):
+    root = str(tmp_path / 'dataset')
+    path = tmp_path / 'phones_深圳.json'
+    path.write_text(json.dumps([{'city': '深圳', 'phone': ['13300000000']}], ensure_ascii=False), encoding='utf-8')
+    os.utime(path, (1767751200, 1767751200))
+    export_files([str(path)], root)
+    (row,) = dataset_rows(root)
+    assert row[2] != UNKNOWN_DATE
+    assert row[2] == datetime.fromtimestamp(1767751200).strftime('%Y-%m-%d')
@@ -0,0 +1,150 @@
+"""历史结果导入的测试"""
+
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from phone_spider import ingest
+from phone_spider.ingest import Ingestor, discover, parse_file
+from phone_spider.store import PhoneStore
+
+
+GROUPED = [{'city': '深圳', 'phone': ['13300000000', '13300000001', '13300000000']}]
+SCRAPY = [
+    {'phone': '13300000001', 'city': '深圳', 'min_cost': '最低消费39元/月', 'deposit': '预存100元',
+     'crawl_time': '2026-01-08 10:00:00'},
+    {'phone': '13300000001', 'city': '深圳', 'min_cost': '', 'deposit': '', 'crawl_time': '2026-01-09 10:00:00'},
+    {'phone': '13300000002', 'city': '广州', 'min_cost': '最低消费0元/月', 'crawl_time': '2026-01-08 10:00:00'},
+    {'phone': '13300000003', 'city': '', 'crawl_time': '2026-01-08 10:00:00'},
+]
+LOG = """目标城市: 深圳
+选择城市: 深圳
+  📱 13300000000 - 最低消费19元/月
+  📱 13300000004
+开始爬取城市: 广州
+  📱 13300000002 - 最低消费0元/月
+"""
+
+
+def stamp(text):
+    return int(datetime.strptime(text, '%Y-%m-%d %H:%M:%S').timestamp())
+
+
+@pytest.fixture
+def archive(tmp_path):
+    (tmp_path / 'phones_深圳_20260107_163434.json').write_text(json.dumps(GROUPED, ensure_ascii=False), encoding='utf-8')
+    (tmp_path / 'phones_multi_20260108_100000.json').write_text(json.dumps(SCRAPY, ensure_ascii=False), encoding='utf-8')
+    (tmp_path / 'spider_run.log').write_text(LOG, encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text('无关文件', encoding='utf-8')
+    return tmp_path
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PhoneStore(str(tmp_path / 'phones.db'))
+    yield store
+    store.conn.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_worker():
+    ingest._init_worker(frozenset())
+
+
+def numbers(store):
+    return {(row[0], row[1]): row[2:] for row in store.conn.execute(
+        'SELECT city, phone, min_cost_fen, deposit_fen, first_seen, last_seen, seen_count FROM numbers')}
+
+
+def test_discover(archive):
+    (archive / '.cache').mkdir()
+    (archive / '.cache' / 'phones_x.json').write_text('[]', encoding='utf-8')
+    names = [os.path.basename(p) for p in discover([str(archive)])]
+    assert names == ['phones_multi_20260108_100000.json', 'phones_深圳_20260107_163434.json', 'spider_run.log']
+    assert len(discover([str(archive)], logs=False)) == 2
+
+
+def test_parse_grouped_json_dedups_within_file(archive):
+    path = str(archive / 'phones_深圳_20260107_163434.json')
+    _, digest, rows, error = parse_file(path)
+    seen_at = stamp('2026-01-07 16:34:34')
+    assert error is None and len(digest) == 64
+    assert sorted(rows) == [('深圳', 13300000000, None, None, seen_at, seen_at),
+                            ('深圳', 13300000001, None, None, seen_at, seen_at)]
+
+
+def test_parse_scrapy_json_merges_times_and_amounts(archive):
+    _, _, rows, _ = parse_file(str(archive / 'phones_multi_20260108_100000.json'))
+    assert sorted(rows) == [
+        ('广州', 13300000002, 0, None, stamp('2026-01-08 10:00:00'), stamp('2026-01-08 10:00:00')),
+        # 后一行金额为空时保留前一行的金额，首次/最近时间取两行的范围；没有城市的行被忽略
+        ('深圳', 13300000001, 3900, 10000, stamp('2026-01-08 10:00:00'), stamp('2026-01-09 10:00:00')),
+    ]
+
+
+def test_parse_log(archive):
+    path = str(archive / 'spider_run.log')
+    _, _, rows, _ = parse_file(path)
+    mtime = int(os.path.getmtime(path))
+    assert sorted(rows) == [('广州', 13300000002, 0, None, mtime, mtime),
+                            ('深圳', 13300000000, 1900, None, mtime, mtime),
+                            ('深圳', 13300000004, None, None, mtime, mtime)]
+
+
+def test_parse_known_and_broken_files(archive, tmp_path):
+    path = str(archive / 'spider_run.log')
+    _, digest, _, _ = parse_file(path)
+    ingest._init_worker(frozenset([digest]))
+    assert parse_file(path) == (path, digest, None, None)
+    broken = tmp_path / 'phones_broken.json'
+    broken.write_text('[{', encoding='utf-8')
+    assert parse_file(str(broken))[3] is not None
+    assert parse_file(str(tmp_path / 'missing.log'))[1:3] == (None, None)
+
+
+def test_bulk_load_merges_across_batches(store):
+    rows = [('深圳', 13300000000, 1900, None, 100, 200), ('深圳', 13300000001, None, None, 150, 150)]
+    assert store.bulk_load(rows, [('a' * 64, 'a.log', 2)]) == 2
+    rows = [('深圳', 13300000000, None, 5000, 50, 120), ('深圳', 13300000000, 2900, None, 300, 300),
+            ('广州', 13300000000, None, None, 10, 10)]
+    assert store.bulk_load(rows, [('b' * 64, 'b.log', 2), ('c' * 64, 'c.log', 1)]) == 1
+    assert numbers(store) == {
+        ('深圳', 13300000000): (2900, 5000, 50, 300, 3),
+        ('深圳', 13300000001): (None, None, 150, 150, 1),
+        ('广州', 13300000000): (None, None, 10, 10, 1),
+    }
+    assert store.ingested_digests() == {'a' * 64, 'b' * 64, 'c' * 64}
+
+
+def test_ingestor_skips_known_and_duplicate_files(archive, store):
+    (archive / 'copy').mkdir()
+    (archive / 'copy' / 'phones_深圳_20260107_163434.json').write_bytes(
+        (archive / 'phones_深圳_20260107_163434.json').read_bytes())
+    paths = discover([str(archive)])
+    ingestor = Ingestor(store, jobs=1)
+    assert ingestor.run(paths) == 4
+    assert (ingestor.files, ingestor.skipped, ingestor.failed) == (3, 1, [])
+    counts = {key: row[-1] for key, row in numbers(store).items()}
+    assert counts[('深圳', 13300000000)] == 2  # 分组 JSON 和日志各一次，复制的文件不重复计数
+    assert counts[('深圳', 13300000001)] == 2
+
+    again = Ingestor(store, jobs=1)
+    assert again.run(paths) == 0
+    assert (again.files, again.skipped) == (0, 4)
+    assert {key: row[-1] for key, row in numbers(store).items()} == counts
+    assert '跳过已导入 4 个' in again.format_stats()
+
+
+def test_process_pool_matches_serial(archive, tmp_path):
+    paths = discover([str(archive)])
+    results = []
+    for jobs in (1, 2):
+        store = PhoneStore(str(tmp_path / f'jobs{jobs}.db'))
+        try:
+            Ingestor(store, jobs=jobs).run(paths)
+            results.append(numbers(store))
+        finally:
+            store.conn.close()
+    assert results[0] == results[1]
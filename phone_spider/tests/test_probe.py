@@ -0,0 +1,85 @@
+"""变化探测的测试"""
+
+import pytest
+
+from phone_spider.probe import COMPLETED, SKIPPED, STARTED, ChangeProbe
+from phone_spider.sites import SiteProfile
+from phone_spider.store import PhoneStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PhoneStore(str(tmp_path / 'phones.db'))
+    yield store
+    store.conn.close()
+
+
+def full_crawl(probe, fingerprints, city='深圳'):
+    """探测并在需要时完成全量爬取"""
+    full, reason, probe_id = probe.decide(city, fingerprints)
+    if full:
+        probe.completed(probe_id)
+    return full, reason
+
+
+def test_fingerprint_ignores_order_and_empty_is_inconclusive():
+    assert ChangeProbe.fingerprint(['13300000001', '13300000000']) == ChangeProbe.fingerprint(
+        {'13300000000', '13300000001'})
+    assert ChangeProbe.fingerprint([]) is None
+    assert ChangeProbe.fingerprint(()) is None
+
+
+def test_queries_are_evenly_spaced():
+    site = SiteProfile.resolve('gd189')
+    assert ChangeProbe(None, size=3).queries(site) == ['000*', '333*', '666*']
+    assert len(ChangeProbe(None, size=20).queries(site)) == 10
+
+
+def test_unchanged_probe_skips_full_crawl(store):
+    probe = ChangeProbe(store, full_every=6)
+    fingerprints = {'000*': 'a', '333*': 'b'}
+    assert full_crawl(probe, fingerprints) == (True, '第一次探测')
+    full, reason, _ = probe.decide('深圳', fingerprints)
+    assert not full and '相同' in reason
+    assert (probe.full, probe.skipped) == (1, 1)
+    full, reason, _ = probe.decide('深圳', {'000*': 'a', '333*': 'c'})
+    assert full and '333*' in reason
+
+
+def test_broken_probes_never_compare_equal(store):
+    probe = ChangeProbe(store, full_every=6)
+    full_crawl(probe, {'000*': 'a', '333*': 'b'})
+    # 两次连续的失败探测（超时 / 被拦截）：都无法判断，都全量爬取
+    for _ in range(2):
+        full, reason = full_crawl(probe, {'000*': 'a', '333*': None})
+        assert full and '333*' in reason and '无法判断' in reason
+        previous, status, _ = store.probe_history('深圳')
+        assert previous == {'000*': 'a'}
+        assert status == COMPLETED
+    # 失败的查询没有记录指纹，恢复后的第一次探测按有变化处理
+    full, reason = full_crawl(probe, {'000*': 'a', '333*': 'b'})
+    assert full and '333*' in reason
+    full, _, _ = probe.decide('深圳', {'000*': 'a', '333*': 'b'})
+    assert not full
+
+
+def test_all_probes_failed_on_first_run(store):
+    probe = ChangeProbe(store)
+    full, reason, _ = probe.decide('深圳', {'000*': None, '333*': None})
+    assert full and '无法判断' in reason
+    assert store.probe_history('深圳')[:2] == ({}, STARTED)
+
+
+def test_unfinished_and_periodic_full_crawls(store):
+    probe = ChangeProbe(store, full_every=2)
+    fingerprints = {'000*': 'a'}
+    full, _, _ = probe.decide('深圳', fingerprints)  # 开始了全量爬取但没有完成
+    full, reason, probe_id = probe.decide('深圳', fingerprints)
+    assert full and reason == '上一次全量爬取没有完成'
+    probe.completed(probe_id)
+    for _ in range(2):
+        full, _, _ = probe.decide('深圳', fingerprints)
+        assert not full
+    assert store.probe_history('深圳')[1:] == (SKIPPED, 2)
+    full, reason, _ = probe.decide('深圳', fingerprints)
+    assert full and '2 次运行' in reason
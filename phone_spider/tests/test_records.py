@@ -0,0 +1,61 @@
+"""爬取结果记录与流式接口的测试"""
+
+import asyncio
+
+from phone_spider.records import PhoneRecord, RecordBatch, stream_records
+
+
+class FakeCrawler:
+    """每个查询完成后调用 sink 的假爬虫"""
+
+    def __init__(self, results):
+        self.results = results
+        self.sink = None
+
+    async def run(self):
+        for city, query, phones, prices in self.results:
+            await self.sink(city, query, phones, prices)
+
+
+def collect(crawler):
+    async def main():
+        return [record async for record in stream_records(crawler, maxsize=1)]
+    return asyncio.run(main())
+
+
+def test_batch_records_keep_prices():
+    batch = RecordBatch('深圳', '888*', crawl_time=1767751200)
+    batch.append('13300000888', 3900, 10000, '最低消费39元/月', '预存100元')
+    batch.append('13300008880')
+    (priced, unpriced) = batch.records()
+    assert (priced.min_cost_fen, priced.deposit_fen) == (3900, 10000)
+    assert (unpriced.min_cost_fen, unpriced.deposit_fen) == (None, None)
+    assert priced.as_dict() == {'city': '深圳', 'query': '888*', 'phone': '13300000888', 'found_at': 1767751200,
+                                'min_cost_fen': 3900, 'deposit_fen': 10000}
+
+
+def test_streamed_record_keeps_price():
+    crawler = FakeCrawler([
+        ('深圳', '888*', ['13300008880', '13300000888'], {'13300000888': (3900, None)}),
+        ('深圳', '666*', ['13300000666'], None),
+    ])
+    records = collect(crawler)
+    assert records == [PhoneRecord('深圳', '888*', '13300000888', 0), PhoneRecord('深圳', '888*', '13300008880', 0),
+                       PhoneRecord('深圳', '666*', '13300000666', 0)]
+    assert [(r.min_cost_fen, r.deposit_fen) for r in records] == [(3900, None), (None, None), (None, None)]
+    assert crawler.sink is None
+
+
+def test_stream_reraises_crawler_error():
+    class Broken(FakeCrawler):
+        async def run(self):
+            raise RuntimeError('浏览器崩溃')
+
+    async def main():
+        try:
+            async for _ in stream_records(Broken([])):
+                pass
+        except RuntimeError as e:
+            return str(e)
+
+    assert asyncio.run(main()) == '浏览器崩溃'
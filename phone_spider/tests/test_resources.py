@@ -0,0 +1,76 @@
+"""浏览器资源监控的测试"""
+
+import asyncio
+
+from phone_spider.resources import MB, MemoryMonitor, RunningStats
+
+
+class FakeSession:
+    def __init__(self, used):
+        self.used = used
+
+    async def send(self, method):
+        assert method == 'Runtime.getHeapUsage'
+        return {'usedSize': self.used}
+
+
+class FakeBrowser:
+    async def new_browser_cdp_session(self):
+        raise RuntimeError('不支持 CDP')
+
+
+class FakeContext:
+    def __init__(self, browser, used):
+        self.browser = browser
+        self.used = used
+        self.sessions = 0
+
+    async def new_cdp_session(self, page):
+        self.sessions += 1
+        return FakeSession(self.used)
+
+
+class FakePage:
+    def __init__(self, browser, used):
+        self.context = FakeContext(browser, used)
+
+
+def test_running_stats():
+    stats = RunningStats()
+    assert (stats.count, stats.peak, stats.mean) == (0, None, None)
+    for value in (3, 9, 6):
+        stats.add(value)
+    assert (stats.count, stats.peak, stats.mean) == (3, 9, 6)
+
+
+def test_summary_without_samples():
+    assert MemoryMonitor().format_summary() == '内存: 无采样数据'
+
+
+def test_heap_budget_and_summary():
+    monitor = MemoryMonitor(heap_budget_mb=100)
+    browser = FakeBrowser()
+    small, large = FakePage(browser, 40 * MB), FakePage(browser, 160 * MB)
+
+    async def main():
+        return [await monitor.should_recycle(page) for page in (small, large, small)]
+
+    assert asyncio.run(main()) == [False, True, False]
+    summary = monitor.summary()
+    assert (summary['rss_peak_mb'], summary['heap_peak_mb'], summary['heap_avg_mb']) == (None, 160, 80)
+    assert small.context.sessions == 1  # 同一页面复用 CDP 会话
+
+
+def test_forget_releases_page_sessions():
+    monitor = MemoryMonitor()
+    browser = FakeBrowser()
+    pages = [FakePage(browser, MB) for _ in range(50)]
+
+    async def main():
+        for page in pages:
+            await monitor.sample(page)
+            monitor.forget(page)
+
+    asyncio.run(main())
+    assert monitor._page_sessions == {}
+    assert monitor._heap.count == 50
@@ -0,0 +1,111 @@
+"""重新爬取安排的测试"""
+
+import pytest
+
+from phone_spider.schedule import (DEFAULT_COST, INTERVALS, PRIOR_CHANGES, PRIOR_HOURS, RecrawlPlan, UnitEstimate,
+                                   allocate, estimate)
+from phone_spider.store import PhoneStore
+
+
+def unit(query, arrival=1.0, departure=1.0, live=10, cost=30.0, city='深圳', last_run=None):
+    return UnitEstimate(city, query, arrival, departure, live, cost, last_run)
+
+
+def budget_for(seconds_per_hour):
+    """每小时浏览器秒数 -> 每天的浏览器小时预算"""
+    return seconds_per_hour * 24 / 3600
+
+
+def test_discoveries_decrease_with_interval():
+    u = unit('000*', arrival=2.0, departure=0.5, live=10)
+    rates = [u.discoveries(i) for i in INTERVALS]
+    assert rates == sorted(rates, reverse=True)
+    assert u.discoveries(1e-6) == pytest.approx(2.0, rel=1e-3)
+    assert u.lifetime == 20
+
+
+def test_zero_budget_keeps_longest_interval():
+    units = [unit('000*'), unit('111*')]
+    used = allocate(units, 0)
+    assert [u.interval for u in units] == [INTERVALS[-1]] * 2
+    assert used == pytest.approx(2 * 30.0 / INTERVALS[-1])
+
+
+def test_large_budget_uses_shortest_interval():
+    units = [unit('000*'), unit('111*')]
+    used = allocate(units, 24)
+    assert [u.interval for u in units] == [INTERVALS[0]] * 2
+    assert used == pytest.approx(60.0)
+
+
+@pytest.mark.parametrize('seconds_per_hour', [1, 5, 12, 30, 45])
+def test_allocation_stays_within_budget(seconds_per_hour):
+    units = [unit(f'{i}{i}{i}*', arrival=0.2 * (i + 1), departure=0.1 * (i + 1), cost=10 + 5 * i)
+             for i in range(10)]
+    floor = sum(u.usage(INTERVALS[-1]) for u in units)
+    used = allocate(units, budget_for(seconds_per_hour))
+    assert used == pytest.approx(sum(u.usage(u.interval) for u in units))
+    # 最长间隔的占用是下限，预算更少时不再缩短任何间隔
+    assert used <= max(seconds_per_hour, floor) + 1e-9
+    # 预算内不能再缩短任何一档
+    for u in units:
+        index = INTERVALS.index(u.interval)
+        if index:
+            assert used + u.usage(INTERVALS[index - 1]) - u.usage(u.interval) > seconds_per_hour
+
+
+def test_faster_and_cheaper_units_refresh_more_often():
+    fast, slow = unit('000*', arrival=5.0, departure=5.0), unit('111*', arrival=0.05, departure=0.05)
+    cheap, costly = unit('222*', cost=5.0), unit('333*', cost=60.0)
+    allocate([fast, slow, cheap, costly], budget_for(20))
+    assert fast.interval < slow.interval
+    assert cheap.interval < costly.interval
+
+
+def test_allocate_resets_previous_intervals():
+    units = [unit('000*'), unit('111*')]
+    allocate(units, 24)
+    allocate(units, 0)
+    assert [u.interval for u in units] == [INTERVALS[-1]] * 2
+
+
+def test_estimate_priors():
+    # (城市, 查询, 运行次数, 新增, 下架, 间隔秒数, 平均耗时, 最近运行, 最近号码数)
+    history = [('深圳', '000*', 5, 40, 20, 36000, 12.0, 1000, 30)]
+    units = {(u.city, u.query): u for u in estimate(history, ['深圳', '广州'], ['000*', '111*'])}
+    city_arrival = (40 + PRIOR_CHANGES) / (10 + PRIOR_HOURS)
+    city_departure = (20 + PRIOR_CHANGES) / (10 + PRIOR_HOURS)
+    observed = units[('深圳', '000*')]
+    assert observed.arrival == pytest.approx((40 + city_arrival * PRIOR_HOURS) / (10 + PRIOR_HOURS))
+    assert observed.departure == pytest.approx((20 + city_departure * PRIOR_HOURS) / (10 + PRIOR_HOURS))
+    assert (observed.cost, observed.live, observed.last_run) == (12.0, 30, 1000)
+    # 没有历史的查询沿用城市速度，没有历史的城市沿用全局速度（这里只有深圳一个城市）
+    new_query = units[('深圳', '111*')]
+    assert (new_query.arrival, new_query.departure) == pytest.approx((city_arrival, city_departure))
+    assert (new_query.cost, new_query.live, new_query.last_run) == (12.0, 30, None)
+    assert units[('广州', '000*')].arrival == pytest.approx(city_arrival)
+
+
+def test_estimate_without_history():
+    (u,) = estimate([], ['深圳'], ['000*'])
+    assert u.arrival == pytest.approx(PRIOR_CHANGES / PRIOR_HOURS)
+    assert u.cost == DEFAULT_COST
+
+
+def test_plan_from_store(tmp_path):
+    store = PhoneStore(str(tmp_path / 'phones.db'))
+    try:
+        for started, phones in ((1000.25, ['13300000000', '13300001000']), (4600.75, ['13300000000', '13300002000'])):
+            finished = started + 12.5
+            store.observe('深圳', '000*', 'search', phones, seen_at=finished)
+            store.record_run('深圳', '000*', phones, started, finished)
+        history = store.run_history()
+        assert history == [('深圳', '000*', 2, 1, 1, pytest.approx(3600.5), pytest.approx(12.5),
+                            pytest.approx(4613.25), 2)]
+        plan = RecrawlPlan.build(store, ['深圳'], ['000*', '111*'], 24)
+    finally:
+        store.conn.close()
+    assert {u.query: u.interval for u in plan.units} == {'000*': 1, '111*': 1}
+    assert plan.due(now=4613.25 + 1800) == {'深圳': ['111*']}
+    assert sorted(plan.due(now=4613.25 + 3600)['深圳']) == ['000*', '111*']
+    assert '深圳' in plan.format_report(now=4613.25)
@@ -0,0 +1,78 @@
+"""会话快照缓存的测试"""
+
+import asyncio
+import os
+
+from phone_spider.session import StorageStateCache
+
+
+class FakeContext:
+    def __init__(self, storage_state=None):
+        self.storage = storage_state
+        self.scripts = []
+
+    async def storage_state(self):
+        return self.storage
+
+    async def add_init_script(self, script):
+        self.scripts.append(script)
+
+
+class FakeBrowser:
+    async def new_context(self, storage_state=None, **kwargs):
+        return FakeContext(storage_state)
+
+
+class FakePage:
+    def __init__(self, storage, session):
+        self.context = FakeContext(storage)
+        self.session = session
+
+    async def evaluate(self, script):
+        if 'origin' in script:
+            return 'https://example.com'
+        return self.session
+
+
+def capture(cache, site, city, cookie):
+    page = FakePage({'cookies': [{'name': 'city', 'value': cookie}], 'origins': []}, {'area': cookie})
+    asyncio.run(cache.capture(page, site, city))
+
+
+def test_snapshots_are_keyed_by_site_and_city(tmp_path):
+    cache = StorageStateCache(str(tmp_path))
+    capture(cache, 'portal-a', '深圳', 'a-sz')
+    capture(cache, 'portal-b', '深圳', 'b-sz')
+
+    assert cache.path('portal-a', '深圳') != cache.path('portal-b', '深圳')
+    assert sorted(os.listdir(tmp_path)) == ['portal-a-深圳.json', 'portal-b-深圳.json']
+    assert cache.load('portal-a', '深圳')['storage']['cookies'][0]['value'] == 'a-sz'
+    assert cache.load('portal-b', '深圳')['storage']['cookies'][0]['value'] == 'b-sz'
+    assert cache.load('portal-a', '广州') is None
+
+    context, restored = asyncio.run(cache.new_context(FakeBrowser(), 'portal-b', '深圳'))
+    assert restored
+    assert context.storage['cookies'][0]['value'] == 'b-sz'
+    assert 'b-sz' in context.scripts[0]
+
+    # 一个网站的快照失效不影响另一个网站的同名城市
+    cache.invalidate('portal-a', '深圳')
+    assert cache.load('portal-a', '深圳') is None
+    assert cache.load('portal-b', '深圳') is not None
+    context, restored = asyncio.run(cache.new_context(FakeBrowser(), 'portal-a', '深圳'))
+    assert not restored and context.storage is None
+
+
+def test_snapshot_of_another_site_is_ignored(tmp_path):
+    cache = StorageStateCache(str(tmp_path))
+    capture(cache, 'portal-a', '深圳', 'a-sz')
+    # 文件名冲突（如网站名包含 "-"）时，也不会把别的网站的快照注入进来
+    os.replace(cache.path('portal-a', '深圳'), cache.path('portal', 'a-深圳'))
+    assert cache.load('portal', 'a-深圳') is None
+
+
+def test_expired_snapshot(tmp_path):
+    cache = StorageStateCache(str(tmp_path), max_age=-1)
+    capture(cache, 'portal-a', '深圳', 'a-sz')
+    assert cache.captured == 1
+    assert cache.load('portal-a', '深圳') is None
@@ -0,0 +1,149 @@
+"""分阶段管道的测试"""
+
+import asyncio
+import logging
+
+import pytest
+
+from phone_spider.deadline import DeadlineExceeded
+from phone_spider.stages import Pipeline, QueryResult, Stage
+
+
+def test_pipeline_passes_items_through_stages():
+    seen = []
+
+    async def main():
+        pipeline = Pipeline([Stage('double', lambda x: x * 2), Stage('collect', seen.append, thread=True)])
+        pipeline.start()
+        for i in range(5):
+            await pipeline.put(i, 'browse', 0)
+        await pipeline.close()
+
+    asyncio.run(main())
+    assert sorted(seen) == [0, 2, 4, 6, 8]
+
+
+def test_item_error_is_logged_and_skipped(caplog):
+    seen = []
+
+    def parse(item):
+        if item.query == '444*':
+            raise ValueError('页面结构变了')
+        return item
+
+    async def main():
+        stages = [Stage('parse', parse, thread=True), Stage('enrich', seen.append)]
+        pipeline = Pipeline(stages)
+        pipeline.start()
+        for query in ('000*', '444*', '888*'):
+            await pipeline.put(QueryResult('深圳', query, 0, [], []), 'browse', 0)
+        await pipeline.close()
+        return stages[0]
+
+    with caplog.at_level(logging.WARNING, logger='phone_spider'):
+        parse_stage = asyncio.run(main())
+    assert [item.query for item in seen] == ['000*', '888*']
+    assert parse_stage.errors == 1
+    (record,) = [r for r in caplog.records if r.name == 'phone_spider.parse']
+    assert '页面结构变了' in record.getMessage()
+    assert record.fields == {'city': '深圳', 'query': '444*', 'error': '页面结构变了'}
+
+
+def test_cancel_reaps_workers():
+    async def main():
+        async def slow(item):
+            await asyncio.sleep(60)
+
+        pipeline = Pipeline([Stage('slow', slow, workers=3)])
+        pipeline.start()
+        await pipeline.put(1, 'browse', 0)
+        await asyncio.sleep(0)
+        await pipeline.cancel()
+        await pipeline.cancel()  # 重复取消什么都不做
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert asyncio.run(main()) == []
+
+
+def test_thread_stage_rejects_coroutine_handler():
+    async def handler(item):
+        return item
+
+    with pytest.raises(ValueError):
+        Stage('parse', handler, thread=True)
+
+
+def test_query_result_prices_default_empty():
+    assert QueryResult('深圳', '000*', 0, [], []).prices == {}
+    prices = {'13300000000': (3900, None)}
+    assert QueryResult('深圳', '000*', 0, ['13300000000'], [], prices=prices).prices is prices
+
+
+# 以下测试 spider_simple 的管道版本（不启动浏览器）
+
+spider_simple = pytest.importorskip('spider_simple')
+
+
+class FakePlaywright:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def make_crawler(monkeypatch, **kwargs):
+    from phone_spider.stages import parse_workers
+
+    crawler = spider_simple.TelecomCrawler(city='深圳', pipeline=parse_workers(), **kwargs)
+    crawler.save = False
+    monkeypatch.setattr(spider_simple, 'async_playwright', FakePlaywright)
+
+    async def launch(p):
+        return object()
+
+    async def close(browser):
+        pass
+
+    monkeypatch.setattr(crawler, '_launch', launch)
+    monkeypatch.setattr(crawler, '_close', close)
+    return crawler
+
+
+def test_pipeline_deadline_during_probe_still_finishes(monkeypatch):
+    crawler = make_crawler(monkeypatch, probe=object())
+    finished = []
+
+    async def probe_new_page(browser):
+        raise DeadlineExceeded()
+
+    async def finish():
+        finished.append(True)
+
+    monkeypatch.setattr(crawler, '_probe_new_page', probe_new_page)
+    monkeypatch.setattr(crawler, '_finish', finish)
+    asyncio.run(crawler._run_pipeline())
+    assert finished == [True]
+    assert all(not stage._tasks for stage in crawler._pipeline.stages)
+
+
+def test_pipeline_xhr_prices_reach_stream(monkeypatch):
+    crawler = make_crawler(monkeypatch, extraction='xhr')
+    received = []
+
+    async def sink(city, query, phones, prices=None):
+        received.append((query, sorted(phones), dict(prices or {})))
+
+    crawler.sink = sink
+    result = QueryResult('深圳', '888*', 0, ['13300000888', '13300001234'], ['13300008880'],
+                         prices={'13300000888': (3900, 10000), '13300008880': (0, None)})
+
+    async def main():
+        parsed = crawler._parse(result)
+        return await crawler._enrich(parsed)
+
+    asyncio.run(main())
+    query, phones, prices = received[0]
+    assert (query, phones) == ('888*', ['13300000888', '13300008880'])
+    assert prices['13300000888'] == (3900, 10000)
+    assert result.observed == {'search': {'13300000888', '13300001234'}, 'recommend': {'13300008880'}}
@@ -0,0 +1,99 @@
+"""关注列表匹配引擎的测试"""
+
+import json
+import random
+import re
+
+import pytest
+
+from phone_spider.watchlist import WatchList, parse_spec
+
+
+SPECS = ['520', 'contains:1314', 'suffix:8888', 'prefix:133', 'glob:*8?88', 'glob:1??0*',
+         'glob:*6?6?6', 'glob:???????????', 'exclude:4', 'exclude:47', 'only:01689']
+
+
+def reference_match(spec, phone):
+    """逐条规则直接判断，用作对照"""
+    kind, value = parse_spec(spec)
+    if kind == 'contains':
+        return value in phone
+    if kind == 'suffix':
+        return phone.endswith(value)
+    if kind == 'prefix':
+        return phone.startswith(value)
+    if kind == 'glob':
+        body, anchored_start, anchored_end = value
+        pattern = body.replace('?', r'\d')
+        pattern = ('^' if anchored_start else '') + pattern + ('$' if anchored_end else '')
+        return re.search(pattern, phone) is not None
+    digits = {str(d) for d in range(10) if value >> d & 1}
+    if kind == 'exclude':
+        return not digits & set(phone)
+    return set(phone) <= digits
+
+
+def build(specs, subscriber='张三'):
+    watchlist = WatchList()
+    for spec in specs:
+        watchlist.add(subscriber, spec)
+    return watchlist
+
+
+@pytest.mark.parametrize('phone, expected', [
+    ('13352088888', {'520', 'suffix:8888', 'prefix:133', 'glob:*8?88', 'glob:???????????', 'exclude:4', 'exclude:47'}),
+    ('18900001314', {'contains:1314', 'glob:1??0*', 'glob:???????????'}),
+    ('19916161616', {'glob:*6?6?6', 'glob:???????????', 'exclude:4', 'exclude:47', 'only:01689'}),
+])
+def test_match_specs(phone, expected):
+    assert build(SPECS).match_specs(phone) == expected
+
+
+def test_matches_reference_on_random_phones():
+    watchlist = build(SPECS)
+    rng = random.Random(20260107)
+    for _ in range(2000):
+        phone = '1' + ''.join(rng.choice('0146889') for _ in range(10))
+        expected = {spec for spec in SPECS if reference_match(spec, phone)}
+        assert watchlist.match_specs(phone) == expected, phone
+
+
+def test_glob_segments_must_share_start():
+    # 两个片段各自出现但不在同一起点时不算命中
+    watchlist = build(['glob:*12?34*'])
+    assert watchlist.match_specs('13812034000') == {'glob:*12?34*'}
+    assert watchlist.match_specs('13812003400') == set()
+
+
+def test_shared_spec_reports_every_subscriber():
+    watchlist = WatchList()
+    watchlist.add('张三', 'suffix:8888')
+    watchlist.add('李四', ' suffix:8888 ')
+    watchlist.add('李四', 'exclude:4')
+    hits = watchlist.match_many(['13300008888', '14400008888'])
+    assert sorted(hits['张三']) == [('13300008888', 'suffix:8888'), ('14400008888', 'suffix:8888')]
+    assert sorted(hits['李四']) == [('13300008888', 'exclude:4'), ('13300008888', 'suffix:8888'),
+                                   ('14400008888', 'suffix:8888')]
+    assert len(watchlist) == 3
+
+
+def test_add_after_match_recompiles():
+    watchlist = build(['suffix:8888'])
+    assert watchlist.match_specs('13300000520') == set()
+    watchlist.add('张三', '520')
+    assert watchlist.match_specs('13300000520') == {'520'}
+
+
+@pytest.mark.parametrize('spec', ['suffix:88a8', 'prefix:', 'glob:8*8', 'glob:*', 'exclude:x', 'regex:.*'])
+def test_invalid_spec(spec):
+    with pytest.raises(ValueError):
+        WatchList().add('张三', spec)
+
+
+def test_load(tmp_path):
+    path = tmp_path / 'watch.json'
+    path.write_text(json.dumps({'张三': ['suffix:8888', 'exclude:4'], '李四': 'contains:520'}), encoding='utf-8')
+    watchlist = WatchList.load(path)
+    assert len(watchlist) == 3
+    assert sorted(watchlist.match('13352088888')) == [
+        ('张三', 'exclude:4'), ('张三', 'suffix:8888'), ('李四', 'contains:520')]
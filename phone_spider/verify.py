@@ -0,0 +1,145 @@
+"""
+批量核对号码是否仍在售
+
+不需要全量爬取：网站按尾号搜索时返回后7位（站点配置的 match_digits）包含该尾号的号码，所以一个尾号查询
+可以同时核对所有后7位包含它的号码。先用较短的尾号（默认3位）做贪心集合覆盖，让一个查询覆盖尽量多的号码；
+某个查询的结果翻页没翻完或提取出错时，其中没找到的号码改用更长（更精确）的尾号再查，最长为站点允许的位数（4位）。
+查询按站点配置的语法生成（如 gd189 的 "000*"）。
+
+每个号码的结论：
+    available    在搜索结果中出现
+    unavailable  查询结果完整但没有出现
+    unknown      最长尾号的结果仍不完整，或查询一直出错
+
+使用方法:
+    python -m phone_spider verify numbers.txt --city 深圳
+"""
+
+import json
+import re
+
+from phone_spider.sites import SiteProfile
+
+
+PHONE_RE = re.compile(r'(?<!\d)1\d{10}(?!\d)')
+
+AVAILABLE = 'available'
+UNAVAILABLE = 'unavailable'
+UNKNOWN = 'unknown'
+
+
+def load_numbers(path):
+    """从文件中提取所有11位手机号（txt/csv/json 均可），去重并保持顺序"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    return list(dict.fromkeys(PHONE_RE.findall(text)))
+
+
+def candidate_tails(phone, digits, window=7):
+    """号码后 window 位中所有长度为 digits 的子串（都能作为尾号查询找到该号码）"""
+    last = phone[-window:]
+    return {last[i:i + digits] for i in range(len(last) - digits + 1)}
+
+
+def plan_queries(phones, digits, site=None):
+    """贪心集合覆盖：选出覆盖全部号码的 digits 位尾号查询
+
+    Args:
+        site: 站点配置（名称、路径或 SiteProfile，默认 gd189），决定查询语法和匹配的位数
+
+    Returns:
+        {查询: [该查询负责核对的号码]}，按覆盖号码数从多到少
+    """
+    site = SiteProfile.resolve(site)
+    by_tail = {}
+    tails_of = {}
+    for phone in set(phones):
+        tails_of[phone] = candidate_tails(phone, digits, site.match_digits)
+        for tail in tails_of[phone]:
+            by_tail.setdefault(tail, set()).add(phone)
+
+    plan = {}
+    while by_tail:
+        tail = max(by_tail, key=lambda t: (len(by_tail[t]), t))
+        covered = by_tail.pop(tail)
+        plan[site.make_query(tail)] = sorted(covered)
+        # 已覆盖的号码从其它候选尾号中移除
+        for phone in covered:
+            for other in tails_of[phone]:
+                group = by_tail.get(other)
+                if group is not None:
+                    group.discard(phone)
+                    if not group:
+                        del by_tail[other]
+    return plan
+
+
+class BulkVerifier:
+    """批量核对
+
+    Args:
+        search: 异步函数 search(查询) -> (找到的号码集合, 结果是否完整)
+        start_digits: 第一轮使用的尾号位数（1 到站点允许的最长位数）
+        site: 站点配置（名称、路径或 SiteProfile，默认 gd189）
+    """
+
+    def __init__(self, search, start_digits=3, site=None):
+        self.site = SiteProfile.resolve(site)
+        if not 1 <= start_digits <= self.site.max_tail_digits:
+            raise ValueError(f'尾号位数必须在 1-{self.site.max_tail_digits} 之间')
+        self.search = search
+        self.start_digits = start_digits
+        self.searches = 0
+        self.rounds = []  # [(尾号位数, 查询数, 待核对号码数)]
+
+    async def verify(self, phones):
+        """核对号码
+
+        Returns:
+            {号码: available / unavailable / unknown}
+        """
+        phones = [str(p) for p in phones]
+        status = {}
+        pending = list(dict.fromkeys(phones))
+        for digits in range(self.start_digits, self.site.max_tail_digits + 1):
+            if not pending:
+                break
+            plan = plan_queries(pending, digits, self.site)
+            self.rounds.append((digits, len(plan), len(pending)))
+            refine = []
+            for query, group in plan.items():
+                self.searches += 1
+                try:
+                    found, complete = await self.search(query)
+                except Exception:
+                    found, complete = set(), False
+                for phone in group:
+                    if phone in found:
+                        status[phone] = AVAILABLE
+                    elif complete:
+                        status[phone] = UNAVAILABLE
+                    else:
+                        refine.append(phone)
+            pending = refine
+        for phone in pending:
+            status[phone] = UNKNOWN
+        return {phone: status[phone] for phone in phones}
+
+    def format_stats(self, total):
+        rounds = '，'.join(f'{d}位尾号 {q} 次查询（{n} 个号码）' for d, q, n in self.rounds)
+        return f'核对 {total} 个号码共搜索 {self.searches} 次: {rounds}'
+
+
+def print_report(result):
+    counts = {AVAILABLE: 0, UNAVAILABLE: 0, UNKNOWN: 0}
+    labels = {AVAILABLE: '✅ 在售', UNAVAILABLE: '❌ 已下架', UNKNOWN: '❔ 无法确认'}
+    for phone, state in result.items():
+        counts[state] += 1
+        print(f'  {labels[state]}  {phone}')
+    print(f'在售 {counts[AVAILABLE]} 个，已下架 {counts[UNAVAILABLE]} 个，无法确认 {counts[UNKNOWN]} 个')
+
+
+def save_report(result, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f'\n📁 核对结果已保存到: {path}')
@@ -0,0 +1,268 @@
+"""
+号码关注列表（watch-list）匹配引擎
+
+每个订阅者可以登记任意多个号码形状，所有形状编译成一个 Aho-Corasick 自动机，
+每个号码只需单次扫描就能得到全部订阅者的命中，匹配成本与关注规则的数量基本无关。
+
+支持的规则写法:
+    contains:520      号码中任意位置包含 520（不写前缀时默认为 contains）
+    suffix:8888       以 8888 结尾
+    prefix:133        以 133 开头
+    glob:*8?88        通配：? 匹配任意一位数字，* 只能出现在开头或结尾
+                      （没有前导 * 表示从号码开头对齐，没有结尾 * 表示对齐到号码末尾）
+    exclude:4         号码中不含数字 4（可写多个数字，如 exclude:47）
+    only:01689        号码只由这些数字组成
+
+关注列表文件（JSON）:
+    {"张三": ["suffix:8888", "exclude:4"], "李四": ["contains:520"]}
+"""
+
+import json
+
+
+DIGITS = '0123456789'
+ALL_DIGITS_MASK = (1 << 10) - 1
+
+
+def _digit_mask(digits):
+    mask = 0
+    for d in digits:
+        mask |= 1 << (ord(d) - 48)
+    return mask
+
+
+def _submasks(mask):
+    """枚举 mask 的所有子集（含 0 和 mask 本身）"""
+    sub = mask
+    while True:
+        yield sub
+        if sub == 0:
+            return
+        sub = (sub - 1) & mask
+
+
+def parse_spec(spec):
+    """把规则字符串解析为 (类型, 参数)，非法规则抛出 ValueError"""
+    spec = spec.strip()
+    kind, sep, value = spec.partition(':')
+    if not sep:
+        kind, value = 'contains', spec
+    kind = kind.strip().lower()
+    value = value.strip()
+
+    if kind in ('contains', 'suffix', 'prefix'):
+        if not value or not value.isdigit():
+            raise ValueError(f'规则 {spec!r} 只能包含数字')
+        return kind, value
+    if kind == 'glob':
+        body = value
+        anchored_start = not body.startswith('*')
+        anchored_end = not body.endswith('*')
+        body = body.strip('*')
+        if not body or any(c not in DIGITS + '?' for c in body):
+            raise ValueError(f'规则 {spec!r} 只能包含数字、? 和首尾的 *')
+        return kind, (body, anchored_start, anchored_end)
+    if kind in ('exclude', 'only'):
+        if not value or not value.isdigit():
+            raise ValueError(f'规则 {spec!r} 只能包含数字')
+        return kind, _digit_mask(value)
+    raise ValueError(f'未知的规则类型: {spec!r}')
+
+
+class WatchList:
+    """关注列表：登记规则 → 编译 → 匹配"""
+
+    def __init__(self):
+        self._subscribers = {}  # 规范化规则 -> 订阅者列表
+        self._compiled = False
+
+    def add(self, subscriber, spec):
+        """登记一条规则（相同规则的多个订阅者共享一次匹配）"""
+        parse_spec(spec)
+        self._subscribers.setdefault(spec.strip(), []).append(subscriber)
+        self._compiled = False
+
+    def __len__(self):
+        return sum(len(v) for v in self._subscribers.values())
+
+    @classmethod
+    def load(cls, path):
+        """从 JSON 文件加载关注列表"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        watchlist = cls()
+        for subscriber, specs in data.items():
+            if isinstance(specs, str):
+                specs = [specs]
+            for spec in specs:
+                watchlist.add(subscriber, spec)
+        return watchlist
+
+    def compile(self):
+        """把所有规则编译成 Aho-Corasick 自动机和数字集合索引"""
+        self._specs = list(self._subscribers)
+        # 字面量片段 -> [(规则编号, 片段在规则中的偏移)]
+        literals = {}
+        # 规则编号 -> (规则长度, 片段数, 是否对齐开头, 是否对齐末尾)
+        self._shapes = {}
+        # 只有 ? 的通配规则：(规则编号, 长度, 对齐开头, 对齐末尾)
+        self._wildcard_only = []
+        self._exclude = {}  # 排除数字掩码 -> [规则编号]
+        self._only = {}     # 允许数字掩码 -> [规则编号]
+
+        for spec_id, spec in enumerate(self._specs):
+            kind, value = parse_spec(spec)
+            if kind == 'contains':
+                segments, shape = [(value, 0)], (len(value), 1, False, False)
+            elif kind == 'suffix':
+                segments, shape = [(value, 0)], (len(value), 1, False, True)
+            elif kind == 'prefix':
+                segments, shape = [(value, 0)], (len(value), 1, True, False)
+            elif kind == 'glob':
+                body, anchored_start, anchored_end = value
+                segments = []
+                offset = 0
+                for part in body.split('?'):
+                    if part:
+                        segments.append((part, offset))
+                    offset += len(part) + 1
+                shape = (len(body), len(segments), anchored_start, anchored_end)
+                if not segments:
+                    self._wildcard_only.append((spec_id,) + (len(body), anchored_start, anchored_end))
+                    continue
+            elif kind == 'exclude':
+                self._exclude.setdefault(value, []).append(spec_id)
+                continue
+            else:
+                self._only.setdefault(value, []).append(spec_id)
+                continue
+            self._shapes[spec_id] = shape
+            for literal, offset in segments:
+                literals.setdefault(literal, []).append((spec_id, offset))
+
+        self._build_automaton(literals)
+        self._compiled = True
+
+    def _build_automaton(self, literals):
+        # goto 表：每个状态 10 个出边，-1 表示不存在
+        goto = [[-1] * 10]
+        outputs = [[]]
+        for literal, requirements in literals.items():
+            state = 0
+            for ch in literal:
+                d = ord(ch) - 48
+                if goto[state][d] == -1:
+                    goto.append([-1] * 10)
+                    outputs.append([])
+                    goto[state][d] = len(goto) - 1
+                state = goto[state][d]
+            outputs[state].extend((spec_id, offset, len(literal)) for spec_id, offset in requirements)
+
+        # BFS 计算失败指针，并把 goto 补全为确定性转移表
+        fail = [0] * len(goto)
+        queue = []
+        for d in range(10):
+            nxt = goto[0][d]
+            if nxt == -1:
+                goto[0][d] = 0
+            else:
+                queue.append(nxt)
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            outputs[state].extend(outputs[fail[state]])
+            for d in range(10):
+                nxt = goto[state][d]
+                if nxt == -1:
+                    goto[state][d] = goto[fail[state]][d]
+                else:
+                    fail[nxt] = goto[fail[state]][d]
+                    queue.append(nxt)
+
+        self._goto = goto
+        self._outputs = [tuple(o) for o in outputs]
+
+    def match_specs(self, phone):
+        """返回号码命中的规则集合"""
+        if not self._compiled:
+            self.compile()
+        phone = str(phone)
+        n = len(phone)
+        hits = set()
+
+        # 1. 单次扫描自动机，统计每个 (规则, 起点) 命中的片段数
+        votes = {}
+        goto = self._goto
+        outputs = self._outputs
+        shapes = self._shapes
+        state = 0
+        for pos, ch in enumerate(phone):
+            d = ord(ch) - 48
+            if d < 0 or d > 9:
+                state = 0
+                continue
+            state = goto[state][d]
+            for spec_id, offset, length in outputs[state]:
+                start = pos - length + 1 - offset
+                size, segments, anchored_start, anchored_end = shapes[spec_id]
+                if start < 0 or start + size > n:
+                    continue
+                if anchored_start and start != 0:
+                    continue
+                if anchored_end and start + size != n:
+                    continue
+                if segments == 1:
+                    hits.add(spec_id)
+                    continue
+                key = (spec_id, start)
+                count = votes.get(key, 0) + 1
+                votes[key] = count
+                if count == segments:
+                    hits.add(spec_id)
+
+        for spec_id, size, anchored_start, anchored_end in self._wildcard_only:
+            if size > n:
+                continue
+            if anchored_start and anchored_end and size != n:
+                continue
+            hits.add(spec_id)
+
+        # 2. 数字集合规则：枚举号码未出现数字集合的子集，按掩码查表
+        if self._exclude or self._only:
+            present = _digit_mask(c for c in phone if c.isdigit())
+            absent = ALL_DIGITS_MASK & ~present
+            for sub in _submasks(absent):
+                if sub:
+                    hits.update(self._exclude.get(sub, ()))
+                hits.update(self._only.get(present | sub, ()))
+
+        return {self._specs[spec_id] for spec_id in hits}
+
+    def match(self, phone):
+        """返回号码命中的 [(订阅者, 规则)]"""
+        result = []
+        for spec in self.match_specs(phone):
+            for subscriber in self._subscribers[spec]:
+                result.append((subscriber, spec))
+        return result
+
+    def match_many(self, phones):
+        """批量匹配，返回 {订阅者: [(号码, 规则), ...]}"""
+        result = {}
+        for phone in phones:
+            for subscriber, spec in self.match(phone):
+                result.setdefault(subscriber, []).append((phone, spec))
+        return result
+
+
+def print_hits(hits):
+    """按订阅者打印命中结果"""
+    if not hits:
+        print('🔔 关注列表: 没有命中')
+        return
+    print(f'🔔 关注列表: {len(hits)} 个订阅者有命中')
+    for subscriber in sorted(hits):
+        print(f'  {subscriber}: {len(hits[subscriber])} 条命中')
+        for phone, spec in sorted(hits[subscriber]):
+            print(f'    {phone}  ({spec})')
@@ -0,0 +1,317 @@
+"""
+接口响应提取
+
+选号页面先通过 XHR/fetch 取得号码数据，再由 Vue 渲染成 ul > li。接口响应提取模式在触发搜索前
+监听 page.on('response')，直接把搜索/翻页接口和推荐接口返回的 JSON 解码成
+(号码, 最低消费分, 预存话费分)：响应一到就结束，不等待渲染和固定的 sleep，金额也不必从文字中解析。
+
+接口地址可以在站点配置中指定（xhr_search / xhr_recommend，URL 中的片段），没有指定时自动识别：
+请求参数（URL 查询串、路径或请求体）中带有本次查询的才可能是搜索接口，其中响应带分页标志或路径像搜索的
+记为搜索接口，路径像推荐的记为推荐接口；不带本次查询的（如页面加载时的推荐请求）只会当作推荐响应。
+证据不足（不带查询，或带查询但既没有分页标志也看不出路径）时只在本次查询中使用，不记住该接口。
+已确认的搜索接口返回空列表表示没有结果，立即结束；返回的形状不符（找不到号码列表）时立即退回 DOM 提取。
+
+使用方法:
+    python -m phone_spider crawl --city 深圳 --extract xhr
+"""
+
+import asyncio
+import json
+import re
+from urllib.parse import parse_qsl, unquote, urlparse
+
+from phone_spider.export import parse_amount_fen
+
+
+MODES = ('dom', 'xhr')
+PHONE_RE = re.compile(r'^1\d{10}$')
+# 监听的请求类型
+RESOURCE_TYPES = ('xhr', 'fetch')
+# 等待推荐接口响应的最长时间（秒）；自动识别时前几个查询都没有推荐响应就不再等待
+RECOMMEND_WAIT = 1.0
+RECOMMEND_PROBES = 3
+# 自动识别时接口路径中的提示词
+SEARCH_HINTS = ('search', 'query', 'select', 'list')
+RECOMMEND_HINTS = ('recommend', 'recom', 'tuijian', 'guess')
+
+
+def request_values(request):
+    """请求中出现的参数值：URL 查询串、路径的每一段，以及表单或 JSON 请求体中的值"""
+    parsed = urlparse(request.url)
+    values = [unquote(part) for part in parsed.path.split('/') if part]
+    values.extend(value for _, value in parse_qsl(parsed.query))
+    body = request.post_data
+    if body:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            values.extend(value for _, value in parse_qsl(body))
+        else:
+            stack = [data]
+            while stack:
+                node = stack.pop()
+                if isinstance(node, dict):
+                    stack.extend(node.values())
+                elif isinstance(node, list):
+                    stack.extend(node)
+                elif node is not None:
+                    values.append(str(node))
+    return values
+
+
+def carries_query(request, query, tail):
+    """请求参数中是否带有本次查询（原样或去掉通配符后的尾号）"""
+    wanted = {str(query).strip(), tail}
+    return any(str(value).strip() in wanted for value in request_values(request))
+
+
+def _to_fen(value):
+    """接口中的金额（元，数字或文字）-> 整数分"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value * 100))
+    text = str(value).strip()
+    try:
+        return int(round(float(text) * 100))
+    except ValueError:
+        return parse_amount_fen(text)
+
+
+class Payload:
+    """一个接口响应解码后的结果
+
+    Args:
+        records: [(号码, 最低消费分, 预存话费分)]
+        has_more: 是否还有下一页（响应中没有该字段时为 False）
+        paged: 响应中是否有分页字段（自动识别接口时作为搜索接口的证据）
+    """
+
+    __slots__ = ('records', 'has_more', 'paged')
+
+    def __init__(self, records, has_more=False, paged=False):
+        self.records = records
+        self.has_more = has_more
+        self.paged = paged
+
+
+class PayloadDecoder:
+    """按站点配置中的字段名解码接口响应
+
+    Args:
+        site: SiteProfile
+    """
+
+    def __init__(self, site):
+        self.phone_fields = tuple(site.xhr_phone_fields)
+        self.min_cost_fields = tuple(site.xhr_min_cost_fields)
+        self.deposit_fields = tuple(site.xhr_deposit_fields)
+        self.more_fields = tuple(site.xhr_more_fields)
+
+    def _field(self, item, names):
+        for name in names:
+            if name in item:
+                return item[name]
+        return None
+
+    def _is_record(self, item):
+        if not isinstance(item, dict):
+            return False
+        phone = self._field(item, self.phone_fields)
+        return phone is not None and PHONE_RE.match(str(phone)) is not None
+
+    def _find(self, node, allow_empty):
+        """深度优先查找号码列表，返回 (列表, 所在的对象)"""
+        stack = [(node, None)]
+        empty = None
+        while stack:
+            value, parent = stack.pop()
+            if isinstance(value, list):
+                if value and self._is_record(value[0]):
+                    return value, parent
+                if not value and empty is None:
+                    empty = (value, parent)
+                stack.extend((v, None) for v in value if isinstance(v, (dict, list)))
+            elif isinstance(value, dict):
+                stack.extend((v, value) for v in value.values() if isinstance(v, (dict, list)))
+        return empty if allow_empty and empty is not None else (None, None)
+
+    def _more_flag(self, body, parent):
+        """分页标志：先看号码列表所在的对象，再看响应的最外层；没有该字段时返回 None"""
+        for node in (parent, body):
+            if isinstance(node, dict):
+                value = self._field(node, self.more_fields)
+                if value is not None:
+                    return bool(value)
+        return None
+
+    def decode(self, body, allow_empty=False):
+        """解码一个 JSON 响应
+
+        Args:
+            body: 已解析的 JSON
+            allow_empty: 是否接受空列表（已知是搜索接口时，空列表表示没有结果）
+
+        Returns:
+            Payload，找不到号码列表时返回 None
+        """
+        items, parent = self._find(body, allow_empty)
+        if items is None:
+            return None
+        records = []
+        for item in items:
+            if not self._is_record(item):
+                continue
+            records.append((str(self._field(item, self.phone_fields)),
+                            _to_fen(self._field(item, self.min_cost_fields)),
+                            _to_fen(self._field(item, self.deposit_fields))))
+        more = self._more_flag(body, parent)
+        return Payload(records, bool(more), more is not None)
+
+
+class XhrEndpoints:
+    """搜索/推荐接口（配置的或自动识别的），以及解码统计（一个爬虫内共享）
+
+    Args:
+        site: SiteProfile
+    """
+
+    def __init__(self, site):
+        self.decoder = PayloadDecoder(site)
+        self.search = site.xhr_search
+        self.recommend = site.xhr_recommend
+        self.decoded = 0  # 通过接口响应完成的查询数
+        self.fallbacks = 0  # 退回 DOM 提取的查询数
+        self.responses = 0  # 解码的接口响应数
+
+    def recommend_timeout(self):
+        """本次查询等待推荐接口响应的时间"""
+        if self.recommend or self.decoded < RECOMMEND_PROBES:
+            return RECOMMEND_WAIT
+        return 0
+
+    def classify(self, url):
+        """按 URL 判断接口类型：search / recommend / None（未知）"""
+        if self.search and self.search in url:
+            return 'search'
+        if self.recommend and self.recommend in url:
+            return 'recommend'
+        return None
+
+    def guess(self, url, payload, carried):
+        """自动识别一个带号码列表（或空列表）的未知接口
+
+        Args:
+            carried: 请求参数中是否带有本次查询
+
+        Returns:
+            (search / recommend / None, 证据是否足以记住该接口)
+        """
+        path = urlparse(url).path.lower()
+        if not carried:
+            # 不带查询的请求（如页面加载时的推荐）不可能是本次搜索，也不一定是本次的推荐：只用不记
+            return ('recommend', False) if payload.records else (None, False)
+        if any(hint in path for hint in RECOMMEND_HINTS):
+            return 'recommend', True
+        if payload.paged or any(hint in path for hint in SEARCH_HINTS):
+            return 'search', True
+        return ('search', False) if payload.records else (None, False)
+
+    def learn(self, url, kind):
+        path = urlparse(url).path
+        if kind == 'search' and not self.search:
+            self.search = path
+            print(f'🔎 识别到搜索接口: {path}')
+        elif kind == 'recommend' and not self.recommend:
+            self.recommend = path
+            print(f'🔎 识别到推荐接口: {path}')
+
+    def format_stats(self):
+        total = self.decoded + self.fallbacks
+        return (f'接口响应提取: {self.decoded}/{total} 个查询直接解码（退回 DOM {self.fallbacks} 次，'
+                f'解码响应 {self.responses} 个），搜索接口 {self.search or "未识别"}，'
+                f'推荐接口 {self.recommend or "未识别"}')
+
+
+class ResponseCapture:
+    """一个查询期间监听页面的接口响应（async with 使用，退出时移除监听）
+
+    Args:
+        page: Playwright 页面
+        endpoints: XhrEndpoints
+        query: 本次查询，如 "000*"（自动识别接口时用来判断请求是否属于本次搜索）
+        tail: 查询的尾号，如 "000"
+    """
+
+    def __init__(self, page, endpoints, query=None, tail=None):
+        self.page = page
+        self.endpoints = endpoints
+        self.query = query
+        self.tail = tail
+        self.searches = asyncio.Queue()
+        self.recommends = asyncio.Queue()
+        self._tasks = set()
+
+    async def __aenter__(self):
+        self.page.on('response', self._on_response)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.page.remove_listener('response', self._on_response)
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+
+    def _on_response(self, response):
+        if response.request.resource_type not in RESOURCE_TYPES:
+            return
+        task = asyncio.ensure_future(self._decode(response))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _decode(self, response):
+        endpoints = self.endpoints
+        kind = endpoints.classify(response.url)
+        if kind is None and endpoints.search and endpoints.recommend:
+            return  # 两个接口都已知，其它请求与号码无关
+        if not response.ok:
+            return
+        try:
+            body = await response.json()
+        except Exception:
+            return
+        carried = None
+        if kind is None:
+            carried = self.query is not None and carries_query(response.request, self.query, self.tail)
+        payload = endpoints.decoder.decode(body, allow_empty=kind == 'search' or bool(carried))
+        if payload is None:
+            if kind == 'search':
+                # 已知的搜索接口但形状不符：不必等到超时，立即退回 DOM 提取
+                self.searches.put_nowait(None)
+            return
+        if kind is None:
+            kind, certain = endpoints.guess(response.url, payload, carried)
+            if kind is None:
+                return
+            if certain:
+                endpoints.learn(response.url, kind)
+        endpoints.responses += 1
+        (self.searches if kind == 'search' else self.recommends).put_nowait(payload)
+
+    async def _next(self, queue, timeout):
+        if not queue.empty():
+            return queue.get_nowait()
+        if timeout <= 0:
+            return None
+        try:
+            return await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def next_search(self, timeout):
+        """等待下一个搜索/翻页接口响应（空列表表示没有结果），超时或形状不符时返回 None"""
+        return await self._next(self.searches, timeout)
+
+    async def next_recommend(self, timeout):
+        """等待推荐接口响应（已经到达时立即返回），超时返回 None"""
+        return await self._next(self.recommends, timeout)
@@ -9,8 +9,6 @@
 
 import sys
 import argparse
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
 
 
 def main():
@@ -18,6 +16,10 @@ def main():
     parser.add_argument('--city', default='深圳', help='要爬取的城市名称')
     args = parser.parse_args()
     
+    # 解析完参数再导入 Scrapy + Twisted（--help 无需加载）
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+    
     # 获取Scrapy项目设置
     settings = get_project_settings()
     
@@ -5,63 +5,207 @@
 """
 
 import asyncio
+import collections
+import contextlib
 import json
+import time
+import weakref
 from datetime import datetime
 from playwright.async_api import async_playwright
-import argparse
+import sys
+
+from phone_spider.coverage import CoverageEstimator
+from phone_spider.deadline import Deadline, DeadlineExceeded, EXTRACT_RESERVE, format_progress
+from phone_spider.driver import SearchDriver
+from phone_spider import logs, profiling
+from phone_spider.profiles import LaunchProfile
+from phone_spider.queries import order_by_yield
+from phone_spider.records import stream_records
+from phone_spider.sites import SiteProfile
+from phone_spider.supervisor import BrowserInterrupted
+
+# 热路径上的事件（每个号码为 DEBUG，每个查询为 INFO，异常为 WARNING），由入口的 LogOutput 决定如何输出
+PHONE_LOG = logs.get_logger('phone')
+QUERY_LOG = logs.get_logger('query')
+HARVEST_LOG = logs.get_logger('harvest')
+BROWSER_LOG = logs.get_logger('browser')
 
 
 class TelecomMultiCityCrawler:
-    def __init__(self, cities=['深圳']):
+    def __init__(self, cities=['深圳'], memory_monitor=None, store=None, queries=None,
+                 coverage_target=None, driver=None, url=None, sessions=None, metrics=None,
+                 status_interval=None, profile=None, deadline=None, supervisor=None, egress=None, site=None,
+                 probe=None):
         self.cities = cities if isinstance(cities, list) else [cities]
-        self.url = 'https://gd.189.cn/TS/tysj/xhb/index.html#/'
+        self.site = SiteProfile.resolve(site)  # 站点配置（名称、JSON 文件路径或 SiteProfile）
+        self.url = url or self.site.url
         self.results = []  # 存储所有城市的结果
+        self.memory_monitor = memory_monitor  # 内存预算监控（可选）
+        self.store = store  # 号码库存（可选，设置后保存搜索结果中的所有号码）
+        self.queries = queries or self.site.repeat_queries()  # 要搜索的查询，默认 000* 到 999*
+        self.coverage_target = coverage_target  # 每个城市的目标覆盖率（可选，达到后提前停止）
+        # 搜索驱动（默认与原来一样模拟点击，只点一次；可选页面内触发）
+        self.driver = (driver or SearchDriver(ui_waits=(0, 0, 3, None))).use_site(self.site)
+        self.sessions = sessions  # 按城市缓存的存储状态（可选，每个城市直接打开搜索页，不再点"更换"）
+        self._restored_pages = weakref.WeakSet()  # 注入了城市快照的页面
+        self.page = None  # 当前页面（内存回收后会被替换）
+        self.profile = LaunchProfile.resolve(profile)  # 浏览器启动配置（名称或 LaunchProfile）
+        self.metrics = metrics  # 运行指标（可选）
+        self.status_interval = status_interval  # 状态行间隔（秒），设置后入口默认只输出警告日志
+        self.verbose = not status_interval
+        self.save = True  # 结束时是否写入 JSON 结果文件
+        self.sink = None  # 流式接口：每个查询完成后调用 await sink(城市, 查询, 号码)
+        self.deadline = deadline or Deadline()  # 整次爬取的截止时间（默认不限时）
+        self.completed = []  # 已完成的 "城市:查询"
+        self.pending = []  # 截止时间到达时还没完成的 "城市:查询"
+        self.supervisor = supervisor  # 浏览器监督（可选，崩溃/卡死时重启浏览器并重新执行查询）
+        self.browser = None  # 当前浏览器（监督者重启后会被替换）
+        self.egress = egress  # 出口池（可选，每个上下文使用余量最多的出口）
+        self.probe = probe  # 变化探测（可选，城市的探测指纹与上次相同时跳过该城市的全量爬取）
+        self.unchanged = []  # 因为没有变化而跳过的城市
+        
+    def stream(self, maxsize=100, save=False):
+        """以异步迭代器的方式运行爬虫，每个查询完成后立即产出匹配的号码
         
+        Args:
+            maxsize: 缓冲的记录数，调用方处理不过来时爬虫等待
+            save: 是否仍然写入 JSON 结果文件（默认不写）
+        """
+        self.save = save
+        return stream_records(self, maxsize)
+    
     async def run(self):
         """运行爬虫"""
+        status = self.metrics.start_status(self.status_interval) if self.metrics else None
+        try:
+            await self._run()
+        finally:
+            if status:
+                status.cancel()
+    
+    def _stage(self, stage):
+        """阶段计时（未启用指标时不做任何事）"""
+        if self.metrics is None:
+            return contextlib.nullcontext()
+        return self.metrics.stage.time(stage)
+    
+    def _record_error(self, error):
+        if self.metrics:
+            self.metrics.record_error(error)
+    
+    async def _launch(self, p):
+        """启动浏览器（有监督时由监督者启动，之后可以被重启）"""
+        if self.supervisor:
+            self.browser = await self.supervisor.launch(p, self.profile)
+        else:
+            self.browser = await self.profile.launch(p)
+        return self.browser
+    
+    async def _close(self):
+        if self.supervisor:
+            await self.supervisor.close()
+        else:
+            await self.browser.close()
+    
+    async def _guarded(self, page, awaitable):
+        """有监督时在心跳监督下执行"""
+        if self.supervisor is None:
+            return await awaitable
+        return await self.supervisor.guard(page, awaitable)
+    
+    async def _recover(self, page, city, error):
+        """浏览器异常后换一个可用的页面并重新进入当前城市"""
+        self.browser = await self.supervisor.recover(page.context.browser, error)
+        return await self._reopen_page(page, city)
+    
+    async def _close_page(self, page):
+        """关闭页面所在的上下文（先丢弃内存监控的 CDP 会话；浏览器已崩溃/断开时关闭会失败，忽略即可）"""
+        if self.memory_monitor:
+            self.memory_monitor.forget(page)
+        with contextlib.suppress(Exception):
+            await page.context.close()
+    
+    async def _reopen_page(self, page, city):
+        """关闭页面所在的上下文，新建上下文（重新分配出口）并重新进入当前城市"""
+        await self._close_page(page)
+        context, page = await self._open_page(self.browser, city)
+        await page.goto(self.url, timeout=self.deadline.timeout_ms(30000))
+        if not self.sessions:
+            await self.deadline.sleep(5)
+        await self.deadline.run(self._enter_city(page, city))
+        self.page = page
+        return page
+    
+    async def _run(self):
         async with async_playwright() as p:
-            # 启动浏览器
-            browser = await p.chromium.launch(
-                headless=True,
-                args=['--disable-blink-features=AutomationControlled']
-            )
-            
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            page = await context.new_page()
+            # 按启动配置启动浏览器（默认 Chromium headless shell）
+            browser = await self._launch(p)
             
             try:
-                # 访问网站
-                print(f'正在访问网站: {self.url}')
-                await page.goto(self.url, timeout=30000)
-                await asyncio.sleep(5)
+                if not self.sessions:
+                    context, self.page = await self._open_page(browser)
+                    
+                    # 访问网站
+                    print(f'正在访问网站: {self.url}')
+                    await self.page.goto(self.url, timeout=self.deadline.timeout_ms(30000))
+                    await self.deadline.sleep(5)
                 
                 # 爬取每个城市
                 for city in self.cities:
+                    if self.deadline.expired():
+                        break
                     print(f'\n{"="*60}')
                     print(f'开始爬取城市: {city}')
                     print(f'{"="*60}')
                     
-                    city_phones = await self._crawl_city(page, city)
+                    if self.sessions:
+                        # 每个城市用自己的会话快照新建上下文，直接进入该城市的搜索页
+                        if self.page:
+                            await self._close_page(self.page)
+                        context, self.page = await self._open_page(self.browser, city)
+                        await self.page.goto(self.url, timeout=self.deadline.timeout_ms(30000))
+                    
+                    city_phones = await self._crawl_city(self.page, city)
+                    if city in self.unchanged:
+                        logs.flush()
+                        print(f'\n✅ {city} 没有变化，已跳过全量爬取')
+                        continue
                     self.results.append({
                         "city": city,
                         "phone": sorted(city_phones)
                     })
                     
+                    logs.flush()  # 先写出队列中的查询日志
                     print(f'\n✅ {city} 完成，共找到 {len(city_phones)} 个号码')
                 
                 # 保存结果
-                self._save_results()
-                print(f'\n\n🎉 全部完成！共爬取 {len(self.cities)} 个城市，{sum(len(r["phone"]) for r in self.results)} 个号码')
+                if self.save:
+                    await asyncio.to_thread(self._save_results)
+                logs.flush()
+                print(f'\n\n🎉 全部完成！共爬取 {len(self.results)} 个城市，{sum(len(r["phone"]) for r in self.results)} 个号码')
+                if self.deadline.expired():
+                    done = set(self.completed)
+                    self.pending = [f'{c}:{q}' for c in self.cities for q in self.queries if f'{c}:{q}' not in done]
+                    print(format_progress(self.completed, self.pending))
+                if self.memory_monitor:
+                    print(self.memory_monitor.format_summary())
+                print(self.driver.format_stats())
+                if self.sessions:
+                    print(self.sessions.format_stats())
+                if self.supervisor:
+                    print(self.supervisor.format_stats())
+                if self.egress:
+                    print(self.egress.format_stats())
+                if self.probe:
+                    print(self.probe.format_stats())
                 
             except Exception as e:
+                self._record_error(e)
                 print(f'❌ 错误: {e}')
                 import traceback
                 traceback.print_exc()
             finally:
-                await browser.close()
+                await self._close()
     
     async def _crawl_city(self, page, city):
         """爬取指定城市的号码"""
@@ -69,102 +213,339 @@ class TelecomMultiCityCrawler:
         
         try:
             # 等待并选择城市
-            await page.wait_for_selector('text=请确认号码归属地', timeout=10000)
-            await page.get_by_text(city, exact=True).first.click()
-            await asyncio.sleep(1)
-            await page.get_by_text('确认,去选号').click()
-            await page.wait_for_load_state('networkidle')
+            with self._stage('city'):
+                await self.deadline.run(self._enter_city(page, city))
             print(f'城市 {city} 选择完成')
             
-            # 搜索所有号码模式
-            for i in range(10):
-                pattern = f'{i}{i}{i}*'
-                print(f'\n正在搜索模式: {pattern}')
+            coverage = CoverageEstimator(self.coverage_target) if self.coverage_target else None
+            queries = self.queries
+            if self.store and self.deadline.seconds is not None:
+                # 时间有限：按库存中的历史产出先跑产出高的查询
+                queries = order_by_yield(queries, self.store.query_yields(city, self.site))
+            
+            # 变化探测：没有变化时跳过该城市的全量爬取
+            probe_id = None
+            if self.probe:
+                full, probe_id = await self.deadline.run(self._probe(page, city))
+                if not full:
+                    self.unchanged.append(city)
+                    queries = []
+            
+            # 搜索所有号码模式（浏览器异常时被打断的查询重新排到队首）
+            queue = collections.deque(queries)
+            retries = {}
+            while queue:
+                pattern = queue.popleft()
+                if coverage and coverage.should_stop():
+                    print(f'\n🛑 估计覆盖率已达到 {coverage.target:.0%}，跳过剩余查询')
+                    break
+                if self.deadline.expired():
+                    break
+                QUERY_LOG.info(f'\n正在搜索模式: {pattern}', city=city, query=pattern, event='start')
                 
-                # 清空搜索框并输入新模式
-                search_box = page.get_by_placeholder('输入任意1-4位尾号搜索')
-                await search_box.clear()
-                await search_box.fill(pattern)
+                # 输入新模式并搜索，提取号码（到截止时间时取消）
+                observed = {} if (self.store or coverage) else None
+                started_at = time.time()
+                try:
+                    phones = await self.deadline.run(self._guarded(page, self._search_query(page, city, pattern, observed)))
+                except DeadlineExceeded:
+                    break
+                except BrowserInterrupted as e:
+                    self._record_error(e)
+                    BROWSER_LOG.warning(f'💥 浏览器异常（{e.reason}），恢复后重新执行 {city}:{pattern}',
+                                        city=city, query=pattern, reason=e.reason)
+                    if self.supervisor.requeue(f'{city}:{pattern}', retries):
+                        queue.appendleft(pattern)
+                    page = await self._recover(page, city, e)
+                    continue
+                self.completed.append(f'{city}:{pattern}')
+                if self.metrics:
+                    self.metrics.searches.inc()
+                    self.metrics.record_numbers(phones)
+                QUERY_LOG.info(f'找到 {len(phones)} 个符合条件的号码',
+                               city=city, query=pattern, event='done', count=len(phones))
+                if phones and PHONE_LOG.enabled('debug'):
+                    for phone in sorted(phones):
+                        PHONE_LOG.debug(f'    📱 {phone}', city=city, query=pattern, phone=phone)
+                all_phones.update(phones)
+                if self.sink is not None:
+                    await self.sink(city, pattern, phones)
+                if observed and self.store:
+                    self._harvest(city, pattern, observed, started_at)
+                if coverage:
+                    coverage.add(pattern, (observed or {}).get('search', ()), (observed or {}).get('recommend', ()))
                 
-                # 点击搜索按钮
-                await page.get_by_text('搜索').click()
-                await asyncio.sleep(3)
+                # 两次查询之间检查内存预算，超出则重建上下文并重新选择当前城市
+                if self.memory_monitor:
+                    recycle = await self.memory_monitor.should_recycle(page)
+                    if self.metrics:
+                        self.metrics.record_memory(self.memory_monitor.last)
+                    if recycle:
+                        page = await self._recycle_page(page, city)
                 
-                # 提取号码（包括点击"更多号码"），并验证是否匹配模式
-                search_pattern = f'{i}{i}{i}'  # 要匹配的尾号
-                phones = await self._extract_phones_with_more(page, search_pattern)
-                print(f'找到 {len(phones)} 个符合条件的号码')
-                all_phones.update(phones)
+                # 当前出口被剔除时换一个上下文（分配到其它出口）
+                if self.egress and self.egress.evicted(page):
+                    print('🔀 当前出口已被剔除，切换出口')
+                    page = await self._reopen_page(page, city)
             
-            # 切换回城市选择（为下一个城市做准备）
-            if self.cities.index(city) < len(self.cities) - 1:
+            if coverage:
+                print(coverage.format_report(city))
+            done = {q for q in queries if f'{city}:{q}' in self.completed}
+            if probe_id is not None and city not in self.unchanged and not self.deadline.expired() and (
+                    len(done) >= len(queries) or (coverage and coverage.should_stop())):
+                self.probe.completed(probe_id)
+            
+            # 切换回城市选择（为下一个城市做准备；使用会话快照时下一个城市会新建上下文）
+            if (not self.sessions and not self.deadline.expired()
+                    and self.cities.index(city) < len(self.cities) - 1):
                 print(f'\n准备切换到下一个城市...')
-                change_button = page.locator('text=更换')
+                change_button = page.locator(self.site.city_change)
                 if await change_button.count() > 0:
                     await change_button.click()
                     await asyncio.sleep(2)
                     
+        except DeadlineExceeded:
+            print(f'城市 {city} 在截止时间内没能完成选择')
         except Exception as e:
+            self._record_error(e)
             print(f'爬取城市 {city} 时出错: {e}')
         
         return list(all_phones)
     
-    async def _extract_phones_with_more(self, page, pattern):
-        """提取搜索结果的号码（不包括推荐号码）"""
+    async def _probe(self, page, city):
+        """变化探测：搜索几个代表性查询的第一页（不翻页）并与上次的指纹比较
+
+        Returns:
+            (是否全量爬取, 探测记录 id)
+        """
+        fingerprints = {}
+        for query in self.probe.queries(self.site):
+            if self.egress:
+                await self.egress.acquire(page)
+            observed = {}
+            try:
+                with self._stage('search'):
+                    await self.driver.search(page, query)
+                await self._extract_current_phones(page, self.site.query_tail(query), observed)
+            except Exception as e:
+                # 超时或被拦截：这个查询的指纹为 None（无法判断），不影响其它探测查询
+                self._record_error(e)
+                print(f'⚠️  探测查询 {query} 出错: {e}')
+            fingerprints[query] = self.probe.fingerprint(observed.get('search', ()))
+        full, reason, probe_id = self.probe.decide(city, fingerprints)
+        print(f'🔬 变化探测（{city}）: {reason}，{"全量爬取" if full else "跳过全量爬取"}')
+        return full, probe_id
+    
+    async def _search_query(self, page, city, pattern, observed):
+        """搜索一个查询并提取匹配的号码"""
+        with profiling.track(city, pattern):
+            if self.metrics:
+                self.metrics.in_flight.inc()
+            try:
+                if self.egress:
+                    await self.egress.acquire(page)
+                with self._stage('search'):
+                    await self.driver.search(page, pattern)
+                
+                # 提取号码（包括点击"更多号码"），并验证是否匹配模式
+                search_pattern = self.site.query_tail(pattern)  # 要匹配的尾号
+                with self._stage('extract'):
+                    return await self._extract_phones_with_more(page, search_pattern, observed)
+            except Exception:
+                if self.egress:
+                    self.egress.failed(page)
+                raise
+            finally:
+                if self.metrics:
+                    self.metrics.in_flight.dec()
+    
+    async def _open_page(self, browser, city=None):
+        """创建新的context和page（有该城市的快照时注入存储状态）"""
+        options = dict(self.profile.context_options)
+        egress = None
+        if self.egress:
+            # 粘性分配：上下文整个生命周期都使用这个出口（及其固定的 User-Agent）
+            egress = self.egress.assign()
+            options.update(self.egress.context_options(egress, user_agent='user_agent' in options))
+        restored = False
+        context = None
+        try:
+            if self.sessions and city:
+                context, restored = await self.sessions.new_context(browser, self.site.name, city, **options)
+            else:
+                context = await browser.new_context(**options)
+            page = await context.new_page()
+        except BaseException:
+            # 还没有 bind()：上下文关闭时不会释放出口，在这里归还名额
+            if egress:
+                self.egress.release(egress)
+            if context is not None:
+                with contextlib.suppress(Exception):
+                    await context.close()
+            raise
+        if restored:
+            self._restored_pages.add(page)
+        if egress:
+            self.egress.bind(page, egress)
+        return context, page
+    
+    async def _enter_city(self, page, city):
+        """进入城市搜索页：页面注入了快照且有效时直接进入，否则走地区选择弹窗并保存快照"""
+        if self.sessions and page in self._restored_pages:
+            if await self.sessions.wait_ready(page, self.site.search_placeholder, self.site.city_popup_text):
+                self.sessions.restored += 1
+                return
+            self.sessions.stale += 1
+            self.sessions.invalidate(self.site.name, city)
+        await self._select_city(page, city)
+        if self.sessions:
+            await self.sessions.capture(page, self.site.name, city)
+    
+    async def _select_city(self, page, city):
+        """在地区选择弹窗中选择城市并确认"""
+        await page.wait_for_selector(self.site.city_popup, timeout=10000)
+        await page.get_by_text(city, exact=True).first.click()
+        await asyncio.sleep(1)
+        await page.get_by_text(self.site.city_confirm_text).click()
+        await page.wait_for_load_state('networkidle')
+    
+    async def _recycle_page(self, page, city):
+        """关闭超出内存预算的上下文，新建上下文并恢复当前城市的选择
+
+        重建上下文、加载页面和重新进入城市都只用截止时间前的剩余时间（留出提取的时间）；
+        剩余时间已不够时不回收，剩下的查询反正不会再执行。
+        """
+        if self.deadline.expired(margin=EXTRACT_RESERVE):
+            return page
+        context = page.context
+        browser = context.browser
+        self.memory_monitor.forget(page)
+        await context.close()
+        self.memory_monitor.recycles += 1
+        print('♻️  内存超出预算，已回收浏览器上下文')
+        
+        context, page = await self._open_page(browser, city)
+        await page.goto(self.url, timeout=self.deadline.timeout_ms(30000, reserve=EXTRACT_RESERVE))
+        if not self.sessions:
+            await self.deadline.sleep(5)
+        await self.deadline.run(self._enter_city(page, city))
+        self.page = page
+        return page
+    
+    async def _extract_phones_with_more(self, page, pattern, observed=None):
+        """提取搜索结果的号码（不包括推荐号码）
+        
+        设置了号码库存或覆盖率估计器（observed 不为 None）时，"为您推荐"区域的号码也和单城市版本一样
+        记入 observed['recommend']（只用于库存和覆盖率，不算作搜索结果）。
+        """
         all_phones = set()
         
         try:
             # 先检查是否有"查不到号码信息"
-            no_result = await page.query_selector('text=查不到号码信息')
+            no_result = await page.query_selector(self.site.no_result)
             if no_result:
                 return list(all_phones)
             
             # 等待号码列表加载
             try:
-                await page.wait_for_selector('ul > li', timeout=5000)
-            except:
+                await page.wait_for_selector(self.site.result_item, timeout=5000)
+            except Exception:
                 return list(all_phones)
             
             # 提取所有号码（搜索结果本身就是全部，不需要点击"更多号码"）
-            phones = await self._extract_current_phones(page, pattern)
+            phones = await self._extract_current_phones(page, pattern, observed)
             all_phones.update(phones)
+            
+            # 记录"为您推荐"区域的号码（推荐号码可能延迟加载）
+            if observed is not None:
+                await self.deadline.sleep(1)
+                await self._extract_recommend_phones(page, pattern, observed)
                     
         except Exception as e:
-            print(f'提取号码时出错: {e}')
+            self._record_error(e)
+            QUERY_LOG.warning(f'提取号码时出错: {e}', query=pattern, error=str(e))
         
         return list(all_phones)
     
-    async def _extract_current_phones(self, page, pattern):
+    async def _extract_current_phones(self, page, pattern, observed=None):
         """提取当前页面的手机号码，只返回匹配指定模式的号码
         
         Args:
             page: Playwright页面对象
             pattern: 要匹配的尾号模式，如 "000"、"111" 等
+            observed: 可选，{来源: 号码集合}，记录看到的所有号码（不论是否匹配）
         
         Returns:
             匹配模式的号码集合
         """
         phones = set()
         try:
-            phone_items = await page.query_selector_all('ul > li')
+            phone_items = await page.query_selector_all(self.site.result_item)
             
             for item in phone_items:
                 try:
-                    phone_text = await item.query_selector('p:first-child')
+                    phone_text = await item.query_selector(self.site.result_phone)
                     if phone_text:
                         phone = await phone_text.inner_text()
                         phone = phone.strip('"')
+                        if observed is not None:
+                            observed.setdefault('search', set()).add(phone)
                         
                         # 验证号码是否匹配搜索模式
                         if self._match_pattern(phone, pattern):
                             phones.add(phone)
-                except:
+                except Exception:
                     continue
-        except:
+        except Exception:
             pass
         
         return phones
     
+    async def _extract_recommend_phones(self, page, pattern, observed=None):
+        """提取"为您推荐"区域的手机号码，只返回匹配指定模式的号码
+        
+        Args:
+            page: Playwright页面对象
+            pattern: 要匹配的尾号模式，如 "000"、"111" 等
+            observed: 可选，{来源: 号码集合}，记录看到的所有号码（不论是否匹配）
+        
+        Returns:
+            匹配模式的号码集合
+        """
+        phones = set()
+        try:
+            recommend_section = await page.query_selector(self.site.recommend)
+            if not recommend_section:
+                return phones
+            
+            for p_tag in await page.query_selector_all('p'):
+                try:
+                    phone = self.site.find_phone(await p_tag.inner_text())
+                    if phone:
+                        if observed is not None and phone not in observed.get('search', ()):
+                            observed.setdefault('recommend', set()).add(phone)
+                        if self._match_pattern(phone, pattern):
+                            phones.add(phone)
+                except Exception:
+                    continue
+        except Exception:
+            pass
+        
+        return phones
+    
+    def _harvest(self, city, query, observed, started_at=None):
+        """把一次查询看到的所有号码按来源写入库存，并记录本次运行（用于安排重新爬取）"""
+        finished_at = time.time()
+        seen_at = int(finished_at)
+        new_count = 0
+        for source, phones in observed.items():
+            new_count += self.store.observe(city, query, source, phones, seen_at)
+        if started_at is not None:
+            self.store.record_run(city, query, observed.get('search', ()), started_at, finished_at, self.site)
+        total = sum(len(p) for p in observed.values())
+        HARVEST_LOG.info(f'  🗃  库存: 本次看到 {total} 个号码，新增 {new_count} 个',
+                         city=city, query=query, seen=total, new=new_count)
+    
     def _match_pattern(self, phone, pattern):
         """检查号码是否匹配搜索模式
         
@@ -179,14 +560,8 @@ class TelecomMultiCityCrawler:
         Returns:
             是否匹配
         """
-        if len(phone) < 11:
-            return False
-        
-        # 获取后7位号码用于匹配
-        last_digits = phone[-7:]
-        
-        # 检查是否包含连续的3位重复数字
-        return pattern in last_digits
+        # 按站点的查询语法匹配（gd189：后7位包含尾号）
+        return self.site.matches(phone, pattern)
     
     def _save_results(self):
         """保存结果到JSON文件"""
@@ -214,21 +589,12 @@ class TelecomMultiCityCrawler:
         print(f'\n📁 结果已保存到: {filename}')
 
 
-async def main():
-    parser = argparse.ArgumentParser(description='电信号码爬虫 - 多城市版')
-    parser.add_argument('--cities', nargs='+', default=['深圳'], 
-                       help='要爬取的城市名称（可以指定多个，用空格分隔）')
-    args = parser.parse_args()
-    
-    print('=' * 60)
-    print('电信号码爬虫 - 多城市版 - 启动中...')
-    print(f'目标城市: {", ".join(args.cities)}')
-    print('=' * 60)
-    
-    crawler = TelecomMultiCityCrawler(cities=args.cities)
-    await crawler.run()
+def main(argv=None):
+    """旧入口，转发给 python -m phone_spider sweep（参数相同）"""
+    from phone_spider import cli
 
+    cli.main(['sweep', *(sys.argv[1:] if argv is None else argv)])
 
-if __name__ == '__main__':
-    asyncio.run(main())
 
+if __name__ == '__main__':
+    main()
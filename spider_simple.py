@@ -5,125 +5,464 @@
 """
 
 import asyncio
+import collections
+import contextlib
 import json
+import time
+import weakref
 from datetime import datetime
 from playwright.async_api import async_playwright
-import argparse
+import sys
+
+from phone_spider.deadline import Deadline, DeadlineExceeded, EXTRACT_RESERVE, format_progress
+from phone_spider.driver import SearchDriver
+from phone_spider import logs, profiling
+from phone_spider.profiles import LaunchProfile
+from phone_spider.queries import order_by_yield
+from phone_spider.records import stream_records
+from phone_spider.sites import SiteProfile
+from phone_spider.stages import Pipeline, QueryResult, Stage
+from phone_spider.supervisor import BrowserInterrupted
+from phone_spider.verify import BulkVerifier
+from phone_spider.xhr import MODES as EXTRACT_MODES, ResponseCapture, XhrEndpoints
+
+
+# 一次取回搜索结果和推荐区的原始文本（管道模式：浏览器端只取文本，解析交给后续阶段）
+RAW_TEXT_SCRIPT = '''([item, phone, recommend]) => {
+    const items = [];
+    for (const li of document.querySelectorAll(item)) {
+        const p = li.querySelector(phone);
+        if (p) items.push(p.innerText);
+    }
+    const paragraphs = document.body.innerText.includes(recommend)
+        ? Array.from(document.querySelectorAll('p'), p => p.innerText) : [];
+    return {items, paragraphs};
+}'''
+
+# 热路径上的事件（每个号码为 DEBUG，每个查询为 INFO，异常为 WARNING），由入口的 LogOutput 决定如何输出
+PHONE_LOG = logs.get_logger('phone')
+QUERY_LOG = logs.get_logger('query')
+HARVEST_LOG = logs.get_logger('harvest')
+BROWSER_LOG = logs.get_logger('browser')
 
 
 class TelecomCrawler:
-    def __init__(self, city='深圳', concurrent=False):
+    def __init__(self, city='深圳', concurrent=False, memory_monitor=None, cache=None, store=None,
+                 queries=None, coverage=None, driver=None, url=None, sessions=None, metrics=None,
+                 status_interval=None, profile=None, deadline=None, supervisor=None, egress=None, site=None,
+                 pipeline=None, extraction='dom', probe=None):
         self.city = city
-        self.url = 'https://gd.189.cn/TS/tysj/xhb/index.html#/'
+        self.site = SiteProfile.resolve(site)  # 站点配置（名称、JSON 文件路径或 SiteProfile）
+        self.url = url or self.site.url
         self.phone_numbers = []  # 存储所有号码（字符串格式）
         self.concurrent = concurrent  # 是否使用并发模式
+        self.memory_monitor = memory_monitor  # 内存预算监控（可选）
+        self.cache = cache  # 查询结果缓存（可选，多个爬虫实例可共享同一个）
+        self.store = store  # 号码库存（可选，设置后保存页面上看到的所有号码）
+        self.queries = queries or self.site.repeat_queries()  # 要搜索的查询，默认 000* 到 999*
+        self.coverage = coverage  # 覆盖率估计器（可选，达到目标覆盖率后提前停止）
+        self.driver = (driver or SearchDriver()).use_site(self.site)  # 搜索驱动（默认页面内触发，失败时退回模拟点击）
+        self.sessions = sessions  # 按城市缓存的存储状态（可选，用于跳过地区选择弹窗）
+        self._restored_pages = weakref.WeakSet()  # 注入了城市快照的页面
+        self.profile = LaunchProfile.resolve(profile)  # 浏览器启动配置（名称或 LaunchProfile）
+        self.metrics = metrics  # 运行指标（可选）
+        self.status_interval = status_interval  # 状态行间隔（秒），设置后入口默认只输出警告日志
+        self.verbose = not status_interval
+        self.save = True  # 结束时是否写入 JSON 结果文件
+        self.sink = None  # 流式接口：每个查询完成后调用 await sink(城市, 查询, 号码)
+        self.deadline = deadline or Deadline()  # 截止时间（默认不限时）
+        self.completed = []  # 已完成的查询
+        self.pending = []  # 截止时间到达时还没完成的查询
+        self.truncated = set()  # 翻页没翻完（结果可能不全）的查询
+        self.supervisor = supervisor  # 浏览器监督（可选，崩溃/卡死时重启浏览器并重新执行查询）
+        self.egress = egress  # 出口池（可选，每个上下文使用余量最多的出口）
+        self.pipeline = pipeline  # 分阶段管道各阶段的工作者数量（可选，parse_workers() 的结果）
+        if extraction not in EXTRACT_MODES:
+            raise ValueError(f'未知的提取方式: {extraction}（可选: {", ".join(EXTRACT_MODES)}）')
+        # 接口响应提取（xhr）时的接口识别和统计；dom 为 None
+        self.endpoints = XhrEndpoints(self.site) if extraction == 'xhr' else None
+        self.prices = {}  # 接口响应中的金额: {号码: (最低消费分, 预存话费分)}
+        self.probe = probe  # 变化探测（可选，探测查询的指纹与上次相同时跳过全量爬取）
+        self.unchanged = False  # 本次是否因为没有变化而跳过了全量爬取
+        self._probe_id = None
+        self._pipeline = None
+        self._found = set()
+        
+    def stream(self, maxsize=100, save=False):
+        """以异步迭代器的方式运行爬虫，每个查询完成后立即产出匹配的号码
         
+        Args:
+            maxsize: 缓冲的记录数，调用方处理不过来时爬虫等待
+            save: 是否仍然写入 JSON 结果文件（默认不写）
+        
+        用法：
+            async for record in crawler.stream():
+                ...
+        """
+        self.save = save
+        return stream_records(self, maxsize)
+    
+    async def _emit(self, query, phones):
+        if self.sink is not None:
+            await self.sink(self.city, query, phones, self.prices)
+    
     async def run(self):
         """运行爬虫 - 根据配置选择串行或并发"""
-        if self.concurrent:
-            await self._run_concurrent()
+        status = self.metrics.start_status(self.status_interval) if self.metrics else None
+        if self.store and self.deadline.seconds is not None:
+            # 时间有限：按库存中的历史产出先跑产出高的查询
+            self.queries = order_by_yield(self.queries, self.store.query_yields(self.city, self.site))
+        try:
+            if self.pipeline:
+                await self._run_pipeline()
+            elif self.concurrent:
+                await self._run_concurrent()
+            else:
+                await self._run_serial()
+        finally:
+            if status:
+                status.cancel()
+    
+    async def verify(self, phones, start_digits=3):
+        """批量核对号码是否仍在售（按尾号分组搜索，不做全量爬取）
+        
+        Args:
+            phones: 要核对的号码
+            start_digits: 第一轮使用的尾号位数，结果不完整时逐步加长到4位
+        
+        Returns:
+            {号码: available / unavailable / unknown}
+        """
+        async with async_playwright() as p:
+            browser = await self._launch(p)
+            try:
+                context, page = await self._open_page(browser)
+                await self._select_city(page, verbose=True)
+                
+                async def search(query):
+                    nonlocal page
+                    try:
+                        found = await self._cached(query, lambda: self._guarded(page, self._search_on_page(page, query)))
+                    except BrowserInterrupted as e:
+                        # 本次查询的号码记为无法确认，换一个可用的页面继续核对
+                        self._record_error(e)
+                        BROWSER_LOG.warning(f'💥 浏览器异常（{e.reason}），{query} 的结果记为无法确认',
+                                            city=self.city, query=query, reason=e.reason)
+                        page = await self._recover(page, e)
+                        return set(), False
+                    return set(found), query not in self.truncated
+                
+                verifier = BulkVerifier(search, start_digits, self.site)
+                result = await verifier.verify(phones)
+                print(f'\n{verifier.format_stats(len(result))}')
+                print(self.driver.format_stats())
+                return result
+            finally:
+                await self._close(browser)
+    
+    async def _launch(self, p):
+        """启动浏览器（有监督时由监督者启动，之后可以被重启）"""
+        if self.supervisor:
+            return await self.supervisor.launch(p, self.profile)
+        return await self.profile.launch(p)
+    
+    async def _close(self, browser):
+        if self.supervisor:
+            await self.supervisor.close()
         else:
-            await self._run_serial()
+            await browser.close()
+    
+    async def _guarded(self, page, awaitable):
+        """有监督时在心跳监督下执行"""
+        if self.supervisor is None:
+            return await awaitable
+        return await self.supervisor.guard(page, awaitable)
+    
+    async def _recover(self, page, error):
+        """浏览器异常后换一个可用的页面并恢复城市选择"""
+        browser = await self.supervisor.recover(page.context.browser, error)
+        return await self._reopen_page(page, browser)
+    
+    async def _close_page(self, page):
+        """关闭页面所在的上下文（先丢弃内存监控的 CDP 会话；浏览器已崩溃/断开时关闭会失败，忽略即可）"""
+        if self.memory_monitor:
+            self.memory_monitor.forget(page)
+        with contextlib.suppress(Exception):
+            await page.context.close()
+    
+    async def _reopen_page(self, page, browser=None):
+        """关闭页面所在的上下文，新建上下文（重新分配出口）并恢复城市选择"""
+        browser = browser or page.context.browser
+        await self._close_page(page)
+        context, page = await self._open_page(browser)
+        await self.deadline.run(self._select_city(page))
+        return page
+    
+    async def _throttle(self, page):
+        """有出口池时按页面所用出口的预算等待"""
+        if self.egress:
+            await self.egress.acquire(page)
+    
+    def _stage(self, stage):
+        """阶段计时（未启用指标时不做任何事）"""
+        if self.metrics is None:
+            return contextlib.nullcontext()
+        return self.metrics.stage.time(stage)
+    
+    def _record_error(self, error):
+        if self.metrics:
+            self.metrics.record_error(error)
     
     async def _run_serial(self):
         """运行爬虫（串行版本 - 稳定可靠）"""
         async with async_playwright() as p:
-            # 启动浏览器（模拟真实用户）
-            browser = await p.chromium.launch(
-                headless=True,  # 后台运行
-                args=['--disable-blink-features=AutomationControlled']
-            )
+            # 按启动配置启动浏览器（默认 Chromium headless shell）
+            browser = await self._launch(p)
             
             # 创建页面并设置viewport
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            page = await context.new_page()
+            context, page = await self._open_page(browser)
             
             try:
-                # 访问网站
-                print(f'正在访问网站: {self.url}')
-                await page.goto(self.url, timeout=30000)
-                
-                # 等待页面完全加载
-                print('等待页面加载...')
-                await asyncio.sleep(5)
+                # 访问网站并选择城市
+                await self.deadline.run(self._select_city(page, verbose=True))
                 
-                # 等待地区选择弹窗
-                print('等待地区选择弹窗...')
-                await page.wait_for_selector('text=请确认号码归属地', timeout=10000)
+                # 变化探测：没有变化时跳过全量爬取
+                skip = self.probe is not None and await self.deadline.run(self._probe(page))
                 
-                # 选择城市
-                print(f'选择城市: {self.city}')
-                await page.get_by_text(self.city, exact=True).first.click()
-                await asyncio.sleep(1)
-                
-                # 点击确认按钮
-                await page.get_by_text('确认,去选号').click()
-                await page.wait_for_load_state('networkidle')
-                print('城市选择完成')
-                
-                # 搜索所有号码模式
-                for i in range(10):
-                    pattern = f'{i}{i}{i}*'
-                    print(f'\n正在搜索模式: {pattern}')
-                    
-                    # 清空搜索框并输入新模式
-                    search_box = page.get_by_placeholder('输入任意1-4位尾号搜索')
-                    await search_box.clear()
-                    await asyncio.sleep(0.5)
-                    await search_box.fill(pattern)
-                    await asyncio.sleep(1)
+                # 搜索所有号码模式（浏览器异常时被打断的查询重新排到队首）
+                queue = collections.deque([] if skip else self.queries)
+                retries = {}
+                while queue:
+                    pattern = queue.popleft()
+                    if self._coverage_reached() or self.deadline.expired():
+                        break
+                    QUERY_LOG.info(f'\n正在搜索模式: {pattern}', city=self.city, query=pattern, event='start')
                     
-                    # 点击搜索按钮（多次尝试确保点击成功）
-                    search_button = page.get_by_text('搜索')
-                    await search_button.click()
-                    await asyncio.sleep(2)
+                    try:
+                        phones = await self._cached(
+                            pattern,
+                            lambda: self.deadline.run(self._guarded(page, self._search_on_page(page, pattern))),
+                        )
+                    except DeadlineExceeded:
+                        break
+                    except BrowserInterrupted as e:
+                        self._record_error(e)
+                        BROWSER_LOG.warning(f'💥 浏览器异常（{e.reason}），恢复后重新执行 {pattern}',
+                                            city=self.city, query=pattern, reason=e.reason)
+                        if self.supervisor.requeue(pattern, retries):
+                            queue.appendleft(pattern)
+                        page = await self._recover(page, e)
+                        continue
+                    self.completed.append(pattern)
+                    QUERY_LOG.info(f'找到 {len(phones)} 个符合条件的号码',
+                                   city=self.city, query=pattern, event='done', count=len(phones))
+                    self.phone_numbers.extend(phones)
+                    await self._emit(pattern, phones)
                     
-                    # 再次点击确保搜索执行
-                    await search_button.click()
-                    await asyncio.sleep(5)  # 等待搜索结果和推荐号码完全加载
+                    # 两次查询之间检查内存预算，超出则重建上下文（城市选择会恢复）
+                    if self.memory_monitor:
+                        recycle = await self.memory_monitor.should_recycle(page)
+                        if self.metrics:
+                            self.metrics.record_memory(self.memory_monitor.last)
+                        if recycle:
+                            page = await self._recycle_page(page)
                     
-                    # 提取号码（包括点击"更多号码"），并验证是否匹配模式
-                    search_pattern = f'{i}{i}{i}'  # 要匹配的尾号
-                    phones = await self._extract_phones_with_more(page, search_pattern)
-                    print(f'找到 {len(phones)} 个符合条件的号码')
-                    self.phone_numbers.extend(phones)
+                    # 当前出口被剔除时换一个上下文（分配到其它出口）
+                    if self.egress and self.egress.evicted(page):
+                        print('🔀 当前出口已被剔除，切换出口')
+                        page = await self._reopen_page(page)
                     
                 # 保存结果
-                self._save_results()
-                print(f'\n✅ 爬取完成！共找到 {len(self.phone_numbers)} 个号码')
+                await self._finish()
                 
+            except DeadlineExceeded:
+                # 城市选择没能在截止时间内完成
+                await self._finish()
             except Exception as e:
+                self._record_error(e)
                 print(f'❌ 错误: {e}')
                 import traceback
                 traceback.print_exc()
+                # 已经得到的结果仍然保存
+                if self.completed:
+                    await self._finish()
             finally:
-                await browser.close()
+                await self._close(browser)
+    
+    async def _finish(self):
+        """保存（可能不完整的）结果并打印汇总（写文件在工作线程中进行）"""
+        logs.flush()  # 先写出队列中的查询日志，汇总在它们之后
+        if self.unchanged:
+            print(f'\n✅ {self.city} 没有变化，已跳过全量爬取')
+            return
+        if self._probe_id is not None and not self.deadline.expired() and (
+                len(set(self.completed)) >= len(self.queries) or self._coverage_reached()):
+            self.probe.completed(self._probe_id)
+        if self.save:
+            await asyncio.to_thread(self._save_results)
+        print(f'\n✅ 爬取完成！共找到 {len(self.phone_numbers)} 个号码')
+        if self.deadline.expired():
+            done = set(self.completed)
+            self.pending = [q for q in self.queries if q not in done]
+            print(format_progress(self.completed, self.pending))
+        if self.memory_monitor:
+            print(self.memory_monitor.format_summary())
+        if self.cache:
+            print(self.cache.format_stats())
+        if self.coverage:
+            print(self.coverage.format_report(self.city))
+        print(self.driver.format_stats())
+        if self.sessions:
+            print(self.sessions.format_stats())
+        if self.supervisor:
+            print(self.supervisor.format_stats())
+        if self.egress:
+            print(self.egress.format_stats())
+        if self._pipeline:
+            print(self._pipeline.format_stats())
+        if self.endpoints:
+            print(self.endpoints.format_stats())
+        if self.probe:
+            print(self.probe.format_stats())
+    
+    async def _probe(self, page):
+        """变化探测：搜索几个代表性查询的第一页（不翻页），指纹与上次相同时返回 True"""
+        fingerprints = {}
+        for query in self.probe.queries(self.site):
+            await self._throttle(page)
+            observed = {}
+            try:
+                with self._stage('search'):
+                    await self.driver.search(page, query)
+                await self._extract_current_phones(page, self.site.query_tail(query), observed)
+            except Exception as e:
+                # 超时或被拦截：这个查询的指纹为 None（无法判断），不影响其它探测查询
+                self._record_error(e)
+                print(f'⚠️  探测查询 {query} 出错: {e}')
+            fingerprints[query] = self.probe.fingerprint(observed.get('search', ()))
+        full, reason, self._probe_id = self.probe.decide(self.city, fingerprints)
+        print(f'🔬 变化探测（{self.city}）: {reason}，{"全量爬取" if full else "跳过全量爬取"}')
+        self.unchanged = not full
+        return self.unchanged
+    
+    async def _probe_new_page(self, browser):
+        """在单独的页面上选择城市并做变化探测（并发/管道版本）"""
+        context, page = await self._open_page(browser)
+        try:
+            await self._select_city(page, verbose=True)
+            return await self._probe(page)
+        finally:
+            await self._close_page(page)
+    
+    async def _cached(self, pattern, search):
+        """有缓存时通过缓存执行搜索（相同查询合并为一次），否则直接搜索"""
+        if self.cache is None:
+            return await search()
+        return list(await self.cache.get_or_run(self.city, pattern, search))
+    
+    def _coverage_reached(self):
+        """估计覆盖率已达到目标时返回 True（剩余查询不再执行）"""
+        if self.coverage is None or not self.coverage.should_stop():
+            return False
+        if not getattr(self, '_coverage_announced', False):
+            self._coverage_announced = True
+            print(f'\n🛑 估计覆盖率已达到 {self.coverage.target:.0%}，跳过剩余查询')
+        return True
+    
+    async def _search_on_page(self, page, pattern):
+        """在已选好城市的页面上搜索一个模式（串行版本）"""
+        with profiling.track(self.city, pattern):
+            if self.metrics:
+                self.metrics.in_flight.inc()
+            started_at = time.time()
+            try:
+                await self._throttle(page)
+                if self.endpoints:
+                    phones = await self._search_xhr(page, pattern, started_at)
+                else:
+                    with self._stage('search'):
+                        await self.driver.search(page, pattern)
+                    
+                    # 提取号码（包括点击"更多号码"），并验证是否匹配模式
+                    with self._stage('extract'):
+                        phones = await self._extract_phones_with_more(page, pattern, started_at)
+                if self.metrics:
+                    self.metrics.searches.inc()
+                return phones
+            except Exception:
+                if self.egress:
+                    self.egress.failed(page)
+                raise
+            finally:
+                if self.metrics:
+                    self.metrics.in_flight.dec()
     
     async def _run_concurrent(self):
         """运行爬虫（并发版本 - 速度快）"""
         async with async_playwright() as p:
-            # 启动浏览器（模拟真实用户）
-            browser = await p.chromium.launch(
-                headless=True,  # 后台运行
-                args=['--disable-blink-features=AutomationControlled']
-            )
+            # 按启动配置启动浏览器（默认 Chromium headless shell）
+            browser = await self._launch(p)
             
             try:
-                # 使用信号量限制并发数量（一次最多3个）
-                semaphore = asyncio.Semaphore(3)
+                # 变化探测：没有变化时跳过全量爬取
+                if self.probe and await self.deadline.run(self._probe_new_page(browser)):
+                    await self._finish()
+                    return
+                
+                # 使用信号量限制并发数量（一次最多3个；有出口池时每个出口至少一个）
+                semaphore = asyncio.Semaphore(max(3, len(self.egress)) if self.egress else 3)
                 
-                async def search_with_limit(digit):
-                    async with semaphore:
-                        return await self._search_pattern(browser, digit)
+                skipped = set()
+                retries = {}
+                
+                async def search_with_limit(pattern):
+                    async def search():
+                        nonlocal browser
+                        async with semaphore:
+                            # 排队期间覆盖率可能已达到目标
+                            if self._coverage_reached():
+                                skipped.add(pattern)
+                                return []
+                            while True:
+                                # 截止时间到了就不再开始新的查询（不进入缓存）
+                                if self.deadline.expired():
+                                    raise DeadlineExceeded()
+                                try:
+                                    return await self.deadline.run(self._search_pattern(browser, pattern))
+                                except BrowserInterrupted as e:
+                                    # 浏览器异常：恢复（多个任务同时发现时只重启一次）后重新执行
+                                    self._record_error(e)
+                                    if not self.supervisor.requeue(pattern, retries):
+                                        raise
+                                    BROWSER_LOG.warning(f'💥 浏览器异常（{e.reason}），恢复后重新执行 {pattern}',
+                                                        city=self.city, query=pattern, reason=e.reason)
+                                    browser = await self.supervisor.recover(browser, e)
+                    
+                    # 缓存命中或合并到正在执行的相同查询时不占用并发名额；
+                    # 出错的查询不进入缓存
+                    try:
+                        phones = await self._cached(pattern, search)
+                    except DeadlineExceeded:
+                        phones = []
+                    except Exception as e:
+                        self._record_error(e)
+                        phones = []
+                    else:
+                        if pattern not in skipped:
+                            self.completed.append(pattern)
+                            QUERY_LOG.info(f'\n✓ {pattern}: 找到 {len(phones)} 个号码',
+                                           city=self.city, query=pattern, event='done', count=len(phones))
+                    if self.sink is not None:
+                        # 流式输出时交付结果也占用并发名额：调用方处理得慢，浏览器随之放慢
+                        async with semaphore:
+                            await self._emit(pattern, phones)
+                    return (pattern, phones)
                 
                 # 并发执行所有搜索任务
-                tasks = [search_with_limit(i) for i in range(10)]
+                tasks = [search_with_limit(pattern) for pattern in self.queries]
                 results = await asyncio.gather(*tasks, return_exceptions=True)
                 
-                # 收集结果并去重
+                # 收集结果并去重（每个查询的结果在完成时已经记录过，这里不再逐个输出）
                 phone_set = set()
                 for result in results:
                     if isinstance(result, Exception):
@@ -131,127 +470,529 @@ class TelecomCrawler:
                     elif result:
                         pattern, phones = result
                         phone_set.update(phones)
-                        # 汇总输出
-                        if len(phones) > 0:
-                            print(f'\n✓ {pattern}: 找到 {len(phones)} 个号码')
-                            for phone in sorted(phones):
-                                print(f'    📱 {phone}')
-                        else:
-                            print(f'\n✓ {pattern}: 找到 0 个号码')
                 
                 self.phone_numbers = list(phone_set)
                 
                 # 保存结果
-                self._save_results()
-                print(f'\n✅ 爬取完成！共找到 {len(self.phone_numbers)} 个号码')
+                await self._finish()
                 
+            except DeadlineExceeded:
+                # 城市选择没能在截止时间内完成
+                await self._finish()
             except Exception as e:
+                self._record_error(e)
                 print(f'❌ 错误: {e}')
                 import traceback
                 traceback.print_exc()
+                # 已经得到的结果仍然保存
+                if self.completed:
+                    await self._finish()
             finally:
-                await browser.close()
+                await self._close(browser)
     
-    async def _search_pattern(self, browser, digit):
-        """搜索单个模式（独立任务，用于并发版本）"""
-        pattern = f'{digit}{digit}{digit}*'
-        search_pattern = f'{digit}{digit}{digit}'
+    async def _run_pipeline(self):
+        """运行爬虫（分阶段管道版本）
         
-        print(f'正在搜索模式: {pattern}')
+        多个浏览器工作者各用一个页面从共享的查询队列取查询，只负责搜索、翻页并取回原始文本；
+        解析匹配（parse，工作线程）、汇总统计和流式交付（enrich）、写号码库存（persist，工作线程）在各自的阶段中进行，
+        浏览器不等待 CPU 和磁盘操作，只有下游积压到队列满时才会等待。被取消或出错时各阶段的工作者也会被取消并等待结束。
+        """
+        workers = self.pipeline
+        if self.cache:
+            print('ℹ️  管道模式不使用查询缓存')
+        stages = [
+            Stage('parse', self._parse, workers['parse'], thread=True),
+            Stage('enrich', self._enrich, workers['enrich']),
+        ]
+        if self.store:
+            stages.append(Stage('persist', self._persist, workers['persist'], thread=True))
+        pipeline = self._pipeline = Pipeline(stages, metrics=self.metrics)
+        
+        async with async_playwright() as p:
+            browser = await self._launch(p)
+            pipeline.start()
+            try:
+                # 变化探测：没有变化时跳过全量爬取
+                if self.probe and await self.deadline.run(self._probe_new_page(browser)):
+                    await pipeline.close()
+                    await self._finish()
+                    return
+                if self.verbose:
+                    print(f'正在访问网站: {self.url}（{workers["browse"]} 个浏览器工作者）')
+                queue = collections.deque(self.queries)
+                retries = {}
+                await asyncio.gather(*(self._browse_worker(browser, queue, retries)
+                                       for _ in range(workers['browse'])))
+                # 等待已取回的结果流过所有阶段
+                await pipeline.close()
+                await self._finish()
+            except DeadlineExceeded:
+                # 变化探测或城市选择没能在截止时间内完成：已经取回的结果照常处理并保存
+                await pipeline.close()
+                await self._finish()
+            except Exception as e:
+                await pipeline.cancel()
+                self._record_error(e)
+                print(f'❌ 错误: {e}')
+                import traceback
+                traceback.print_exc()
+                # 已经得到的结果仍然保存
+                if self.completed:
+                    await self._finish()
+            finally:
+                # 被取消（如流式接口的调用方提前退出）时不留下孤立的阶段工作者
+                await pipeline.cancel()
+                await self._close(browser)
+    
+    async def _browse_worker(self, browser, queue, retries):
+        """浏览器工作者：在自己的页面上依次执行队列中的查询，把原始结果交给管道"""
+        context, page = await self._open_page(browser)
+        try:
+            try:
+                await self.deadline.run(self._select_city(page))
+            except DeadlineExceeded:
+                return
+            while queue:
+                if self._coverage_reached() or self.deadline.expired():
+                    return
+                query = queue.popleft()
+                start = time.perf_counter()
+                try:
+                    result = await self.deadline.run(self._guarded(page, self._browse(page, query)))
+                except DeadlineExceeded:
+                    return
+                except BrowserInterrupted as e:
+                    self._record_error(e)
+                    BROWSER_LOG.warning(f'💥 浏览器异常（{e.reason}），恢复后重新执行 {query}',
+                                        city=self.city, query=query, reason=e.reason)
+                    if self.supervisor.requeue(query, retries):
+                        queue.appendleft(query)
+                    page = await self._recover(page, e)
+                    continue
+                except Exception as e:
+                    self._record_error(e)
+                    QUERY_LOG.warning(f'❌ {query} 搜索出错: {e}', city=self.city, query=query, error=str(e))
+                    continue
+                await self._pipeline.put(result, 'browse', time.perf_counter() - start)
+                
+                # 两次查询之间检查内存预算和出口状态（与串行版本相同）
+                if self.memory_monitor:
+                    recycle = await self.memory_monitor.should_recycle(page)
+                    if self.metrics:
+                        self.metrics.record_memory(self.memory_monitor.last)
+                    if recycle:
+                        page = await self._recycle_page(page)
+                if self.egress and self.egress.evicted(page):
+                    print('🔀 当前出口已被剔除，切换出口')
+                    page = await self._reopen_page(page)
+        finally:
+            await self._close_page(page)
+    
+    async def _browse(self, page, query):
+        """搜索一个查询并一次取回页面上的原始文本（不做解析）
         
-        # 创建新的context和page
-        context = await browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
-        page = await context.new_page()
+        Returns:
+            QueryResult
+        """
+        with profiling.track(self.city, query):
+            if self.metrics:
+                self.metrics.in_flight.inc()
+            started_at = time.time()
+            try:
+                await self._throttle(page)
+                if self.endpoints:
+                    result = await self._browse_xhr(page, query, started_at)
+                    if result is not None:
+                        if self.metrics:
+                            self.metrics.searches.inc()
+                        return result
+                else:
+                    with self._stage('search'):
+                        await self.driver.search(page, query)
+                with self._stage('extract'):
+                    await self._load_more(page, query)
+                    await self.deadline.sleep(1)  # 推荐号码可能延迟加载
+                    texts = await page.evaluate(
+                        RAW_TEXT_SCRIPT, [self.site.result_item, self.site.result_phone, self.site.recommend_text])
+                if self.metrics:
+                    self.metrics.searches.inc()
+                return QueryResult(self.city, query, started_at, texts['items'], texts['paragraphs'],
+                                   truncated=query in self.truncated)
+            except Exception:
+                if self.egress:
+                    self.egress.failed(page)
+                raise
+            finally:
+                if self.metrics:
+                    self.metrics.in_flight.dec()
+    
+    async def _browse_xhr(self, page, query, started_at):
+        """接口响应提取（管道版本）：触发搜索并取回搜索/翻页和推荐接口的号码与金额
         
+        Returns:
+            QueryResult；没有可以解码的响应时等页面渲染完后返回 None（由调用方取回页面文本）
+        """
+        timeout = self.driver.timeout_ms / 1000
+        async with ResponseCapture(page, self.endpoints, query, self.site.query_tail(query)) as capture:
+            with self._stage('search'):
+                await self.driver.search(page, query, wait=False)
+                first = await capture.next_search(timeout)
+            if first is None:
+                self.endpoints.fallbacks += 1
+                await page.wait_for_load_state('networkidle')
+                return None
+            with self._stage('extract'):
+                payloads = await self._load_more_payloads(page, query, capture, first, timeout)
+                recommend = await capture.next_recommend(self.endpoints.recommend_timeout())
+        self.endpoints.decoded += 1
+        prices = {}
+        items = []
+        for payload in payloads:
+            for phone, min_cost, deposit in payload.records:
+                items.append(phone)
+                prices[phone] = (min_cost, deposit)
+        paragraphs = []
+        for phone, min_cost, deposit in (recommend.records if recommend else ()):
+            paragraphs.append(phone)
+            prices.setdefault(phone, (min_cost, deposit))
+        return QueryResult(self.city, query, started_at, items, paragraphs,
+                           truncated=query in self.truncated, prices=prices)
+    
+    def _parse(self, result):
+        """parse 阶段：从原始文本中提取号码，按来源记录看到的号码并筛选匹配查询的号码"""
+        pattern = self.site.query_tail(result.query)
+        search = {text.strip().strip('"') for text in result.items}
+        recommend = set()
+        matched = {phone for phone in search if self._match_pattern(phone, pattern)}
+        for text in result.paragraphs:
+            phone = self.site.find_phone(text)
+            if phone is None:
+                continue
+            if phone not in search:
+                recommend.add(phone)
+            if self._match_pattern(phone, pattern):
+                matched.add(phone)
+        if search:
+            result.observed['search'] = search
+        if recommend:
+            result.observed['recommend'] = recommend
+        result.phones = sorted(matched)
+        return result
+    
+    async def _enrich(self, result):
+        """enrich 阶段：汇总号码、更新覆盖率和指标、流式交付；有号码库存时交给 persist 阶段"""
+        query, phones = result.query, result.phones
+        self.completed.append(query)
+        if result.prices:
+            self.prices.update(result.prices)
+        if self.coverage:
+            self.coverage.add(query, result.observed.get('search', ()), result.observed.get('recommend', ()))
+        if self.metrics:
+            self.metrics.record_numbers(phones)
+        for phone in phones:
+            if phone not in self._found:
+                self._found.add(phone)
+                self.phone_numbers.append(phone)
+        QUERY_LOG.info(f'\n✓ {query}: 找到 {len(phones)} 个号码',
+                       city=self.city, query=query, event='done', count=len(phones))
+        self._log_phones(query, phones)
+        await self._emit(query, phones)
+        return result if self.store else None
+    
+    def _persist(self, result):
+        """persist 阶段（工作线程）：把看到的号码和本次运行写入号码库存"""
+        self._harvest(result.query, result.observed, result.started_at, result.finished_at,
+                      prices=result.prices or None)
+    
+    async def _open_page(self, browser):
+        """创建新的context和page（有城市快照时注入存储状态）"""
+        options = dict(self.profile.context_options)
+        egress = None
+        if self.egress:
+            # 粘性分配：上下文整个生命周期都使用这个出口（及其固定的 User-Agent）
+            egress = self.egress.assign()
+            options.update(self.egress.context_options(egress, user_agent='user_agent' in options))
+        restored = False
+        context = None
         try:
-            # 访问网站
-            await page.goto(self.url, timeout=30000)
-            await asyncio.sleep(3)
-            
-            # 等待地区选择弹窗并选择城市
-            await page.wait_for_selector('text=请确认号码归属地', timeout=10000)
-            await page.get_by_text(self.city, exact=True).first.click()
-            await asyncio.sleep(0.5)
-            await page.get_by_text('确认,去选号').click()
-            await page.wait_for_load_state('networkidle')
-            
-            # 搜索
-            search_box = page.get_by_placeholder('输入任意1-4位尾号搜索')
-            await search_box.clear()
-            await asyncio.sleep(0.3)
-            await search_box.fill(pattern)
-            await asyncio.sleep(0.5)
-            
-            # 点击搜索按钮
-            search_button = page.get_by_text('搜索')
-            await search_button.click()
-            await asyncio.sleep(2)
-            await search_button.click()
-            await asyncio.sleep(2)
-            
-            # 提取号码
-            phones = await self._extract_phones_with_more(page, search_pattern)
+            if self.sessions:
+                context, restored = await self.sessions.new_context(browser, self.site.name, self.city, **options)
+            else:
+                context = await browser.new_context(**options)
+            page = await context.new_page()
+        except BaseException:
+            # 还没有 bind()：上下文关闭时不会释放出口，在这里归还名额
+            if egress:
+                self.egress.release(egress)
+            if context is not None:
+                with contextlib.suppress(Exception):
+                    await context.close()
+            raise
+        if restored:
+            self._restored_pages.add(page)
+        if egress:
+            self.egress.bind(page, egress)
+        return context, page
+    
+    async def _select_city(self, page, load_wait=5, click_wait=1, verbose=False):
+        """访问网站，在地区选择弹窗中选择城市并确认
+        
+        页面注入了城市快照时会直接进入搜索页，此时跳过弹窗；快照失效（仍然弹窗或等待超时）时走原流程并重新保存快照。
+        没有快照的页面总是走弹窗流程（搜索框可能先于弹窗渲染，不能据此判断已经进入搜索页）。
+        """
+        if verbose:
+            print(f'正在访问网站: {self.url}')
+        await page.goto(self.url, timeout=30000)
+        
+        if self.sessions and page in self._restored_pages:
+            if await self.sessions.wait_ready(page, self.site.search_placeholder, self.site.city_popup_text):
+                self.sessions.restored += 1
+                if verbose:
+                    print(f'已通过会话快照直接进入 {self.city} 搜索页')
+                return
+            self.sessions.stale += 1
+            self.sessions.invalidate(self.site.name, self.city)
+            load_wait = 0  # 已经等待过页面加载
+        
+        # 等待页面完全加载
+        if verbose:
+            print('等待页面加载...')
+        await asyncio.sleep(load_wait)
+        
+        # 等待地区选择弹窗
+        if verbose:
+            print('等待地区选择弹窗...')
+        await page.wait_for_selector(self.site.city_popup, timeout=10000)
+        
+        # 选择城市
+        if verbose:
+            print(f'选择城市: {self.city}')
+        await page.get_by_text(self.city, exact=True).first.click()
+        await asyncio.sleep(click_wait)
+        
+        # 点击确认按钮
+        await page.get_by_text(self.site.city_confirm_text).click()
+        await page.wait_for_load_state('networkidle')
+        if verbose:
+            print('城市选择完成')
+        
+        if self.sessions:
+            await self.sessions.capture(page, self.site.name, self.city)
+    
+    async def _recycle_page(self, page):
+        """关闭超出内存预算的上下文，新建上下文并恢复城市选择（剩余时间已不够时不回收）"""
+        if self.deadline.expired(margin=EXTRACT_RESERVE):
+            return page
+        context = page.context
+        browser = context.browser
+        self.memory_monitor.forget(page)
+        await context.close()
+        self.memory_monitor.recycles += 1
+        print('♻️  内存超出预算，已回收浏览器上下文')
+        
+        context, page = await self._open_page(browser)
+        await self.deadline.run(self._select_city(page))
+        return page
+    
+    async def _search_pattern(self, browser, pattern):
+        """搜索单个模式（独立任务，用于并发版本），返回匹配的号码列表，出错时抛出异常"""
+        with profiling.track(self.city, pattern):
+            QUERY_LOG.info(f'正在搜索模式: {pattern}', city=self.city, query=pattern, event='start')
             
-            # 返回结果（包含模式信息用于最后汇总输出）
-            return (pattern, phones)
+            # 创建新的context和page
+            context, page = await self._open_page(browser)
+            if self.metrics:
+                self.metrics.in_flight.inc()
             
-        except Exception as e:
-            return (pattern, [])
-        finally:
-            await context.close()
+            try:
+                phones = await self._guarded(page, self._search_new_page(page, pattern))
+                if self.memory_monitor:
+                    sample = await self.memory_monitor.sample(page)
+                    if self.metrics:
+                        self.metrics.record_memory(sample)
+                if self.metrics:
+                    self.metrics.searches.inc()
+                
+                return phones
+                
+            except Exception:
+                if self.egress:
+                    self.egress.failed(page)
+                raise
+            finally:
+                if self.metrics:
+                    self.metrics.in_flight.dec()
+                await self._close_page(page)
     
-    async def _extract_phones_with_more(self, page, pattern):
-        """提取搜索结果的号码（包括推荐号码和点击"更多号码"后的号码）"""
+    async def _search_new_page(self, page, pattern):
+        """在新页面上选择城市、搜索并提取号码"""
+        started_at = time.time()
+        # 访问网站并选择城市
+        with self._stage('city'):
+            await self._select_city(page, load_wait=3, click_wait=0.5)
+        
+        # 搜索（退回模拟点击时使用较短的等待）
+        await self._throttle(page)
+        if self.endpoints:
+            return await self._search_xhr(page, pattern, started_at, ui_waits=(0.3, 0.5, 2, 2))
+        with self._stage('search'):
+            await self.driver.search(page, pattern, ui_waits=(0.3, 0.5, 2, 2))
+        
+        # 提取号码
+        with self._stage('extract'):
+            return await self._extract_phones_with_more(page, pattern, started_at)
+    
+    async def _extract_phones_with_more(self, page, query, started_at=None):
+        """提取搜索结果的号码（包括推荐号码和点击"更多号码"后的号码）
+        
+        设置了号码库存时，页面上出现的所有号码（包括不匹配模式的）都会按来源保存到库存中；
+        设置了覆盖率估计器时，这些号码也用于估计覆盖率。
+        
+        Args:
+            page: Playwright页面对象
+            query: 本次搜索的查询，如 "000*"
+            started_at: 本次查询的开始时间（Unix 秒），用于在库存中记录运行耗时
+        """
+        pattern = self.site.query_tail(query)  # 要匹配的尾号
         all_phones = set()
+        observed = {} if (self.store or self.coverage) else None
         
         try:
             # 1. 点击"更多号码"按钮直到没有或达到最大次数
-            max_clicks = 10
-            for click_count in range(max_clicks):
-                # 检查是否有"更多号码"按钮
-                more_button = await page.query_selector('div.moreNum')
-                if not more_button:
-                    break
-                
-                # 检查按钮是否可见
-                is_visible = await more_button.is_visible()
-                if not is_visible:
-                    break
-                
-                await more_button.click()
-                await asyncio.sleep(2)  # 减少到2秒
+            await self._load_more(page, query)
             
             # 2. 提取所有搜索结果区域的号码
-            search_phones = await self._extract_current_phones(page, pattern)
+            search_phones = await self._extract_current_phones(page, pattern, observed)
             all_phones.update(search_phones)
             
             # 3. 等待推荐号码加载完成（推荐号码可能延迟加载）
-            await asyncio.sleep(1)  # 减少到0.5秒
+            await self.deadline.sleep(1)  # 减少到0.5秒
             
             # 4. 提取"为您推荐"区域的号码
-            recommend_phones = await self._extract_recommend_phones(page, pattern)
+            recommend_phones = await self._extract_recommend_phones(page, pattern, observed)
             all_phones.update(recommend_phones)
                     
         except Exception as e:
-            print(f'提取号码时出错: {e}')
-        
-        # 打印所有匹配的号码
-        if len(all_phones) > 0:
-            print(f'  找到 {len(all_phones)} 个号码：')
-            for phone in sorted(all_phones):
-                print(f'    📱 {phone}')
+            # 提取中途出错：结果可能不全，按没翻完处理（核对时其中没找到的号码不会被判为已下架）
+            self.truncated.add(query)
+            self._record_error(e)
+            QUERY_LOG.warning(f'提取号码时出错: {e}', city=self.city, query=query, error=str(e))
         
+        self._record_query(query, all_phones, observed, started_at)
         return list(all_phones)
     
-    async def _extract_current_phones(self, page, pattern):
+    def _record_query(self, query, phones, observed, started_at=None, prices=None):
+        """一个查询提取完成后：写库存、更新覆盖率和指标、记录匹配的号码"""
+        if observed is not None:
+            if self.store:
+                self._harvest(query, observed, started_at, prices=prices)
+            if self.coverage:
+                self.coverage.add(query, observed.get('search', ()), observed.get('recommend', ()))
+        if self.metrics:
+            self.metrics.record_numbers(phones)
+        self._log_phones(query, phones)
+    
+    def _log_phones(self, query, phones):
+        """逐个记录匹配的号码（DEBUG，级别不够时不做任何事）"""
+        if not phones or not PHONE_LOG.enabled('debug'):
+            return
+        PHONE_LOG.debug(f'  找到 {len(phones)} 个号码：', city=self.city, query=query, count=len(phones))
+        for phone in sorted(phones):
+            PHONE_LOG.debug(f'    📱 {phone}', city=self.city, query=query, phone=phone)
+    
+    async def _search_xhr(self, page, query, started_at=None, ui_waits=None):
+        """接口响应提取：触发搜索后直接解码搜索/翻页和推荐接口的响应
+        
+        响应一到就结束，不等待渲染；没有可以解码的响应（接口或形状不符）时等页面渲染完后退回 DOM 提取。
+        """
+        timeout = self.driver.timeout_ms / 1000
+        async with ResponseCapture(page, self.endpoints, query, self.site.query_tail(query)) as capture:
+            with self._stage('search'):
+                await self.driver.search(page, query, ui_waits=ui_waits, wait=False)
+                first = await capture.next_search(timeout)
+            if first is None:
+                self.endpoints.fallbacks += 1
+                with self._stage('extract'):
+                    await page.wait_for_load_state('networkidle')
+                    return await self._extract_phones_with_more(page, query, started_at)
+            with self._stage('extract'):
+                payloads = await self._load_more_payloads(page, query, capture, first, timeout)
+                recommend = await capture.next_recommend(self.endpoints.recommend_timeout())
+        self.endpoints.decoded += 1
+        
+        pattern = self.site.query_tail(query)
+        prices = {}
+        search = set()
+        for payload in payloads:
+            for phone, min_cost, deposit in payload.records:
+                search.add(phone)
+                prices[phone] = (min_cost, deposit)
+        recommended = set()
+        for phone, min_cost, deposit in (recommend.records if recommend else ()):
+            if phone not in search:
+                recommended.add(phone)
+            prices.setdefault(phone, (min_cost, deposit))
+        phones = {phone for phone in search | recommended if self._match_pattern(phone, pattern)}
+        self.prices.update(prices)
+        
+        observed = None
+        if self.store or self.coverage:
+            observed = {source: found for source, found in (('search', search), ('recommend', recommended)) if found}
+        self._record_query(query, phones, observed, started_at, prices)
+        return list(phones)
+    
+    async def _load_more_payloads(self, page, query, capture, first, timeout, max_clicks=10):
+        """接口响应表明还有下一页时点击"更多号码"并等待下一页的响应，返回各页的 Payload"""
+        payloads = [first]
+        for click_count in range(max_clicks):
+            if not payloads[-1].has_more:
+                return payloads
+            if self.deadline.expired(margin=EXTRACT_RESERVE):
+                self.truncated.add(query)
+                return payloads
+            await page.click(self.site.more_button, timeout=self.driver.timeout_ms)
+            payload = await capture.next_search(timeout)
+            if payload is None:
+                self.truncated.add(query)
+                return payloads
+            payloads.append(payload)
+        if payloads[-1].has_more:
+            self.truncated.add(query)
+        return payloads
+    
+    async def _load_more(self, page, query, max_clicks=10):
+        """点击"更多号码"按钮直到没有或达到最大次数，没翻完时把查询记入 truncated"""
+        for click_count in range(max_clicks):
+            # 快到截止时间时停止翻页，用剩下的时间提取已加载的号码
+            if self.deadline.expired(margin=EXTRACT_RESERVE):
+                self.truncated.add(query)
+                return
+            
+            # 检查是否有"更多号码"按钮
+            more_button = await page.query_selector(self.site.more_button)
+            if not more_button:
+                return
+            
+            # 检查按钮是否可见
+            is_visible = await more_button.is_visible()
+            if not is_visible:
+                return
+            
+            await more_button.click()
+            await self.deadline.sleep(2)  # 减少到2秒
+        
+        # 达到最大翻页次数后仍有"更多号码"：结果不完整
+        more_button = await page.query_selector(self.site.more_button)
+        if more_button and await more_button.is_visible():
+            self.truncated.add(query)
+    
+    async def _extract_current_phones(self, page, pattern, observed=None):
         """提取搜索结果区域的手机号码，只返回匹配指定模式的号码
         
         Args:
             page: Playwright页面对象
             pattern: 要匹配的尾号模式，如 "000"、"111" 等
+            observed: 可选，{来源: 号码集合}，记录看到的所有号码（不论是否匹配）
         
         Returns:
             匹配模式的号码集合
@@ -260,15 +1001,17 @@ class TelecomCrawler:
         
         try:
             # 获取所有号码项
-            phone_items = await page.query_selector_all('ul > li')
+            phone_items = await page.query_selector_all(self.site.result_item)
             
             for item in phone_items:
                 try:
                     # 提取号码
-                    phone_text = await item.query_selector('p:first-child')
+                    phone_text = await item.query_selector(self.site.result_phone)
                     if phone_text:
                         phone = await phone_text.inner_text()
                         phone = phone.strip('"')
+                        if observed is not None:
+                            observed.setdefault('search', set()).add(phone)
                         
                         # 验证号码是否匹配搜索模式
                         if self._match_pattern(phone, pattern):
@@ -282,12 +1025,13 @@ class TelecomCrawler:
         
         return phones
     
-    async def _extract_recommend_phones(self, page, pattern):
+    async def _extract_recommend_phones(self, page, pattern, observed=None):
         """提取"为您推荐"区域的手机号码，只返回匹配指定模式的号码
         
         Args:
             page: Playwright页面对象
             pattern: 要匹配的尾号模式，如 "000"、"111" 等
+            observed: 可选，{来源: 号码集合}，记录看到的所有号码（不论是否匹配）
         
         Returns:
             匹配模式的号码集合
@@ -296,13 +1040,11 @@ class TelecomCrawler:
         
         try:
             # 检查是否有"为您推荐"文本
-            recommend_section = await page.query_selector('text=为您推荐')
+            recommend_section = await page.query_selector(self.site.recommend)
             if not recommend_section:
                 return phones
             
             # 直接获取推荐区域所有的p标签（包含data-v-*属性的）
-            import re
-            
             # 方法1：获取所有可能包含号码的p标签
             all_p_tags = await page.query_selector_all('p')
             
@@ -312,9 +1054,10 @@ class TelecomCrawler:
                     text = await p_tag.inner_text()
                     
                     # 用正则提取11位手机号
-                    match = re.search(r'1\d{10}', text)
-                    if match:
-                        phone = match.group()
+                    phone = self.site.find_phone(text)
+                    if phone:
+                        if observed is not None and phone not in observed.get('search', ()):
+                            observed.setdefault('recommend', set()).add(phone)
                         # 验证是否匹配搜索模式
                         if self._match_pattern(phone, pattern):
                             phones.add(phone)
@@ -327,6 +1070,19 @@ class TelecomCrawler:
         
         return phones
     
+    def _harvest(self, query, observed, started_at=None, finished_at=None, prices=None):
+        """把一次查询看到的所有号码按来源写入库存，并记录本次运行（用于安排重新爬取）"""
+        finished_at = finished_at or time.time()
+        seen_at = int(finished_at)
+        new_count = 0
+        for source, phones in observed.items():
+            new_count += self.store.observe(self.city, query, source, phones, seen_at, prices=prices)
+        if started_at is not None and query not in self.truncated:
+            self.store.record_run(self.city, query, observed.get('search', ()), started_at, finished_at, self.site)
+        total = sum(len(p) for p in observed.values())
+        HARVEST_LOG.info(f'  🗃  库存: 本次看到 {total} 个号码，新增 {new_count} 个',
+                         city=self.city, query=query, seen=total, new=new_count)
+    
     def _match_pattern(self, phone, pattern):
         """检查号码是否匹配搜索模式
         
@@ -341,14 +1097,8 @@ class TelecomCrawler:
         Returns:
             是否匹配
         """
-        if len(phone) < 11:
-            return False
-        
-        # 获取后7位号码用于匹配
-        last_digits = phone[-7:]
-        
-        # 检查是否包含连续的3位重复数字
-        return pattern in last_digits
+        # 按站点的查询语法匹配（gd189：后7位包含尾号）
+        return self.site.matches(phone, pattern)
     
     def _save_results(self):
         """保存结果到JSON文件（按城市分组格式）"""
@@ -380,22 +1130,16 @@ class TelecomCrawler:
         print(f'\n📁 结果已保存到: {filename}')
 
 
-async def main():
-    parser = argparse.ArgumentParser(description='电信号码爬虫')
-    parser.add_argument('--city', default='深圳', help='要爬取的城市名称（默认：深圳）')
-    parser.add_argument('--concurrent', action='store_true', help='使用并发模式（更快但可能不稳定）')
-    args = parser.parse_args()
-    
-    print('=' * 60)
-    print('电信号码爬虫 - 启动中...')
-    print(f'目标城市: {args.city}')
-    print(f'运行模式: {"并发" if args.concurrent else "串行"}')
-    print('=' * 60)
-    
-    crawler = TelecomCrawler(city=args.city, concurrent=args.concurrent)
-    await crawler.run()
+def main(argv=None):
+    """旧入口，转发给 python -m phone_spider crawl（参数相同，--concurrent 等同于 --engine playwright-pool）"""
+    from phone_spider import cli
 
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if '--concurrent' in argv:
+        argv.remove('--concurrent')
+        argv += ['--engine', 'playwright-pool']
+    cli.main(['crawl', *argv])
 
-if __name__ == '__main__':
-    asyncio.run(main())
 
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,10 @@
 import asyncio
 from playwright.async_api import async_playwright
 
+from phone_spider.sites import SiteProfile
+
+SITE = SiteProfile.resolve('gd189')
+
 
 async def test_000_search():
     async with async_playwright() as p:
@@ -19,32 +23,32 @@ async def test_000_search():
         
         try:
             print('访问网站...')
-            await page.goto('https://gd.189.cn/TS/tysj/xhb/index.html#/', timeout=30000)
+            await page.goto(SITE.url, timeout=30000)
             await asyncio.sleep(5)
             
             print('选择深圳...')
-            await page.wait_for_selector('text=请确认号码归属地', timeout=10000)
+            await page.wait_for_selector(SITE.city_popup, timeout=10000)
             await page.get_by_text('深圳', exact=True).first.click()
             await asyncio.sleep(1)
-            await page.get_by_text('确认,去选号').click()
+            await page.get_by_text(SITE.city_confirm_text).click()
             await asyncio.sleep(3)
             
             print('\n搜索 000*...')
-            search_box = page.get_by_placeholder('输入任意1-4位尾号搜索')
+            search_box = page.get_by_placeholder(SITE.search_placeholder)
             await search_box.clear()
             await search_box.fill('000*')
             await page.get_by_text('搜索').click()
             await asyncio.sleep(3)
             
             # 检查是否有"查不到号码信息"
-            no_result = await page.query_selector('text=查不到号码信息')
+            no_result = await page.query_selector(SITE.no_result)
             if no_result:
                 print('❌ 查不到号码信息')
                 return
             
             print('\n提取所有号码（第一批）：')
-            await page.wait_for_selector('ul > li', timeout=5000)
-            phone_items = await page.query_selector_all('ul > li')
+            await page.wait_for_selector(SITE.result_item, timeout=5000)
+            phone_items = await page.query_selector_all(SITE.result_item)
             
             all_phones = []
             for item in phone_items:
@@ -6,6 +6,10 @@
 import asyncio
 from playwright.async_api import async_playwright
 
+from phone_spider.sites import SiteProfile
+
+SITE = SiteProfile.resolve('gd189')
+
 
 async def test_access():
     async with async_playwright() as p:
@@ -24,7 +28,7 @@ async def test_access():
         
         try:
             print('访问网站...')
-            response = await page.goto('https://gd.189.cn/TS/tysj/xhb/index.html#/', timeout=30000)
+            response = await page.goto(SITE.url, timeout=30000)
             print(f'响应状态: {response.status}')
             
             # 等待一段时间让JS加载
@@ -49,7 +53,7 @@ async def test_access():
             
             # 尝试不同的选择器
             selectors = [
-                'text=请确认号码归属地',
+                SITE.city_popup,
                 'text=当前定位',
                 'text=广州',
                 'text=深圳',
@@ -8,10 +8,14 @@ import json
 from datetime import datetime
 from playwright.async_api import async_playwright
 
+from phone_spider.sites import SiteProfile
+
+SITE = SiteProfile.resolve('gd189')
+
 
 class TestCrawler:
     def __init__(self):
-        self.url = 'https://gd.189.cn/TS/tysj/xhb/index.html#/'
+        self.url = SITE.url
         self.phone_numbers = []
         
     async def run(self):
@@ -33,10 +37,10 @@ class TestCrawler:
                 await asyncio.sleep(5)
                 
                 print('选择深圳...')
-                await page.wait_for_selector('text=请确认号码归属地', timeout=10000)
+                await page.wait_for_selector(SITE.city_popup, timeout=10000)
                 await page.get_by_text('深圳', exact=True).first.click()
                 await asyncio.sleep(1)
-                await page.get_by_text('确认,去选号').click()
+                await page.get_by_text(SITE.city_confirm_text).click()
                 await asyncio.sleep(3)
                 
                 # 只测试两个模式
@@ -46,7 +50,7 @@ class TestCrawler:
                     print(f'搜索模式: {pattern}')
                     print(f'{"="*60}')
                     
-                    search_box = page.get_by_placeholder('输入任意1-4位尾号搜索')
+                    search_box = page.get_by_placeholder(SITE.search_placeholder)
                     await search_box.clear()
                     await search_box.fill(pattern)
                     await page.get_by_text('搜索').click()
@@ -70,20 +74,20 @@ class TestCrawler:
         all_phones = set()
         
         try:
-            no_result = await page.query_selector('text=查不到号码信息')
+            no_result = await page.query_selector(SITE.no_result)
             if no_result:
                 print('❌ 查不到号码信息')
                 return list(all_phones)
             
             try:
-                await page.wait_for_selector('ul > li', timeout=5000)
+                await page.wait_for_selector(SITE.result_item, timeout=5000)
             except:
                 print('❌ 等待号码列表超时')
                 return list(all_phones)
             
             # 第一批
             print('\n提取第一批号码：')
-            phone_items = await page.query_selector_all('ul > li')
+            phone_items = await page.query_selector_all(SITE.result_item)
             print(f'  页面上有 {len(phone_items)} 个号码项')
             
             for i, item in enumerate(phone_items):